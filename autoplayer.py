@@ -0,0 +1,150 @@
+import argparse
+import math
+import time
+
+from simulation import (SCREEN_WIDTH, PADDLE_SPEED, FRAME_DT, INPUT_LEFT, INPUT_RIGHT,
+                        EVENT_LIFE_LOST, EVENT_WRONG_ANSWER, GameSimulation, session_rng)
+
+# Modelo de jugador por defecto: acierta el 90 % y tarda unos 3 segundos
+BOT_ACCURACY = 0.9
+BOT_ANSWER_TIME = 3.0
+# Dispersión (logarítmica) del tiempo de respuesta
+BOT_ANSWER_SPREAD = 0.4
+# Fracción de media paleta en la que el bot apunta al azar para variar los rebotes
+BOT_AIM = 0.6
+# Límites de una partida sin ventana: tiempo de juego y nivel máximo
+MAX_GAME_MINUTES = 60
+MAX_LEVEL = 30
+# Respuestas incorrectas típicas: por poco o por una decena
+WRONG_OFFSETS = (-10, -2, -1, 1, 2, 10)
+
+
+class BotController:
+    # Jugador simulado que sustituye al teclado. La paleta va al punto donde
+    # caerá la bola (con los rebotes en las paredes) y apunta a una zona al
+    # azar de la paleta en cada bajada, como haría un jugador competente. Las
+    # respuestas siguen un modelo de acierto y de tiempo: la probabilidad de
+    # acertar baja accuracy_drop por nivel y el tiempo sigue una distribución
+    # log-normal con mediana answer_time (más answer_time_per_level por nivel).
+    def __init__(self, rng, accuracy=BOT_ACCURACY, answer_time=BOT_ANSWER_TIME, answer_spread=BOT_ANSWER_SPREAD,
+                 accuracy_drop=0.0, answer_time_per_level=0.0, aim=BOT_AIM):
+        self.rng = rng
+        self.accuracy = accuracy
+        self.answer_time = answer_time
+        self.answer_spread = answer_spread
+        self.accuracy_drop = accuracy_drop
+        self.answer_time_per_level = answer_time_per_level
+        self.aim = aim
+        self.aim_offset = 0.0
+        self.descending = False
+
+    def landing_x(self, sim):
+        # x de la bola al llegar a la altura de la paleta, reflejada en las paredes
+        ball = sim.ball
+        distance = sim.paddle.y - (ball.y + ball.h)
+        x = ball.x + sim.ball_speed_x * distance / sim.ball_speed_y
+        span = SCREEN_WIDTH - ball.w
+        x = math.fmod(x, 2 * span)
+        if x < 0:
+            x += 2 * span
+        return (2 * span - x if x > span else x) + ball.w / 2
+
+    def inputs(self, sim):
+        ball = sim.ball
+        paddle = sim.paddle
+        if sim.ball_speed_y > 0:
+            if not self.descending:
+                # Nueva bajada: elegir dónde golpear la bola con la paleta
+                self.descending = True
+                self.aim_offset = (self.rng.random() * 2 - 1) * self.aim * paddle.w / 2
+            target = self.landing_x(sim) + self.aim_offset
+        else:
+            self.descending = False
+            target = ball.x + ball.w / 2
+
+        paddle_center = paddle.x + paddle.w / 2
+        if target < paddle_center - PADDLE_SPEED:
+            return INPUT_LEFT
+        if target > paddle_center + PADDLE_SPEED:
+            return INPUT_RIGHT
+        return 0
+
+    def answer(self, sim):
+        # (respuesta, segundos que tarda en darla) para el desafío pendiente
+        correct_answer = sim.challenge[1]
+        level = sim.level - 1
+        median = self.answer_time + self.answer_time_per_level * level
+        seconds = self.rng.lognormvariate(math.log(median), self.answer_spread)
+        if self.rng.random() < self.accuracy - self.accuracy_drop * level:
+            return correct_answer, seconds
+        return correct_answer + self.rng.choice(WRONG_OFFSETS), seconds
+
+
+def play_game(seed, level=1, max_minutes=MAX_GAME_MINUTES, max_level=MAX_LEVEL, bot_options=None,
+              sim_options=None):
+    # Una partida completa sin ventana con el bot. Termina al perder todas las
+    # vidas, al pasar max_level o al agotar max_minutes de juego (física más
+    # tiempo respondiendo). Devuelve un diccionario con el resultado.
+    sim = GameSimulation(level, rng=session_rng(seed, 'simulacion'), **(sim_options or {}))
+    bot = BotController(session_rng(seed, 'bot'), **(bot_options or {}))
+    limit = max_minutes * 60
+    answer_seconds = 0.0
+    wrong_answers = 0
+    balls_lost = 0
+    levels_completed = 0
+    end = 'time_limit'
+    step = sim.step
+
+    while sim.frame * FRAME_DT + answer_seconds < limit:
+        events = step(bot.inputs(sim), FRAME_DT)
+        if sim.challenge is not None:
+            value, seconds = bot.answer(sim)
+            answer_seconds += seconds
+            events = sim.answer(value, seconds)
+            if EVENT_WRONG_ANSWER in events:
+                wrong_answers += 1
+        elif EVENT_LIFE_LOST in events or sim.game_over:
+            balls_lost += 1
+        if sim.game_over:
+            end = 'game_over'
+            break
+        if sim.level_complete:
+            levels_completed += 1
+            if sim.level >= max_level:
+                end = 'max_level'
+                break
+            sim.next_level()
+
+    return {
+        "seed": seed,
+        "level": sim.level,
+        "levels_completed": levels_completed,
+        "score": sim.score,
+        "lives": sim.lives,
+        "wrong_answers": wrong_answers,
+        "balls_lost": balls_lost,
+        "minutes": (sim.frame * FRAME_DT + answer_seconds) / 60,
+        "end": end,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Partidas sin ventana con un jugador simulado")
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0, help="Semilla de la primera partida; las demás le siguen")
+    parser.add_argument('--accuracy', type=float, default=BOT_ACCURACY)
+    parser.add_argument('--answer-time', type=float, default=BOT_ANSWER_TIME)
+    parser.add_argument('--max-minutes', type=float, default=MAX_GAME_MINUTES)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    bot_options = {"accuracy": args.accuracy, "answer_time": args.answer_time}
+    for seed in range(args.seed, args.seed + args.games):
+        result = play_game(seed, max_minutes=args.max_minutes, bot_options=bot_options)
+        print(f"Semilla {seed}: nivel {result['level']}  puntuación {result['score']}  "
+              f"{result['minutes']:.1f} min  ({result['end']})")
+    print(f"{args.games} partidas en {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import numpy as np
+
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT, PADDLE_WIDTH, BALL_RADIUS
+
+BALL_SIZE = BALL_RADIUS * 2
+POOL_CAPACITY = 64
+# Altura a la que se aparcan las bolas inactivas, lejos de cualquier ladrillo
+PARKED_Y = SCREEN_HEIGHT * 2
+
+
+class BallPool:
+    # Bolas extra del multibola guardadas como arrays preasignados (posición,
+    # velocidad y si están activas) en lugar de un objeto por bola. Paredes,
+    # paleta y ladrillos se resuelven para todas a la vez. Se mueven de forma
+    # discreta: a las velocidades del juego avanzan menos que el alto de un
+    # ladrillo por paso. Los ladrillos que rompen desaparecen sin desafío.
+    def __init__(self, capacity=POOL_CAPACITY):
+        self.capacity = capacity
+        self.x = np.zeros(capacity)
+        self.y = np.full(capacity, float(PARKED_Y))
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)
+        self.prev_y = np.zeros(capacity)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.count = 0
+
+        # Arrays de trabajo: cada paso escribe en ellos con out= en lugar de
+        # crear temporales, y las vistas en columna se preparan una sola vez.
+        # Las operaciones con where= y las reducciones (any) reservan búferes
+        # internos: se calcula en scratch y se copia con copyto(where=), y
+        # para saber si hay algún True se usa count_nonzero
+        self.mask = np.zeros(capacity, dtype=bool)
+        self.hit = np.zeros(capacity, dtype=bool)
+        self.scratch = np.zeros(capacity)
+        self.scratch2 = np.zeros(capacity)
+        self.draw_x = np.zeros(capacity)
+        self.draw_y = np.zeros(capacity)
+        self.x_column = self.x[:, None]
+        self.y_column = self.y[:, None]
+
+        # Copia en arrays de los ladrillos del nivel (ver sync_bricks)
+        self.grid = None
+        self.brick_data = []
+        self.brick_index = {}
+        self.brick_left = np.zeros(0)
+        self.brick_top = np.zeros(0)
+        self.brick_right = np.zeros(0)
+        self.brick_bottom = np.zeros(0)
+        self.brick_alive = np.zeros(0, dtype=bool)
+        self._allocate_matrices(0)
+
+        # Ladrillos rotos y dañados (de varios golpes) en el último paso, para
+        # que el renderizado los borre o los vuelva a dibujar
+        self.broken = []
+        self.damaged = []
+        self.hits = None
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.active[:] = False
+        self.vx[:] = 0.0
+        self.vy[:] = 0.0
+        self.y[:] = PARKED_Y
+        self.count = 0
+
+    def spawn(self, x, y, angles, speed):
+        # Lanza una bola por ángulo (radianes desde la vertical) en los huecos libres
+        free = np.flatnonzero(~self.active)[:len(angles)]
+        angles = np.asarray(angles[:free.size], dtype=float)
+        self.x[free] = x - BALL_RADIUS
+        self.y[free] = y - BALL_SIZE
+        self.prev_x[free] = self.x[free]
+        self.prev_y[free] = self.y[free]
+        self.vx[free] = speed * np.sin(angles)
+        self.vy[free] = -speed * np.cos(angles)
+        self.active[free] = True
+        self.count += free.size
+        return free.size
+
+    def save_positions(self):
+        np.copyto(self.prev_x, self.x)
+        np.copyto(self.prev_y, self.y)
+
+    def interpolate(self, alpha):
+        # Posiciones entre el paso anterior y el actual, en draw_x y draw_y
+        draw_x, draw_y = self.draw_x, self.draw_y
+        np.subtract(self.x, self.prev_x, out=draw_x)
+        draw_x *= alpha
+        draw_x += self.prev_x
+        np.subtract(self.y, self.prev_y, out=draw_y)
+        draw_y *= alpha
+        draw_y += self.prev_y
+        return draw_x, draw_y
+
+    def sync_bricks(self, grid):
+        # Se rehace solo al cambiar de nivel; las bajas se marcan con remove_brick
+        if grid is self.grid:
+            return
+        self.grid = grid
+        self.brick_data = list(grid)
+        self.brick_index = {brick_data: i for i, brick_data in enumerate(self.brick_data)}
+        rects = np.array([(brick.x, brick.y, brick.w, brick.h) for brick, _ in self.brick_data],
+                         dtype=float).reshape(-1, 4)
+        self.brick_left = rects[:, 0]
+        self.brick_top = rects[:, 1]
+        self.brick_right = rects[:, 0] + rects[:, 2]
+        self.brick_bottom = rects[:, 1] + rects[:, 3]
+        self.brick_alive = np.ones(len(self.brick_data), dtype=bool)
+
+        self._allocate_matrices(len(self.brick_data))
+        # Límites de cada ladrillo ya restados del tamaño de la bola: x < right
+        # y left < x + BALL_SIZE equivale a left - BALL_SIZE < x < right
+        np.copyto(self.left_limit, self.brick_left - BALL_SIZE)
+        np.copyto(self.right_limit, self.brick_right)
+        np.copyto(self.top_limit, self.brick_top - BALL_SIZE)
+        np.copyto(self.bottom_limit, self.brick_bottom)
+
+    def _allocate_matrices(self, bricks):
+        # Matrices bola × ladrillo de tamaño completo: NumPy reserva búferes
+        # temporales al combinar una columna con una fila, pero no al operar
+        # arrays de la misma forma, así que la prueba de solapamiento copia
+        # las posiciones a matrices propias (unos 60 KB por matriz en el nivel 7)
+        shape = (self.capacity, bricks)
+        self.ball_x = np.zeros(shape)
+        self.ball_y = np.zeros(shape)
+        self.left_limit = np.zeros(shape)
+        self.right_limit = np.zeros(shape)
+        self.top_limit = np.zeros(shape)
+        self.bottom_limit = np.zeros(shape)
+        self.alive = np.ones(shape, dtype=bool)
+        self.overlap = np.zeros(shape, dtype=bool)
+        self.test = np.zeros(shape, dtype=bool)
+
+    def remove_brick(self, brick_data):
+        index = self.brick_index.get(brick_data)
+        if index is not None:
+            self.brick_alive[index] = False
+            self.alive[:, index] = False
+
+    def step(self, scale, paddle, grid, base_speed, hits=None):
+        # Devuelve cuántas bolas se han perdido por abajo en este paso. Sin
+        # ladrillos rotos ni bolas perdidas no crea arrays temporales. hits
+        # son los golpes que les quedan a los ladrillos de varios golpes.
+        self.broken.clear()
+        self.damaged.clear()
+        if not self.count:
+            return 0
+        self.sync_bricks(grid)
+        self.hits = hits
+
+        x, y, vx, vy, active = self.x, self.y, self.vx, self.vy, self.active
+        mask, scratch = self.mask, self.scratch
+        # Las bolas inactivas tienen velocidad cero y no se mueven
+        np.multiply(vx, scale, out=scratch)
+        x += scratch
+        np.multiply(vy, scale, out=scratch)
+        y += scratch
+
+        # Paredes
+        np.less_equal(x, 0, out=mask)
+        mask &= active
+        np.copyto(x, 0, where=mask)
+        np.absolute(vx, out=scratch)
+        np.copyto(vx, scratch, where=mask)
+        np.add(x, BALL_SIZE, out=scratch)
+        np.greater_equal(scratch, SCREEN_WIDTH, out=mask)
+        mask &= active
+        np.copyto(x, SCREEN_WIDTH - BALL_SIZE, where=mask)
+        np.absolute(vx, out=scratch)
+        scratch *= -1
+        np.copyto(vx, scratch, where=mask)
+        np.less_equal(y, 0, out=mask)
+        mask &= active
+        np.copyto(y, 0, where=mask)
+        np.absolute(vy, out=scratch)
+        np.copyto(vy, scratch, where=mask)
+
+        # Paleta: mismo ángulo de rebote que la bola principal
+        if self._overlap_box(paddle.x, paddle.y, paddle.x + paddle.w, paddle.y + paddle.h):
+            np.greater(vy, 0, out=self.hit)
+            mask &= self.hit
+            # relative / (PADDLE_WIDTH / 2) * (pi / 3), como GameSimulation.step
+            np.subtract(paddle.x + PADDLE_WIDTH / 2, x, out=scratch)
+            scratch *= np.pi / 3 / (PADDLE_WIDTH / 2)
+            np.sin(scratch, out=self.scratch2)
+            self.scratch2 *= -base_speed
+            np.copyto(vx, self.scratch2, where=mask)
+            np.cos(scratch, out=self.scratch2)
+            self.scratch2 *= -base_speed
+            np.copyto(vy, self.scratch2, where=mask)
+            np.copyto(y, paddle.y - 1 - BALL_SIZE, where=mask)
+
+        self._collide_bricks(grid)
+
+        # Las bolas extra que caen se pierden sin costar vidas
+        np.add(y, BALL_SIZE, out=scratch)
+        np.greater_equal(scratch, SCREEN_HEIGHT, out=mask)
+        mask &= active
+        lost = np.count_nonzero(mask)
+        if lost:
+            np.copyto(active, False, where=mask)
+            np.copyto(vx, 0.0, where=mask)
+            np.copyto(vy, 0.0, where=mask)
+            np.copyto(y, PARKED_Y, where=mask)
+            self.count -= lost
+        return lost
+
+    def _overlap_box(self, left, top, right, bottom):
+        # Bolas activas que se solapan con la caja; el resultado queda en mask
+        mask, hit = self.mask, self.hit
+        np.less(self.x, right, out=mask)
+        np.add(self.x, BALL_SIZE, out=self.scratch)
+        np.less(left, self.scratch, out=hit)
+        mask &= hit
+        np.less(self.y, bottom, out=hit)
+        mask &= hit
+        np.add(self.y, BALL_SIZE, out=self.scratch)
+        np.less(top, self.scratch, out=hit)
+        mask &= hit
+        mask &= self.active
+        return np.count_nonzero(mask)
+
+    def _collide_bricks(self, grid):
+        # Todas las bolas contra todos los ladrillos vivos de una vez. Las
+        # bolas inactivas están aparcadas bajo la pantalla y no tocan ninguno.
+        overlap, test = self.overlap, self.test
+        ball_x, ball_y = self.ball_x, self.ball_y
+        np.copyto(ball_x, self.x_column)
+        np.copyto(ball_y, self.y_column)
+        np.less(ball_x, self.right_limit, out=overlap)
+        np.less(self.left_limit, ball_x, out=test)
+        overlap &= test
+        np.less(ball_y, self.bottom_limit, out=test)
+        overlap &= test
+        np.less(self.top_limit, ball_y, out=test)
+        overlap &= test
+        overlap &= self.alive
+        if not np.count_nonzero(overlap):
+            return
+
+        # Hay impacto: a partir de aquí se rompe al menos un ladrillo y ya no
+        # importa crear arrays temporales
+        hit = np.any(overlap, axis=1, out=self.hit)
+        balls = np.flatnonzero(hit)
+        left, top, right, bottom = self.brick_left, self.brick_top, self.brick_right, self.brick_bottom
+        bricks = overlap[balls].argmax(axis=1)
+        bx = self.x[balls]
+        by = self.y[balls]
+        left, top, right, bottom = left[bricks], top[bricks], right[bricks], bottom[bricks]
+
+        # Lado de colisión: la penetración mínima, como GameSimulation._push_out
+        side = np.stack((np.abs(bx + BALL_SIZE - left), np.abs(bx - right),
+                         np.abs(by + BALL_SIZE - top), np.abs(by - bottom)), axis=1).argmin(axis=1)
+        vx = self.vx[balls]
+        vy = self.vy[balls]
+        self.x[balls] = np.where(side == 0, left - 1 - BALL_SIZE, np.where(side == 1, right + 1, bx))
+        self.y[balls] = np.where(side == 2, top - 1 - BALL_SIZE, np.where(side == 3, bottom + 1, by))
+        self.vx[balls] = np.where(side == 0, -np.abs(vx), np.where(side == 1, np.abs(vx), vx))
+        self.vy[balls] = np.where(side == 2, -np.abs(vy), np.where(side == 3, np.abs(vy), vy))
+
+        # Varias bolas pueden tocar el mismo ladrillo en el mismo paso
+        hits = self.hits
+        for index in np.unique(bricks):
+            brick_data = self.brick_data[index]
+            remaining = hits.get(brick_data, 1) - 1 if hits else 0
+            if remaining:
+                hits[brick_data] = remaining
+                self.damaged.append(brick_data)
+                continue
+            if hits:
+                hits.pop(brick_data, None)
+            self.brick_alive[index] = False
+            self.alive[:, index] = False
+            grid.remove(brick_data)
+            self.broken.append(brick_data)
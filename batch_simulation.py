@@ -0,0 +1,272 @@
+import argparse
+import time
+
+import numpy as np
+
+from simulation import (SCREEN_WIDTH, SCREEN_HEIGHT, PADDLE_WIDTH, PADDLE_HEIGHT, BALL_RADIUS,
+                        BRICK_WIDTH, BRICK_HEIGHT, BRICK_GAP, BRICK_OFFSET_X, BRICK_OFFSET_Y,
+                        BRICK_COLUMNS, BASE_BRICK_ROWS, MAX_BRICK_ROWS, PADDLE_SPEED,
+                        STARTING_LIVES, BALL_SPEED_BASE, BALL_SPEED_PER_LEVEL)
+
+BALL_SIZE = BALL_RADIUS * 2
+PADDLE_Y = SCREEN_HEIGHT - 50
+BRICK_PITCH_X = BRICK_WIDTH + BRICK_GAP
+BRICK_PITCH_Y = BRICK_HEIGHT + BRICK_GAP
+
+
+class BatchSimulation:
+    # N partidas independientes guardadas como arrays (estructura de arrays).
+    # Cada paso avanza todas a la vez con operaciones vectorizadas; la paleta
+    # sigue la bola y las respuestas se resuelven con un modelo de precisión
+    # y tiempo de respuesta, en lugar de un jugador real.
+    def __init__(self, games, level=1, seed=None,
+                 speed_base=BALL_SPEED_BASE, speed_per_level=BALL_SPEED_PER_LEVEL,
+                 base_rows=BASE_BRICK_ROWS, max_rows=MAX_BRICK_ROWS, columns=BRICK_COLUMNS,
+                 accuracy=0.9, answer_time=3.0,
+                 score_base=100, time_bonus_window=5, time_bonus_rate=20, level_bonus=10):
+        self.games = games
+        self.rng = np.random.default_rng(seed)
+
+        self.speed_base = speed_base
+        self.speed_per_level = speed_per_level
+        self.base_rows = base_rows
+        self.max_rows = max_rows
+        self.columns = columns
+        self.accuracy = accuracy
+        self.answer_time = answer_time
+        self.score_base = score_base
+        self.time_bonus_window = time_bonus_window
+        self.time_bonus_rate = time_bonus_rate
+        self.level_bonus = level_bonus
+
+        # Estado por partida
+        self.level = np.full(games, level, dtype=np.int32)
+        self.score = np.zeros(games, dtype=np.int64)
+        self.lives = np.full(games, STARTING_LIVES, dtype=np.int32)
+        self.base_speed = np.zeros(games)
+        self.ball_x = np.zeros(games)
+        self.ball_y = np.zeros(games)
+        self.ball_vx = np.zeros(games)
+        self.ball_vy = np.zeros(games)
+        self.paddle_x = np.zeros(games)
+        self.alive = np.zeros((games, max_rows * columns), dtype=bool)
+        self.remaining = np.zeros(games, dtype=np.int32)
+
+        # Estadísticas acumuladas
+        self.frames = np.zeros(games, dtype=np.int64)
+        self.bricks_broken = np.zeros(games, dtype=np.int64)
+        self.wrong_answers = np.zeros(games, dtype=np.int64)
+        self.balls_lost = np.zeros(games, dtype=np.int64)
+
+        # Rectángulo de cada celda de la retícula
+        cells = np.arange(max_rows * columns)
+        self.cell_left = (cells % columns) * BRICK_PITCH_X + BRICK_OFFSET_X
+        self.cell_top = (cells // columns) * BRICK_PITCH_Y + BRICK_OFFSET_Y
+        self.game_index = np.arange(games)
+
+        self.reset_games(np.ones(games, dtype=bool))
+
+    def rows_for_level(self, level):
+        return np.minimum(self.base_rows + level, self.max_rows)
+
+    def reset_games(self, mask):
+        # Equivale a GameSimulation.reset() para las partidas seleccionadas
+        level = self.level[mask]
+        self.lives[mask] = STARTING_LIVES
+        self.paddle_x[mask] = SCREEN_WIDTH // 2 - PADDLE_WIDTH // 2
+        self.ball_x[mask] = SCREEN_WIDTH // 2 - BALL_RADIUS
+        self.ball_y[mask] = SCREEN_HEIGHT // 2 - BALL_RADIUS
+        base_speed = self.speed_base + level * self.speed_per_level
+        self.base_speed[mask] = base_speed
+        self.ball_vx[mask] = base_speed
+        self.ball_vy[mask] = -base_speed
+
+        rows = self.rows_for_level(level)
+        self.alive[mask] = (np.arange(self.max_rows * self.columns)[None, :] <
+                            (rows * self.columns)[:, None])
+        self.remaining[mask] = rows * self.columns
+
+    def step(self, dt=1.0):
+        # dt en fotogramas de 60 FPS, igual que las velocidades
+        active = self.lives > 0
+        self.frames += active
+
+        # Paleta: seguir la bola
+        ball_center = self.ball_x + BALL_RADIUS
+        paddle_center = self.paddle_x + PADDLE_WIDTH / 2
+        move_left = active & (ball_center < paddle_center - PADDLE_SPEED) & (self.paddle_x > 0)
+        move_right = (active & (ball_center > paddle_center + PADDLE_SPEED) &
+                      (self.paddle_x + PADDLE_WIDTH < SCREEN_WIDTH))
+        self.paddle_x += (move_right.astype(np.float64) - move_left) * (PADDLE_SPEED * dt)
+
+        # Movimiento de la pelota
+        self.ball_x += np.where(active, self.ball_vx * dt, 0.0)
+        self.ball_y += np.where(active, self.ball_vy * dt, 0.0)
+
+        # Colisión con las paredes
+        hit_left = self.ball_x <= 0
+        hit_right = ~hit_left & (self.ball_x + BALL_SIZE >= SCREEN_WIDTH)
+        self.ball_x[hit_left] = 0
+        self.ball_x[hit_right] = SCREEN_WIDTH - BALL_SIZE
+        self.ball_vx[hit_left | hit_right] *= -1
+        hit_top = self.ball_y <= 0
+        self.ball_y[hit_top] = 0
+        self.ball_vy[hit_top] *= -1
+
+        # Colisión con la paleta
+        on_paddle = (active &
+                     (self.ball_x < self.paddle_x + PADDLE_WIDTH) & (self.paddle_x < self.ball_x + BALL_SIZE) &
+                     (self.ball_y < PADDLE_Y + PADDLE_HEIGHT) & (PADDLE_Y < self.ball_y + BALL_SIZE))
+        if on_paddle.any():
+            relative = (self.paddle_x[on_paddle] + PADDLE_WIDTH / 2) - self.ball_x[on_paddle]
+            bounce_angle = relative / (PADDLE_WIDTH / 2) * (np.pi / 3)
+            speed = self.base_speed[on_paddle]
+            self.ball_vx[on_paddle] = speed * -np.sin(bounce_angle)
+            self.ball_vy[on_paddle] = speed * -np.cos(bounce_angle)
+            self.ball_y[on_paddle] = PADDLE_Y - 1 - BALL_SIZE
+
+        self._collide_bricks(active)
+
+        # La bola cae por debajo de la pantalla
+        fell = active & (self.ball_y + BALL_SIZE >= SCREEN_HEIGHT)
+        if fell.any():
+            self.lives[fell] -= 1
+            self.balls_lost[fell] += 1
+            respawn = fell & (self.lives > 0)
+            count = int(respawn.sum())
+            self.ball_x[respawn] = SCREEN_WIDTH // 2 - BALL_RADIUS
+            self.ball_y[respawn] = SCREEN_HEIGHT // 2 - BALL_RADIUS
+            direction = np.where(self.rng.random(count) > 0.5, 1.0, -1.0)
+            self.ball_vx[respawn] = self.base_speed[respawn] * direction
+            self.ball_vy[respawn] = -self.base_speed[respawn]
+
+        # Nivel completado: pasar al siguiente manteniendo la puntuación
+        cleared = active & (self.remaining == 0)
+        if cleared.any():
+            self.level[cleared] += 1
+            self.reset_games(cleared)
+
+    def _collide_bricks(self, active):
+        # La bola (20 px) solo puede solapar dos columnas y dos filas de la
+        # retícula, así que bastan cuatro celdas candidatas por partida
+        col0 = np.floor((self.ball_x - BRICK_OFFSET_X) / BRICK_PITCH_X).astype(np.int64)
+        row0 = np.floor((self.ball_y - BRICK_OFFSET_Y) / BRICK_PITCH_Y).astype(np.int64)
+        # Orden fila a fila, igual que el recorrido de la lista de ladrillos
+        cols = np.stack((col0, col0 + 1, col0, col0 + 1), axis=1)
+        rows = np.stack((row0, row0, row0 + 1, row0 + 1), axis=1)
+
+        in_grid = (cols >= 0) & (cols < self.columns) & (rows >= 0) & (rows < self.max_rows)
+        cell = np.where(in_grid, rows * self.columns + cols, 0)
+        left = self.cell_left[cell]
+        top = self.cell_top[cell]
+        bx = self.ball_x[:, None]
+        by = self.ball_y[:, None]
+        candidate = (in_grid & active[:, None] &
+                     self.alive[self.game_index[:, None], cell] &
+                     (bx < left + BRICK_WIDTH) & (left < bx + BALL_SIZE) &
+                     (by < top + BRICK_HEIGHT) & (top < by + BALL_SIZE))
+
+        hit = candidate.any(axis=1)
+        if not hit.any():
+            return
+
+        games = self.game_index[hit]
+        first = candidate[hit].argmax(axis=1)
+        cell = cell[hit, first]
+        left = left[hit, first]
+        top = top[hit, first]
+        bx = self.ball_x[hit]
+        by = self.ball_y[hit]
+
+        # Lado de colisión: la distancia mínima, con el mismo orden de desempate
+        dists = np.stack((np.abs(bx + BALL_SIZE - left),
+                          np.abs(bx - (left + BRICK_WIDTH)),
+                          np.abs(by + BALL_SIZE - top),
+                          np.abs(by - (top + BRICK_HEIGHT))), axis=1)
+        side = dists.argmin(axis=1)
+        vx = self.ball_vx[hit]
+        bx = np.where(side == 0, left - 1 - BALL_SIZE, bx)
+        bx = np.where(side == 1, left + BRICK_WIDTH + 1, bx)
+        by = np.where(side == 2, top - 1 - BALL_SIZE, by)
+        by = np.where(side == 3, top + BRICK_HEIGHT + 1, by)
+        vx = np.where(side == 0, -np.abs(vx), np.where(side == 1, np.abs(vx), vx))
+
+        # Desafío matemático resuelto con el modelo de respuesta
+        n = games.size
+        correct = self.rng.random(n) < self.accuracy
+        answer_time = self.answer_time * (0.5 + self.rng.random(n))
+
+        correct_games = games[correct]
+        self.alive[correct_games, cell[correct]] = False
+        self.remaining[correct_games] -= 1
+        self.bricks_broken[correct_games] += 1
+        time_bonus = np.maximum(0, self.time_bonus_window - answer_time[correct]) * self.time_bonus_rate
+        points = self.score_base + time_bonus + self.level[correct_games] * self.level_bonus
+        self.score[correct_games] += points.astype(np.int64)
+
+        wrong = ~correct
+        wrong_games = games[wrong]
+        self.lives[wrong_games] -= 1
+        self.wrong_answers[wrong_games] += 1
+        respawn = wrong & (self.lives[games] > 0)
+        bx = np.where(respawn, SCREEN_WIDTH // 2 - BALL_RADIUS, bx)
+        by = np.where(respawn, SCREEN_HEIGHT // 2 - BALL_RADIUS, by)
+
+        # Mantener la velocidad progresiva
+        speed = self.base_speed[games]
+        self.ball_vx[games] = np.where(vx > 0, speed, -speed)
+        self.ball_vy[games] = -speed
+        self.ball_x[games] = bx
+        self.ball_y[games] = by
+
+    def run(self, max_frames):
+        for _ in range(max_frames):
+            self.step()
+            if not self.lives.any():
+                break
+        return self.summary()
+
+    def summary(self):
+        return {
+            "games": self.games,
+            "frames": int(self.frames.sum()),
+            "mean_level": float(self.level.mean()),
+            "max_level": int(self.level.max()),
+            "mean_score": float(self.score.mean()),
+            "finished": int((self.lives <= 0).sum()),
+            "bricks_broken": int(self.bricks_broken.sum()),
+            "wrong_answers": int(self.wrong_answers.sum()),
+            "balls_lost": int(self.balls_lost.sum()),
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación por lotes de Math Breakout Adventure")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--frames', type=int, default=3600)
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--speed-base', type=float, default=BALL_SPEED_BASE)
+    parser.add_argument('--speed-per-level', type=float, default=BALL_SPEED_PER_LEVEL)
+    parser.add_argument('--base-rows', type=int, default=BASE_BRICK_ROWS)
+    parser.add_argument('--max-rows', type=int, default=MAX_BRICK_ROWS)
+    parser.add_argument('--accuracy', type=float, default=0.9)
+    parser.add_argument('--answer-time', type=float, default=3.0)
+    args = parser.parse_args()
+
+    batch = BatchSimulation(args.games, level=args.level, seed=args.seed,
+                            speed_base=args.speed_base, speed_per_level=args.speed_per_level,
+                            base_rows=args.base_rows, max_rows=args.max_rows,
+                            accuracy=args.accuracy, answer_time=args.answer_time)
+
+    start = time.perf_counter()
+    result = batch.run(args.frames)
+    elapsed = time.perf_counter() - start
+
+    for key, value in result.items():
+        print(f"{key}: {value}")
+    print(f"{result['frames'] / elapsed:,.0f} fotogramas/s ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Sin ventana ni audio reales: los tiempos miden el trabajo del juego
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+from breakout_matematico import MathBreakout, PLAYING
+from display_backend import RENDERERS
+from leaderboard import Leaderboard
+from simulation import (SCREEN_WIDTH, BRICK_COLORS, EVENT_CORRECT_ANSWER, EVENT_LIFE_LOST,
+                        BrickGrid, Rect, tracking_inputs)
+
+PHASES = ('fisica', 'colision', 'render')
+PERCENTILES = (50, 95, 99)
+FRAMES = 1200
+# Respuestas del jugador simulado: acierta casi siempre y tarda 2 segundos
+ACCURACY = 0.9
+ANSWER_TIME = 2.0
+# Bolas extra del escenario multibola (se relanzan al repetir el nivel)
+MULTIBALL_BENCH_BALLS = 48
+# Comprobación de memoria: fotogramas de calentamiento y máximo de bytes
+# reservados a la vez dentro de un fotograma estable (lo medido ronda los
+# 200-450 bytes; ver README)
+ALLOC_WARMUP = 120
+ALLOC_THRESHOLD = 512
+
+
+def percentile(sorted_values, q):
+    # Percentil por rango más cercano
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples):
+    result = {}
+    for phase, values in samples.items():
+        values = sorted(values)
+        result[phase] = {f"p{q}": round(percentile(values, q) * 1000, 4) for q in PERCENTILES}
+    return result
+
+
+def custom_board(rows, columns, brick_height=8, gap=2, offset_x=50, offset_y=50):
+    # Tablero más denso que los del juego, con ladrillos más pequeños
+    brick_width = (SCREEN_WIDTH - 2 * offset_x) // columns - gap
+    grid = BrickGrid(brick_width + gap, brick_height + gap, offset_x, offset_y)
+    for row in range(rows):
+        for col in range(columns):
+            brick = Rect(col * (brick_width + gap) + offset_x, row * (brick_height + gap) + offset_y,
+                         brick_width, brick_height)
+            grid.add((brick, BRICK_COLORS[row % len(BRICK_COLORS)]))
+    return grid
+
+
+def bench_playing(game, level, frames, board=None, balls=0):
+    game.reset_game(level)
+    rng = game.sim.rng
+
+    def prepare_board():
+        if board is not None:
+            game.sim.bricks = custom_board(*board)
+            game.build_brick_layer()
+        if balls:
+            game.sim.spawn_balls(balls)
+
+    prepare_board()
+    samples = {phase: [] for phase in PHASES}
+    # Colisiones con paredes, paleta y ladrillos medidas dentro del paso
+    timings = game.sim.timings = [0.0, 0.0, 0.0]
+
+    for _ in range(frames):
+        timings[0] = timings[1] = timings[2] = 0.0
+        # Reponer las bolas extra perdidas para mantener la carga constante
+        if balls and game.sim.balls.count < balls:
+            game.sim.spawn_balls(balls - game.sim.balls.count)
+        start = time.perf_counter()
+        events = game.step_playing(tracking_inputs(game.sim))
+        physics = time.perf_counter() - start
+
+        start = time.perf_counter()
+        dirty = game.draw_playing()
+
+        # El desafío se responde al momento, como lo haría el bucle tras el diálogo
+        if game.sim.challenge is not None:
+            correct_answer, brick_data = game.sim.challenge[1:]
+            answer = correct_answer if rng.random() < ACCURACY else correct_answer + 1
+            if EVENT_CORRECT_ANSWER in game.sim.answer(answer, ANSWER_TIME):
+                game.erase_brick(brick_data[0])
+                game.show_points_popup(game.sim.last_points, brick_data[0].centerx, brick_data[0].centery)
+            else:
+                game.show_wrong_answer_popup(correct_answer)
+        if EVENT_LIFE_LOST in events:
+            game.show_life_lost_popup()
+        # Los mensajes y la cuenta atrás se dibujan, pero sin detener la física:
+        # si no, casi todos los fotogramas medirían la partida en pausa
+        for item in game.overlays.items:
+            item.hold = False
+
+        game.present_playing(dirty)
+        render = time.perf_counter() - start
+
+        collision = sum(timings)
+        samples['fisica'].append(physics - collision)
+        samples['colision'].append(collision)
+        samples['render'].append(render)
+
+        # Mantener el escenario: se repite el nivel al terminarlo o perder
+        if game.sim.game_over or game.sim.level_complete:
+            game.reset_game(level)
+            prepare_board()
+        game.game_state = PLAYING
+
+    return samples
+
+
+def bench_menu(game, frames):
+    menu_positions = game.menu_layout()
+    samples = {'render': []}
+    for i in range(frames):
+        start = time.perf_counter()
+        # Mover la selección de vez en cuando, como un menú en reposo con ratón
+        selected = menu_positions[(i // 60) % len(menu_positions)][0]
+        game.draw_main_menu(menu_positions, selected)
+        game.display.flip()
+        samples['render'].append(time.perf_counter() - start)
+    return samples
+
+
+def bench_high_scores(game, frames, scores=35):
+    # Base de puntuaciones propia en un directorio temporal
+    workdir = tempfile.mkdtemp()
+    game.leaderboard = Leaderboard(os.path.join(workdir, 'high_scores.db'), None)
+    for i in range(scores):
+        game.leaderboard.add(f"Jugador {i % 7}", 100 + i * 37, 1 + i % 7)
+    pages = game.high_score_pages()
+    samples = {'render': []}
+    for i in range(frames):
+        start = time.perf_counter()
+        # Pasar de página cada segundo; la primera visita compone la página
+        game.draw_high_scores((i // 60) % pages, pages)
+        game.display.flip()
+        samples['render'].append(time.perf_counter() - start)
+
+    game.leaderboard.close()
+    shutil.rmtree(workdir)
+    return samples
+
+
+def scenarios(frames):
+    # Niveles 1 a 7 (de 6 a 12 filas), tableros grandes, multibola, menú y puntuaciones
+    for level in range(1, 8):
+        yield f"nivel_{level}", lambda game, level=level: bench_playing(game, level, frames)
+    for rows, columns in ((20, 16), (24, 20)):
+        yield (f"tablero_{rows}x{columns}",
+               lambda game, board=(rows, columns): bench_playing(game, 1, frames, board))
+    yield "multibola", lambda game: bench_playing(game, 7, frames, balls=MULTIBALL_BENCH_BALLS)
+    yield "menu", lambda game: bench_menu(game, frames)
+    yield "puntuaciones", lambda game: bench_high_scores(game, frames)
+
+
+def check_allocations(game, level, frames, balls=0):
+    # Pico de memoria reservada por cada fotograma estable de la partida
+    # (física, dibujo y envío a pantalla). Los fotogramas con eventos
+    # (impacto, vida perdida, ladrillo roto) crean mensajes y se descartan,
+    # igual que los que vuelven a escribir el marcador tras una respuesta.
+    game.reset_game(level)
+    game.game_state = PLAYING
+    if balls:
+        game.sim.spawn_balls(balls)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for frame in range(ALLOC_WARMUP + frames):
+            inputs = tracking_inputs(game.sim)
+            tracemalloc.reset_peak()
+            start = tracemalloc.get_traced_memory()[0]
+            hud_values = game.hud_values
+            events = game.step_playing(inputs)
+            dirty = game.draw_playing()
+            game.present_playing(dirty)
+            peak = tracemalloc.get_traced_memory()[1] - start
+            if (frame >= ALLOC_WARMUP and not events and game.sim.challenge is None
+                    and game.hud_values == hud_values):
+                peaks.append(peak)
+
+            # Sin pausas ni desafíos: se quiere medir el juego en movimiento.
+            # Los escenarios sin bolas extra no encadenan aciertos (multibola)
+            if game.sim.challenge is not None:
+                if not balls:
+                    game.sim.streak = 0
+                game.sim.answer(game.sim.challenge[1], ANSWER_TIME)
+            game.sim.lives = max(game.sim.lives, 2)
+            game.overlays.clear()
+            if balls and game.sim.balls.count < balls:
+                game.sim.spawn_balls(balls - game.sim.balls.count)
+            if game.sim.level_complete:
+                game.reset_game(level)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def run_allocation_checks(frames, seed, threshold):
+    # Devuelve True si ningún fotograma estable supera el umbral
+    checks = (("nivel_3", 3, False, 0), ("nivel_3_sucio", 3, True, 0),
+              ("multibola", 7, False, MULTIBALL_BENCH_BALLS))
+    passed = True
+    print(f"{'escenario':<16} {'fotogramas':>10} {'máx. bytes':>11} {'media':>9}")
+    for name, level, dirty_rects, balls in checks:
+        peaks = check_allocations(MathBreakout(dirty_rects=dirty_rects, seed=seed), level, frames, balls)
+        worst = max(peaks, default=0)
+        average = sum(peaks) / len(peaks) if peaks else 0
+        print(f"{name:<16} {len(peaks):>10} {worst:>11} {average:>9.0f}")
+        if worst > threshold:
+            passed = False
+    if passed:
+        print(f"Ningún fotograma estable reserva más de {threshold} bytes")
+    else:
+        print(f"Hay fotogramas estables que reservan más de {threshold} bytes")
+    return passed
+
+
+def run_benchmarks(frames, seed, selected=None, renderer='surface', render_scale=1.0):
+    results = {}
+    for name, run in scenarios(frames):
+        if selected and name not in selected:
+            continue
+        game = MathBreakout(seed=seed, renderer=renderer, render_scale=render_scale)
+        results[name] = summarize(run(game))
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta_ms, metrics):
+    # Devuelve las regresiones: métricas más lentas que la referencia por
+    # encima de la tolerancia relativa y de un mínimo absoluto (ruido)
+    regressions = []
+    for name, phases in results.items():
+        for phase, values in phases.items():
+            reference = baseline.get(name, {}).get(phase)
+            if reference is None:
+                continue
+            for metric in metrics:
+                current, previous = values[metric], reference.get(metric)
+                if previous is None:
+                    continue
+                if current - previous > min_delta_ms and current > previous * (1 + tolerance):
+                    regressions.append((name, phase, metric, previous, current))
+    return regressions
+
+
+def print_results(results):
+    print(f"{'escenario':<16} {'fase':<9} " + " ".join(f"{'p' + str(q):>9}" for q in PERCENTILES) + "  (ms)")
+    for name, phases in results.items():
+        for phase, values in phases.items():
+            print(f"{name:<16} {phase:<9} " + " ".join(f"{values['p' + str(q)]:9.3f}" for q in PERCENTILES))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tiempos por fotograma del juego con los controladores dummy de SDL")
+    parser.add_argument('--frames', type=int, default=FRAMES, help="Fotogramas por escenario")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--scenario', action='append', help="Ejecutar solo este escenario (se puede repetir)")
+    parser.add_argument('--output', default='bench_results.json', help="Guardar los resultados en JSON")
+    parser.add_argument('--baseline', help="JSON de referencia con el que comparar")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Empeoramiento relativo permitido frente a la referencia (0.25 = 25%%)")
+    parser.add_argument('--min-delta-ms', type=float, default=0.05,
+                        help="Diferencias menores que esta se consideran ruido")
+    parser.add_argument('--metrics', default='p50,p95', help="Percentiles que se comparan con la referencia")
+    parser.add_argument('--alloc-check', action='store_true',
+                        help="En lugar de medir tiempos, comprobar con tracemalloc la memoria reservada por fotograma")
+    parser.add_argument('--alloc-threshold', type=int, default=ALLOC_THRESHOLD,
+                        help="Bytes que puede reservar a la vez un fotograma estable")
+    parser.add_argument('--renderer', choices=RENDERERS, default='surface',
+                        help="Ruta de dibujo que se mide; para comparar, usa los resultados de la otra como referencia")
+    parser.add_argument('--render-scale', type=float, default=1.0, help="Resolución interna con --renderer texture")
+    args = parser.parse_args()
+
+    if args.alloc_check:
+        return 0 if run_allocation_checks(args.frames, args.seed, args.alloc_threshold) else 1
+
+    results = run_benchmarks(args.frames, args.seed, args.scenario, args.renderer, args.render_scale)
+    print_results(results)
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+
+    if not args.baseline:
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No existe la referencia {args.baseline}; guarda una con 'make bench-baseline'")
+        return 0
+
+    with open(args.baseline, 'r') as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance, args.min_delta_ms, args.metrics.split(','))
+    if not regressions:
+        print(f"Sin regresiones frente a {args.baseline} (tolerancia {args.tolerance:.0%})")
+        return 0
+
+    print(f"Regresiones frente a {args.baseline}:")
+    for name, phase, metric, previous, current in regressions:
+        print(f"  {name} {phase} {metric}: {previous:.3f} ms -> {current:.3f} ms")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
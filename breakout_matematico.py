@@ -1,30 +1,25 @@
+import time
+# Marca para medir cuánto tarda la importación de módulos (--startup-profile)
+IMPORT_START = time.perf_counter()
+
 import pygame
 import random
 import os
-import numpy as np
-import json
-import time
-from datetime import datetime
-
-# Screen dimensions
-SCREEN_WIDTH = 1024
-SCREEN_HEIGHT = 768
-PADDLE_WIDTH = 100
-PADDLE_HEIGHT = 20
-BALL_RADIUS = 10
-BRICK_WIDTH = 80
-BRICK_HEIGHT = 30
-
-# Colors
-WHITE = (255, 255, 255)
-BLACK = (0, 0, 0)
-RED = (255, 0, 0)
-BLUE = (0, 0, 255)
-GREEN = (0, 255, 0)
-YELLOW = (255, 255, 0)
-PURPLE = (128, 0, 128)
-ORANGE = (255, 165, 0)
-CYAN = (0, 255, 255)
+import argparse
+import atexit
+from collections import OrderedDict
+
+from sound_bank import SoundBank
+from replay import SessionRecorder
+from display_backend import RENDERERS, SurfaceDisplay, TextureDisplay
+from event_bus import EventBus
+from frame_profiler import (FrameProfiler, PHASE_NAMES, PHASE_EVENTS, PHASE_INPUT, PHASE_MOVEMENT,
+                            PHASE_DRAW, PHASE_FLIP)
+from leaderboard import Leaderboard
+from simulation import (SCREEN_WIDTH, SCREEN_HEIGHT, FRAME_DT, BALL_RADIUS, INPUT_LEFT, INPUT_RIGHT,
+                        EVENT_BRICK_DAMAGED, EVENT_CORRECT_ANSWER, EVENT_LIFE_LOST, EVENT_MULTIBALL,
+                        GameSimulation, session_rng,
+                        WHITE, BLACK, RED, BLUE, GREEN, YELLOW, CYAN)
 
 # Game states
 MENU = 0
@@ -32,151 +27,456 @@ PLAYING = 1
 PAUSED = 2
 GAME_OVER = 3
 LEVEL_COMPLETE = 4
+CHALLENGE = 5
+
+# Cuadro de diálogo del desafío matemático
+DIALOG_WIDTH = 500
+DIALOG_HEIGHT = 300
+DIALOG_X = (SCREEN_WIDTH - DIALOG_WIDTH) // 2
+DIALOG_Y = (SCREEN_HEIGHT - DIALOG_HEIGHT) // 2
+
+MENU_ITEMS = ["Jugar", "Puntuaciones Altas", "Instrucciones", "Salir"]
+
+# Tiempo máximo que se simula por fotograma: tras un parón largo el juego
+# se ralentiza en lugar de encadenar cientos de pasos de física
+MAX_FRAME_TIME = 0.25
+
+# Filas por página en la pantalla de puntuaciones
+HIGH_SCORES_PER_PAGE = 10
+
+# Con --autoplay, segundos que se muestran las pantallas que esperan una tecla
+AUTOPLAY_SCREEN_TIME = 2.0
+
+
+class TextCache:
+    # Caché LRU acotada de superficies de texto ya renderizadas. Rasterizar
+    # glifos es de lo más caro de cada fotograma y casi todo el texto se repite.
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, antialias, color):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+
+class FloatingText:
+    # Texto que sube y se desvanece (p. ej. los puntos ganados). Cambia el
+    # alfa de la superficie: no debe recibir una superficie de TextCache
+    def __init__(self, surface, x, y, duration=0.8, rise=40):
+        self.surface = surface
+        self.x = x - surface.get_width() // 2
+        self.y = y
+        self.duration = duration
+        self.rise = rise
+        self.elapsed = 0.0
+        self.hold = False
+
+    def update(self, dt):
+        self.elapsed += dt
+        return self.elapsed < self.duration
+
+    def draw(self, screen):
+        progress = self.elapsed / self.duration
+        self.surface.set_alpha(int(255 * (1 - progress)))
+        screen.blit(self.surface, (self.x, self.y - self.rise * progress))
+
+
+class ScreenFlash:
+    # Velo de color sobre toda la pantalla que se desvanece
+    def __init__(self, surface, alpha, duration):
+        self.surface = surface
+        self.alpha = alpha
+        self.duration = duration
+        self.elapsed = 0.0
+        self.hold = False
+
+    def update(self, dt):
+        self.elapsed += dt
+        return self.elapsed < self.duration
+
+    def draw(self, screen):
+        self.surface.set_alpha(int(self.alpha * (1 - self.elapsed / self.duration)))
+        screen.blit(self.surface, (0, 0))
+
+
+class MessageOverlay:
+    # Líneas de texto centradas durante un tiempo; con hold=True la partida
+    # espera a que termine (sin dejar de dibujar ni de atender eventos)
+    def __init__(self, surfaces, duration, hold=False, spacing=50):
+        self.surfaces = surfaces
+        self.duration = duration
+        self.hold = hold
+        self.elapsed = 0.0
+        top = SCREEN_HEIGHT // 2 - spacing * (len(surfaces) - 1) // 2
+        self.positions = [(SCREEN_WIDTH // 2 - surface.get_width() // 2, top + i * spacing)
+                          for i, surface in enumerate(surfaces)]
+
+    def update(self, dt):
+        self.elapsed += dt
+        return self.elapsed < self.duration
+
+    def draw(self, screen):
+        for surface, position in zip(self.surfaces, self.positions):
+            screen.blit(surface, position)
+
+
+class Countdown:
+    # Cuenta atrás antes de que la bola vuelva a moverse
+    def __init__(self, digits, y, duration, hold=True):
+        self.digits = digits
+        self.y = y
+        self.duration = duration
+        self.hold = hold
+        self.elapsed = 0.0
+
+    def update(self, dt):
+        self.elapsed += dt
+        return self.elapsed < self.duration
+
+    def draw(self, screen):
+        remaining = max(1, int(self.duration - self.elapsed + 0.999))
+        digit = self.digits[min(remaining, len(self.digits) - 1)]
+        screen.blit(digit, (SCREEN_WIDTH // 2 - digit.get_width() // 2, self.y))
+
+
+class OverlayQueue:
+    # Superposiciones y animaciones temporizadas. Se actualizan desde el bucle
+    # principal con el tiempo del fotograma y se dibujan en la pasada normal,
+    # así que nunca bloquean el juego y pueden apilarse.
+    def __init__(self):
+        self.items = []
+        self.drawn = False
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def add(self, item):
+        self.items.append(item)
+        return item
+
+    def clear(self):
+        self.items.clear()
+
+    @property
+    def holding(self):
+        # Bucle en lugar de any(generador): se consulta en cada fotograma y
+        # el generador reservaría memoria cada vez
+        for item in self.items:
+            if item.hold:
+                return True
+        return False
+
+    @property
+    def needs_full_redraw(self):
+        # También el fotograma siguiente a la última superposición, para borrarla
+        return bool(self.items) or self.drawn
+
+    def update(self, dt):
+        # Se eliminan en el sitio para no crear una lista nueva cada fotograma
+        items = self.items
+        i = len(items) - 1
+        while i >= 0:
+            if not items[i].update(dt):
+                del items[i]
+            i -= 1
+
+    def draw(self, screen):
+        for item in self.items:
+            item.draw(screen)
+        self.drawn = bool(self.items)
+
+
+class ProfilerOverlay:
+    # Panel de F3: gráfica de los últimos intervalos entre fotogramas y media
+    # de cada fase. El texto se renderiza cada pocos fotogramas para no
+    # llenar la caché con números que cambian siempre.
+    WIDTH = 380
+    HEIGHT = 220
+    GRAPH_HEIGHT = 60
+    # Escala de la gráfica: dos presupuestos de 60 FPS
+    GRAPH_MAX_MS = 33.3
+    TEXT_EVERY = 15
+
+    def __init__(self, font):
+        self.font = font
+        self.panel = pygame.Surface((self.WIDTH, self.HEIGHT), pygame.SRCALPHA)
+        self.lines = []
+        self.frames_until_text = 0
+        self.points = []
+
+    @property
+    def position(self):
+        return (SCREEN_WIDTH - self.WIDTH - 10, 10)
+
+    def draw(self, screen, profiler):
+        screen.blit(self.render(profiler), self.position)
+
+    def render(self, profiler):
+        # Todo se dibuja en el panel, que luego se pega de una vez (también
+        # como textura con --renderer texture)
+        panel = self.panel
+        panel.fill((0, 0, 0, 190))
+        x = y = 0
+
+        # Gráfica de tiempo por fotograma con la línea de 16,6 ms
+        graph_bottom = y + 10 + self.GRAPH_HEIGHT
+        scale = self.GRAPH_HEIGHT / self.GRAPH_MAX_MS
+        budget_y = graph_bottom - int(16.6 * scale)
+        pygame.draw.line(panel, GREEN, (x + 10, budget_y), (x + self.WIDTH - 10, budget_y))
+        intervals = profiler.intervals
+        if len(intervals) > 1:
+            step = (self.WIDTH - 20) / (intervals.maxlen - 1)
+            points = self.points
+            points.clear()
+            for i, interval in enumerate(intervals):
+                height = min(interval * 1000, self.GRAPH_MAX_MS) * scale
+                points.append((x + 10 + i * step, graph_bottom - height))
+            pygame.draw.lines(panel, YELLOW, False, points)
+
+        if self.frames_until_text <= 0:
+            self.frames_until_text = self.TEXT_EVERY
+            texts = [f"FPS: {profiler.fps:.1f}"]
+            texts += [f"{name}: {average * 1000:.3f} ms" for name, average in zip(PHASE_NAMES, profiler.averages)]
+            texts.append(f"bloqueos: {profiler.blocked_average * 1000:.1f} ms")
+            self.lines = [self.font.render(text, True, WHITE) for text in texts]
+        self.frames_until_text -= 1
+
+        # Dos columnas de texto bajo la gráfica
+        rows = (len(self.lines) + 1) // 2
+        for i, line in enumerate(self.lines):
+            column, row = divmod(i, rows)
+            panel.blit(line, (x + 10 + column * (self.WIDTH // 2), graph_bottom + 10 + row * 22))
+        return panel
+
+
+class StartupProfile:
+    # Desglose por fases del tiempo hasta el primer fotograma del menú. Sin
+    # --startup-profile, mark no hace nada.
+    def __init__(self, enabled=False, start=None):
+        self.enabled = enabled
+        self.start = start if start is not None else time.perf_counter()
+        self.last = self.start
+        self.phases = []
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    def report(self):
+        if not self.enabled or not self.phases:
+            return
+        total = self.last - self.start
+        print("Arranque hasta el primer fotograma:")
+        for name, elapsed in self.phases:
+            print(f"  {name:<28} {elapsed * 1000:8.1f} ms  {elapsed / total * 100:5.1f}%")
+        print(f"  {'total':<28} {total * 1000:8.1f} ms")
+        self.phases = []
+
 
 class MathBreakout:
-    def __init__(self):
-        self.bricks = None
+    def __init__(self, dirty_rects=False, player="Jugador", profile=None, seed=None, record_path=None,
+                 profile_csv=None, max_fps=60, vsync=False, level_pack_path=None, renderer='surface',
+                 render_scale=1.0, event_log_dir=None, autoplay=None):
+        self.profile = profile if profile is not None else StartupProfile()
+        self.profile.mark("importación de módulos")
+        self.sim = None
+        self.player = player
+        # Paquete de niveles (--level-pack); se abre junto con la simulación
+        self.level_pack_path = level_pack_path
+
+        # Todo lo aleatorio de la sesión sale de esta semilla
+        self.seed = seed if seed is not None else random.randrange(2 ** 63)
+        self.recorder = None
+        if record_path is not None:
+            self.recorder = SessionRecorder(record_path, self.seed)
+            atexit.register(self.recorder.close)
+
+        # Jugador simulado en lugar del teclado (--autoplay; autoplay son las
+        # opciones de autoplayer.BotController) y su respuesta al desafío en
+        # curso: (valor, segundos que tarda)
+        self.bot = None
+        self.bot_answer = None
+        if autoplay is not None:
+            from autoplayer import BotController
+            self.bot = BotController(session_rng(self.seed, 'bot'), **autoplay)
+
+        # Eventos de la partida (golpes, respuestas, vidas, niveles); con
+        # --event-log se guardan en segundo plano para log_stats.py
+        self.event_bus = EventBus()
+        self.session_logger = None
+        if event_log_dir is not None:
+            from session_log import SessionLogger
+            self.session_logger = SessionLogger(event_log_dir, player, self.seed)
+            self.session_logger.attach(self.event_bus)
+            atexit.register(self.session_logger.close)
+
+        # Tiempos por fase de cada fotograma (F3 o --profile-csv)
+        self.profiler = FrameProfiler(profile_csv)
+        atexit.register(self.profiler.close)
+        self.profiler_overlay = None
+        self.brick_layer = None
+        self.brick_layer_pos = (0, 0)
+
+        # Modo de rectángulos sucios: solo se restauran y envían a pantalla
+        # las zonas que cambian (bola, paleta, ladrillos eliminados y marcador)
+        self.dirty_rects_mode = dirty_rects
+        self.full_redraw = True
+        # Dos listas y dos pares de rectángulos que se alternan cada fotograma:
+        # el bucle de juego no crea objetos nuevos para la bola y la paleta
+        self.dirty_rects = []
+        self.spare_dirty_rects = []
+        self.ball_rects = (pygame.Rect(0, 0, 0, 0), pygame.Rect(0, 0, 0, 0))
+        self.paddle_rects = (pygame.Rect(0, 0, 0, 0), pygame.Rect(0, 0, 0, 0))
+        self.rect_index = 0
+        self.prev_ball_rect = None
+        self.prev_paddle_rect = None
+        self.hud_values = None
+        self.hud_items = []
+        self.prev_hud_rects = []
         self.last_problem_time = None
         self.problem_start_time = None
-        self.ball_speed_y = None
-        self.ball_speed_x = None
-        self.base_ball_speed = None
-        self.ball = None
-        self.paddle = None
-        self.lives = None
-        self.score = None
-        self.level = None
-        self.menu_select_sound = None
-        self.menu_move_sound = None
-        self.level_complete_sound = None
-        self.game_over_sound = None
-        self.wrong_answer_sound = None
-        self.brick_hit_sound = None
-        pygame.init()
-        pygame.mixer.init()
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Math Breakout Adventure")
+        # Solo vídeo y fuentes; el mezclador se abre con el primer sonido
+        pygame.display.init()
+        pygame.font.init()
+        # Límite de fotogramas por segundo al dibujar (0 = sin límite); la
+        # física avanza siempre en pasos fijos de FRAME_DT
+        self.max_fps = max_fps
+        # Pantalla: blits sobre la ventana (surface) o texturas con el
+        # Renderer de SDL (texture), opcionalmente a menor resolución interna
+        self.display = None
+        if renderer == 'texture':
+            try:
+                self.display = TextureDisplay(render_scale, vsync)
+            except (ImportError, RuntimeError, pygame.error) as e:
+                print(f"Renderizado con texturas no disponible: {e}")
+        if self.display is None:
+            self.display = SurfaceDisplay(vsync)
+        self.screen = self.display.screen
         self.clock = pygame.time.Clock()
+        self.profile.mark("ventana")
 
-        # Cargar sonidos
-        self.load_sounds()
+        # Sonidos: se cargan (o se generan) la primera vez que suenan
+        self.sounds = SoundBank('sounds')
 
         # Cargar fuentes
+        self.text_cache = TextCache()
         self.title_font = pygame.font.Font(None, 50)
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
+        self.profile.mark("fuentes")
 
         # Cargar fondo
         self.background = self.create_background()
+        self.profile.mark("fondo")
 
         # Game state
         self.game_state = MENU
 
-        # Puntuaciones altas
-        self.high_scores = self.load_high_scores()
-
-        # Inicializar juego
-        self.reset_game(1)
-
-    def load_sounds(self):
-        try:
-            self.brick_hit_sound = pygame.mixer.Sound(os.path.join('sounds', 'brick_hit.wav'))
-            self.wrong_answer_sound = pygame.mixer.Sound(os.path.join('sounds', 'wrong_answer.wav'))
-            self.game_over_sound = pygame.mixer.Sound(os.path.join('sounds', 'game_over.wav'))
-            self.level_complete_sound = pygame.mixer.Sound(os.path.join('sounds', 'level_complete.wav'))
-            self.menu_move_sound = pygame.mixer.Sound(os.path.join('sounds', 'menu_move.wav'))
-            self.menu_select_sound = pygame.mixer.Sound(os.path.join('sounds', 'menu_select.wav'))
-        except Exception as e:
-            print(f"Error cargando sonidos: {e}")
-            # Fallback a generación básica de sonido
-            sample_rate = 44100
-            duration = 1  # 1 segundo
-            t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-
-            # Crear diferentes sonidos con frecuencias distintas
-            brick_wave = 0.5 * np.sin(2 * np.pi * 440 * t)
-            wrong_wave = 0.5 * np.sin(2 * np.pi * 220 * t)
-            game_over_wave = 0.5 * np.sin(2 * np.pi * 110 * t)
-            level_complete_wave = 0.5 * np.sin(2 * np.pi * 880 * t)
-            menu_move_wave = 0.3 * np.sin(2 * np.pi * 660 * t)
-            menu_select_wave = 0.3 * np.sin(2 * np.pi * 770 * t)
-
-            # Convertir a estéreo
-            brick_wave = np.tile(brick_wave, (2, 1)).T
-            wrong_wave = np.tile(wrong_wave, (2, 1)).T
-            game_over_wave = np.tile(game_over_wave, (2, 1)).T
-            level_complete_wave = np.tile(level_complete_wave, (2, 1)).T
-            menu_move_wave = np.tile(menu_move_wave, (2, 1)).T
-            menu_select_wave = np.tile(menu_select_wave, (2, 1)).T
-
-            # Crear sonidos
-            self.brick_hit_sound = pygame.mixer.Sound(pygame.sndarray.make_sound(brick_wave))
-            self.wrong_answer_sound = pygame.mixer.Sound(pygame.sndarray.make_sound(wrong_wave))
-            self.game_over_sound = pygame.mixer.Sound(pygame.sndarray.make_sound(game_over_wave))
-            self.level_complete_sound = pygame.mixer.Sound(pygame.sndarray.make_sound(level_complete_wave))
-            self.menu_move_sound = pygame.mixer.Sound(pygame.sndarray.make_sound(menu_move_wave))
-            self.menu_select_sound = pygame.mixer.Sound(pygame.sndarray.make_sound(menu_select_wave))
+        # Puntuaciones altas: la base se abre la primera vez que se necesita
+        self.leaderboard = None
+
+        # Pantallas estáticas ya compuestas
+        self.high_scores_pages = {}
+        self.instructions_screen = None
+
+        # Animaciones y mensajes temporizados
+        self.overlays = OverlayQueue()
+        self.flash_surface = None
+        self.dim_surface = None
+        self.frame_dt = FRAME_DT
+        # Teclas de la paleta, releídas solo tras un evento de teclado
+        self.inputs = 0
+        self.inputs_changed = True
+
+        # Paso fijo: tiempo pendiente de simular y posiciones del paso anterior
+        # para dibujar la bola y la paleta interpoladas entre dos pasos
+        self.accumulator = 0.0
+        self.interpolation = 1.0
+        self.prev_ball_pos = (0.0, 0.0)
+        self.prev_paddle_x = 0.0
+        self.frame_events = []
+        # Si el último fotograma dibujó bolas extra (para borrarlas en modo sucio)
+        self.extra_balls_drawn = False
+        self.extra_ball_rect = pygame.Rect(0, 0, BALL_RADIUS * 2, BALL_RADIUS * 2)
+        # Con --renderer texture: bolas ya dibujadas, fondo con los ladrillos
+        # y si la capa de ladrillos cambió desde que se compuso
+        self.ball_sprites = {}
+        self.backdrop = None
+        self.brick_layer_changed = True
+
+        # Desafío matemático en curso
+        self.challenge_frame = None
+        self.dialog_panel = None
+        self.challenge_input_box = None
+        self.challenge_text = ''
+        self.challenge_active = True
 
     def create_background(self):
+        rng = session_rng(self.seed, 'fondo')
         background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
         background.fill(BLACK)
 
         # Añadir efecto de estrellas
         for _ in range(200):  # Más estrellas para mejor efecto
-            x = random.randint(0, SCREEN_WIDTH)
-            y = random.randint(0, SCREEN_HEIGHT)
-            size = random.random() * 3  # Tamaños más variados
+            x = rng.randint(0, SCREEN_WIDTH)
+            y = rng.randint(0, SCREEN_HEIGHT)
+            size = rng.random() * 3  # Tamaños más variados
 
             # Colores aleatorios para algunas estrellas
             colors = [WHITE, (200, 200, 255), (255, 255, 200), (200, 255, 255)]
-            color = random.choice(colors)
+            color = rng.choice(colors)
 
             pygame.draw.circle(background, color, (x, y), size)
 
         return background
 
-    def load_high_scores(self):
-        try:
-            with open('high_scores.json', 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return []
-
-    def save_high_scores(self):
-        with open('high_scores.json', 'w') as f:
-            json.dump(self.high_scores, f)
+    def open_leaderboard(self):
+        # Importa high_scores.json la primera vez
+        if self.leaderboard is None:
+            self.leaderboard = Leaderboard('high_scores.db', 'high_scores.json')
+            atexit.register(self.leaderboard.close)
+        return self.leaderboard
 
     def add_high_score(self, score):
-        date = datetime.now().strftime("%d/%m/%Y")
-
-        # Crear entrada de puntuación
-        score_entry = {"score": score, "level": self.level, "date": date}
-
-        # Insertar en orden
-        self.high_scores.append(score_entry)
-        self.high_scores.sort(key=lambda x: x["score"], reverse=True)
-
-        # Mantener solo los 10 mejores
-        self.high_scores = self.high_scores[:10]
-
-        # Guardar
-        self.save_high_scores()
+        # Las partidas del jugador simulado no cuentan
+        if self.bot is not None:
+            return
+        # Se guarda en segundo plano; las páginas compuestas quedan obsoletas
+        self.open_leaderboard().add(self.player, score, self.sim.level)
+        self.high_scores_pages = {}
 
     def reset_game(self, level):
-        self.level = level
-        self.score = 0 if level == 1 else self.score  # Mantener puntuación al cambiar de nivel
-        self.lives = 6
-        self.paddle = pygame.Rect(SCREEN_WIDTH // 2 - PADDLE_WIDTH // 2,
-                                  SCREEN_HEIGHT - 50,
-                                  PADDLE_WIDTH, PADDLE_HEIGHT)
-        self.ball = pygame.Rect(SCREEN_WIDTH // 2 - BALL_RADIUS,
-                                SCREEN_HEIGHT // 2 - BALL_RADIUS,
-                                BALL_RADIUS * 2, BALL_RADIUS * 2)
-
-        # Aumentar velocidad de la bola con cada nivel
-        self.base_ball_speed = 5 + (self.level * 0.5)
-        self.ball_speed_x = self.base_ball_speed
-        self.ball_speed_y = -self.base_ball_speed
+        if self.sim is None:
+            # El banco de problemas (NumPy) y los ladrillos esperan a "Jugar"
+            from problem_bank import ProblemBank
+            self.sim = GameSimulation(level, rng=session_rng(self.seed, 'simulacion'),
+                                      problems=ProblemBank(self.seed), level_pack=self.open_level_pack(),
+                                      bus=self.event_bus)
+        self.sim.reset(level)
+        if self.recorder is not None:
+            self.recorder.reset(level)
+        self.build_brick_layer()
+        self.full_redraw = True
+        self.overlays.clear()
+        self.accumulator = 0.0
+        self.save_positions()
 
         # Variables para el tiempo de respuesta
         self.problem_start_time = 0
@@ -185,160 +485,153 @@ class MathBreakout:
         # Estado de juego
         self.game_state = PLAYING
 
-        self.create_bricks()
-
-    def create_bricks(self):
-        self.bricks = []
-        # Más colores para mayor variedad
-        colors = [RED, BLUE, GREEN, YELLOW, PURPLE, ORANGE, CYAN]
-
-        # Más ladrillos para niveles más altos
-        rows = min(5 + self.level, 12)  # Límite de 12 filas para que no sea imposible
-
-        for row in range(rows):
-            for col in range(10):
-                brick = pygame.Rect(col * (BRICK_WIDTH + 5) + 50,
-                                    row * (BRICK_HEIGHT + 5) + 50,
-                                    BRICK_WIDTH, BRICK_HEIGHT)
-                # Asignar diferentes colores según fila y nivel
-                brick_color = colors[row % len(colors)]
-                self.bricks.append((brick, brick_color))
-
-    def generate_math_problem(self):
-        # Aumentar complejidad del problema con el nivel
-        operators = ['+', '-', '*']
-        if self.level > 3:
-            operators.append('/')
-
-        operator = random.choice(operators)
-
-        if operator == '+':
-            a = random.randint(1, 20 + self.level * 5)
-            b = random.randint(1, 20 + self.level * 5)
-            problem = f"{a} + {b} = ?"
-            answer = a + b
-        elif operator == '-':
-            a = random.randint(10, 50 + self.level * 10)
-            b = random.randint(1, a)
-            problem = f"{a} - {b} = ?"
-            answer = a - b
-        elif operator == '*':
-            a = random.randint(1, 10 + self.level)
-            b = random.randint(1, 10 + self.level)
-            problem = f"{a} * {b} = ?"
-            answer = a * b
-        else:  # División para niveles superiores
-            b = random.randint(1, 10)
-            a = b * random.randint(1, 10)
-            problem = f"{a} ÷ {b} = ?"
-            answer = a // b
-
-        self.problem_start_time = time.time()
-        return problem, answer
-
-    def show_math_problem(self, problem):
-        # Guardar pantalla original
-        global user_answer
-        original_surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        original_surface.blit(self.screen, (0, 0))
-
-        # Crear una superficie para el cuadro de diálogo
-        dialog_width, dialog_height = 500, 300
-        dialog_x = (SCREEN_WIDTH - dialog_width) // 2
-        dialog_y = (SCREEN_HEIGHT - dialog_height) // 2
-
-        # Dibujar cuadro de diálogo
-        input_box = pygame.Rect(dialog_x + 150, dialog_y + 200, 200, 50)
-        color_inactive = BLUE
-        color_active = GREEN
-        color = color_inactive
-        active = True  # Activo por defecto
-        text = ''
-        done = False
-
-        while not done:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    exit()
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    if input_box.collidepoint(event.pos):
-                        active = True
-                    else:
-                        active = False
-                    color = color_active if active else color_inactive
-                if event.type == pygame.KEYDOWN:
-                    if active:
-                        if event.key == pygame.K_RETURN:
-                            try:
-                                user_answer = int(text)
-                                done = True
-                            except ValueError:
-                                text = ''
-                        elif event.key == pygame.K_BACKSPACE:
-                            text = text[:-1]
-                        elif event.key == pygame.K_ESCAPE:
-                            # Cancelar diálogo
-                            return None
-                        else:
-                            # Solo permitir números
-                            if event.unicode.isdigit() or (event.unicode == '-' and not text):
-                                text += event.unicode
-
-            # Volver a dibujar la pantalla original
-            self.screen.blit(original_surface, (0, 0))
-
-            # Dibujar panel semitransparente
-            dialog_surface = pygame.Surface((dialog_width, dialog_height), pygame.SRCALPHA)
-            dialog_surface.fill((0, 0, 0, 200))  # Negro semitransparente
-            self.screen.blit(dialog_surface, (dialog_x, dialog_y))
-
-            # Dibujar borde
-            pygame.draw.rect(self.screen, WHITE,
-                             (dialog_x, dialog_y, dialog_width, dialog_height), 2)
-
-            # Mostrar problema
-            title_text = self.title_font.render("Desafío Matemático", True, WHITE)
-            problem_txt = self.font.render(problem, True, WHITE)
-            instruction_txt = self.small_font.render("Escribe la respuesta y presiona Enter", True, WHITE)
-
-            self.screen.blit(title_text, (dialog_x + (dialog_width - title_text.get_width()) // 2, dialog_y + 30))
-            self.screen.blit(problem_txt, (dialog_x + (dialog_width - problem_txt.get_width()) // 2, dialog_y + 100))
-            self.screen.blit(instruction_txt, (dialog_x + (dialog_width - instruction_txt.get_width()) // 2, dialog_y + 150))
-
-            # Dibujar caja de entrada
-            txt_surface = self.font.render(text, True, color)
-            width = max(200, txt_surface.get_width()+10)
-            input_box.w = width
-            self.screen.blit(txt_surface, (input_box.x+5, input_box.y+5))
-            pygame.draw.rect(self.screen, color, input_box, 2)
-
-            # Mostrar tiempo transcurrido
-            elapsed = time.time() - self.problem_start_time
-            timer_text = self.small_font.render(f"Tiempo: {elapsed:.1f}s", True, WHITE)
-            self.screen.blit(timer_text, (dialog_x + dialog_width - 150, dialog_y + dialog_height - 40))
-
-            pygame.display.flip()
-            self.clock.tick(30)
-
-        self.last_problem_time = time.time() - self.problem_start_time
-        return user_answer
+    def open_level_pack(self):
+        if self.level_pack_path is None:
+            return None
+        from level_pack import LevelPack
+        try:
+            return LevelPack(self.level_pack_path)
+        except (OSError, ValueError) as e:
+            # Sin paquete se juega con los niveles generados
+            print(f"Error abriendo el paquete de niveles: {e}")
+            return None
+
+    def start_challenge(self):
+        # El marco del diálogo (fondo congelado, panel, título, problema e
+        # instrucciones) se compone una vez por problema; en cada fotograma
+        # solo se dibujan la caja de entrada y el cronómetro
+        self.scene_to_screen()
+        problem = self.sim.challenge[0]
+        frame = self.challenge_frame
+        if frame is None:
+            frame = self.challenge_frame = self.display.convert(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+        frame.blit(self.screen, (0, 0))
+
+        # Dibujar panel semitransparente
+        if self.dialog_panel is None:
+            self.dialog_panel = pygame.Surface((DIALOG_WIDTH, DIALOG_HEIGHT), pygame.SRCALPHA)
+            self.dialog_panel.fill((0, 0, 0, 200))  # Negro semitransparente
+        frame.blit(self.dialog_panel, (DIALOG_X, DIALOG_Y))
+
+        # Dibujar borde
+        pygame.draw.rect(frame, WHITE, (DIALOG_X, DIALOG_Y, DIALOG_WIDTH, DIALOG_HEIGHT), 2)
+
+        # Mostrar problema
+        title_text = self.text_cache.render(self.title_font, "Desafío Matemático", True, WHITE)
+        problem_txt = self.text_cache.render(self.font, problem, True, WHITE)
+        instruction_txt = self.text_cache.render(self.small_font, "Escribe la respuesta y presiona Enter", True, WHITE)
+
+        frame.blit(title_text, (DIALOG_X + (DIALOG_WIDTH - title_text.get_width()) // 2, DIALOG_Y + 30))
+        frame.blit(problem_txt, (DIALOG_X + (DIALOG_WIDTH - problem_txt.get_width()) // 2, DIALOG_Y + 100))
+        frame.blit(instruction_txt, (DIALOG_X + (DIALOG_WIDTH - instruction_txt.get_width()) // 2, DIALOG_Y + 150))
+
+        self.challenge_input_box = pygame.Rect(DIALOG_X + 150, DIALOG_Y + 200, 200, 50)
+        self.challenge_text = ''
+        self.challenge_active = True  # Activo por defecto
+        self.bot_answer = None
+        self.problem_start_time = time.perf_counter()
+        self.game_state = CHALLENGE
+        self.draw_challenge()
+
+    def draw_challenge(self):
+        self.screen.blit(self.challenge_frame, (0, 0))
+
+        # Dibujar caja de entrada
+        color = GREEN if self.challenge_active else BLUE
+        input_box = self.challenge_input_box
+        txt_surface = self.text_cache.render(self.font, self.challenge_text, True, color)
+        input_box.w = max(200, txt_surface.get_width() + 10)
+        self.screen.blit(txt_surface, (input_box.x + 5, input_box.y + 5))
+        pygame.draw.rect(self.screen, color, input_box, 2)
+
+        # Mostrar tiempo transcurrido
+        elapsed = time.perf_counter() - self.problem_start_time
+        timer_text = self.text_cache.render(self.small_font, f"Tiempo: {elapsed:.1f}s", True, WHITE)
+        self.screen.blit(timer_text, (DIALOG_X + DIALOG_WIDTH - 150, DIALOG_Y + DIALOG_HEIGHT - 40))
+
+    def handle_challenge_event(self, event):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            self.challenge_active = self.challenge_input_box.collidepoint(event.pos)
+        if event.type == pygame.KEYDOWN and self.challenge_active:
+            if event.key == pygame.K_RETURN:
+                try:
+                    user_answer = int(self.challenge_text)
+                except ValueError:
+                    self.challenge_text = ''
+                else:
+                    self.submit_challenge_answer(user_answer)
+            elif event.key == pygame.K_BACKSPACE:
+                self.challenge_text = self.challenge_text[:-1]
+            elif event.key == pygame.K_ESCAPE:
+                # Cancelar diálogo: salir sin destruir el ladrillo
+                self.sim.cancel_challenge()
+                self.accumulator = 0.0
+                if self.recorder is not None:
+                    self.recorder.cancel()
+                self.game_state = PLAYING
+                self.full_redraw = True
+            else:
+                # Solo permitir números
+                if event.unicode.isdigit() or (event.unicode == '-' and not self.challenge_text):
+                    self.challenge_text += event.unicode
+
+    def autoplay_challenge(self):
+        # El bot escribe su respuesta cuando ha pasado su tiempo de respuesta
+        if self.bot_answer is None:
+            self.bot_answer = self.bot.answer(self.sim)
+            self.challenge_text = ''
+        value, seconds = self.bot_answer
+        if time.perf_counter() - self.problem_start_time >= seconds:
+            self.bot_answer = None
+            self.challenge_text = str(value)
+            self.submit_challenge_answer(value)
+
+    def submit_challenge_answer(self, user_answer):
+        correct_answer, brick_data = self.sim.challenge[1:]
+        self.last_problem_time = time.perf_counter() - self.problem_start_time
+        self.game_state = PLAYING
+        # El diálogo cubría la pantalla: el siguiente fotograma se redibuja entero
+        self.full_redraw = True
+
+        if self.recorder is not None:
+            self.recorder.answer(user_answer, self.last_problem_time)
+        events = self.sim.answer(user_answer, self.last_problem_time)
+        # La bola puede haber vuelto al centro: no interpolar desde el impacto
+        self.save_positions()
+        self.accumulator = 0.0
+        if EVENT_CORRECT_ANSWER in events:
+            self.sounds.play('brick_hit')
+            # Mostrar puntos ganados
+            brick = brick_data[0]
+            if EVENT_BRICK_DAMAGED in events:
+                self.redraw_brick(brick_data)
+            else:
+                self.erase_brick(brick)
+            self.show_points_popup(self.sim.last_points, brick.centerx, brick.centery)
+            if EVENT_MULTIBALL in events:
+                self.show_multiball_popup()
+        else:
+            self.sounds.play('wrong_answer')
+            if self.sim.game_over:
+                self.show_game_over()
+            else:
+                # Mostrar mensaje de respuesta incorrecta
+                self.show_wrong_answer_popup(correct_answer)
 
     def show_game_over(self):
+        self.scene_to_screen()
         self.game_state = GAME_OVER
-        self.add_high_score(self.score)
+        self.add_high_score(self.sim.score)
 
         # Sonido de fin de juego
-        self.game_over_sound.play()
+        self.sounds.play('game_over')
 
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))  # Semi-transparente
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.get_dim_surface(), (0, 0))
 
-        game_over_text = self.title_font.render("¡GAME OVER!", True, RED)
-        score_text = self.font.render(f"Puntuación: {self.score}", True, WHITE)
-        level_text = self.font.render(f"Nivel alcanzado: {self.level}", True, WHITE)
-        continue_text = self.font.render("Presiona ESPACIO para volver al menú", True, WHITE)
+        game_over_text = self.text_cache.render(self.title_font, "¡GAME OVER!", True, RED)
+        score_text = self.text_cache.render(self.font, f"Puntuación: {self.sim.score}", True, WHITE)
+        level_text = self.text_cache.render(self.font, f"Nivel alcanzado: {self.sim.level}", True, WHITE)
+        continue_text = self.text_cache.render(self.font, "Presiona ESPACIO para volver al menú", True, WHITE)
 
         self.screen.blit(game_over_text, (SCREEN_WIDTH // 2 - game_over_text.get_width() // 2,
                                           SCREEN_HEIGHT // 2 - 100))
@@ -349,10 +642,11 @@ class MathBreakout:
         self.screen.blit(continue_text, (SCREEN_WIDTH // 2 - continue_text.get_width() // 2,
                                          SCREEN_HEIGHT // 2 + 100))
 
-        pygame.display.flip()
+        self.display.flip()
 
         # Esperar a que el jugador presione espacio
         waiting = True
+        shown = time.perf_counter()
         while waiting:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -362,22 +656,24 @@ class MathBreakout:
                     if event.key == pygame.K_SPACE:
                         waiting = False
                         self.game_state = MENU
+            if waiting and self.bot is not None and time.perf_counter() - shown >= AUTOPLAY_SCREEN_TIME:
+                waiting = False
+                self.game_state = MENU
             self.clock.tick(30)
 
     def show_level_completed(self):
+        self.scene_to_screen()
         self.game_state = LEVEL_COMPLETE
 
         # Sonido de nivel completado
-        self.level_complete_sound.play()
+        self.sounds.play('level_complete')
 
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))  # Semi-transparente
-        self.screen.blit(overlay, (0, 0))
+        self.screen.blit(self.get_dim_surface(), (0, 0))
 
-        level_text = self.title_font.render(f"¡NIVEL {self.level} COMPLETADO!", True, GREEN)
-        score_text = self.font.render(f"Puntuación actual: {self.score}", True, WHITE)
-        next_level_text = self.font.render(f"Preparando nivel {self.level + 1}...", True, WHITE)
-        continue_text = self.font.render("Presiona ESPACIO para continuar", True, WHITE)
+        level_text = self.text_cache.render(self.title_font, f"¡NIVEL {self.sim.level} COMPLETADO!", True, GREEN)
+        score_text = self.text_cache.render(self.font, f"Puntuación actual: {self.sim.score}", True, WHITE)
+        next_level_text = self.text_cache.render(self.font, f"Preparando nivel {self.sim.level + 1}...", True, WHITE)
+        continue_text = self.text_cache.render(self.font, "Presiona ESPACIO para continuar", True, WHITE)
 
         self.screen.blit(level_text, (SCREEN_WIDTH // 2 - level_text.get_width() // 2,
                                       SCREEN_HEIGHT // 2 - 100))
@@ -388,10 +684,11 @@ class MathBreakout:
         self.screen.blit(continue_text, (SCREEN_WIDTH // 2 - continue_text.get_width() // 2,
                                          SCREEN_HEIGHT // 2 + 100))
 
-        pygame.display.flip()
+        self.display.flip()
 
         # Esperar a que el jugador presione espacio
         waiting = True
+        shown = time.perf_counter()
         while waiting:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -400,18 +697,19 @@ class MathBreakout:
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
                         waiting = False
-                        self.level += 1
-                        self.reset_game(self.level)
+                        self.reset_game(self.sim.level + 1)
+            if waiting and self.bot is not None and time.perf_counter() - shown >= AUTOPLAY_SCREEN_TIME:
+                waiting = False
+                self.reset_game(self.sim.level + 1)
             self.clock.tick(30)
 
     def show_pause_menu(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))  # Semi-transparente
-        self.screen.blit(overlay, (0, 0))
+        self.full_redraw = True
+        self.screen.blit(self.get_dim_surface(), (0, 0))
 
-        pause_text = self.title_font.render("PAUSA", True, WHITE)
-        continue_text = self.font.render("Presiona ESC para continuar", True, WHITE)
-        quit_text = self.font.render("Presiona Q para salir al menú", True, WHITE)
+        pause_text = self.text_cache.render(self.title_font, "PAUSA", True, WHITE)
+        continue_text = self.text_cache.render(self.font, "Presiona ESC para continuar", True, WHITE)
+        quit_text = self.text_cache.render(self.font, "Presiona Q para salir al menú", True, WHITE)
 
         self.screen.blit(pause_text, (SCREEN_WIDTH // 2 - pause_text.get_width() // 2,
                                       SCREEN_HEIGHT // 2 - 100))
@@ -420,37 +718,48 @@ class MathBreakout:
         self.screen.blit(quit_text, (SCREEN_WIDTH // 2 - quit_text.get_width() // 2,
                                      SCREEN_HEIGHT // 2 + 50))
 
-        pygame.display.flip()
-
-    def show_main_menu(self):
-        self.screen.blit(self.background, (0, 0))
+        self.display.flip()
 
-        # Título
-        title_text = self.title_font.render("MATH BREAKOUT ADVENTURE", True, YELLOW)
-        self.screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
-
-        # Opciones de menú
-        menu_items = ["Jugar", "Puntuaciones Altas", "Instrucciones", "Salir"]
+    def menu_layout(self):
+        # Opciones de menú con su rectángulo para la detección de clics
         menu_positions = []
-
-        for i, item in enumerate(menu_items):
-            text = self.font.render(item, True, WHITE)
+        for i, item in enumerate(MENU_ITEMS):
+            text = self.text_cache.render(self.font, item, True, WHITE)
             y_pos = 300 + i * 60
             x_pos = SCREEN_WIDTH // 2 - text.get_width() // 2
-
-            # Almacenar posición para detección de clics
             menu_positions.append((item, pygame.Rect(x_pos - 10, y_pos - 10,
                                                      text.get_width() + 20, text.get_height() + 20)))
+        return menu_positions
 
-            # Dibujar texto
-            self.screen.blit(text, (x_pos, y_pos))
+    def draw_main_menu(self, menu_positions, selected):
+        self.screen.blit(self.background, (0, 0))
+
+        # Título
+        title_text = self.text_cache.render(self.title_font, "MATH BREAKOUT ADVENTURE", True, YELLOW)
+        self.screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
+
+        for item, rect in menu_positions:
+            # Resaltar la opción seleccionada
+            if item == selected:
+                pygame.draw.rect(self.screen, BLUE, rect, border_radius=5)
+                text = self.text_cache.render(self.font, item, True, YELLOW)
+            else:
+                text = self.text_cache.render(self.font, item, True, WHITE)
+
+            self.screen.blit(text, (rect.x + 10, rect.y + 10))
 
         # Versión en la esquina
-        version_text = self.small_font.render("v1.2.0", True, WHITE)
+        version_text = self.text_cache.render(self.small_font, "v1.2.0", True, WHITE)
         self.screen.blit(version_text, (SCREEN_WIDTH - version_text.get_width() - 10,
                                         SCREEN_HEIGHT - version_text.get_height() - 10))
 
-        pygame.display.flip()
+    def show_main_menu(self):
+        menu_items = MENU_ITEMS
+        menu_positions = self.menu_layout()
+        self.draw_main_menu(menu_positions, None)
+        self.display.flip()
+        self.profile.mark("primer fotograma del menú")
+        self.profile.report()
 
         # Control de menú
         selected = None
@@ -467,12 +776,12 @@ class MathBreakout:
                         if rect.collidepoint(event.pos):
                             if selected != item:
                                 selected = item
-                                self.menu_move_sound.play()
+                                self.sounds.play('menu_move')
 
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     for item, rect in menu_positions:
                         if rect.collidepoint(event.pos):
-                            self.menu_select_sound.play()
+                            self.sounds.play('menu_select')
                             self.handle_menu_selection(item)
 
                 # Manejar teclado
@@ -482,39 +791,24 @@ class MathBreakout:
                         current_idx = menu_items.index(selected) if selected in menu_items else 0
                         new_idx = (current_idx - 1) % len(menu_items)
                         selected = menu_items[new_idx]
-                        self.menu_move_sound.play()
+                        self.sounds.play('menu_move')
 
                     elif event.key == pygame.K_DOWN:
                         # Mover selección hacia abajo
                         current_idx = menu_items.index(selected) if selected in menu_items else 0
                         new_idx = (current_idx + 1) % len(menu_items)
                         selected = menu_items[new_idx]
-                        self.menu_move_sound.play()
+                        self.sounds.play('menu_move')
 
                     elif event.key == pygame.K_RETURN:
                         # Seleccionar opción
                         if selected:
-                            self.menu_select_sound.play()
+                            self.sounds.play('menu_select')
                             self.handle_menu_selection(selected)
 
             # Volver a dibujar el menú con la selección resaltada
-            self.screen.blit(self.background, (0, 0))
-            self.screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
-
-            for i, (item, rect) in enumerate(menu_positions):
-                # Resaltar la opción seleccionada
-                if item == selected:
-                    pygame.draw.rect(self.screen, BLUE, rect, border_radius=5)
-                    text = self.font.render(item, True, YELLOW)
-                else:
-                    text = self.font.render(item, True, WHITE)
-
-                self.screen.blit(text, (rect.x + 10, rect.y + 10))
-
-            self.screen.blit(version_text, (SCREEN_WIDTH - version_text.get_width() - 10,
-                                            SCREEN_HEIGHT - version_text.get_height() - 10))
-
-            pygame.display.flip()
+            self.draw_main_menu(menu_positions, selected)
+            self.display.flip()
             self.clock.tick(30)
 
     def handle_menu_selection(self, selected):
@@ -529,48 +823,79 @@ class MathBreakout:
             pygame.quit()
             exit()
 
+    def build_high_scores_screen(self, page, pages):
+        screen = self.background.copy()
+
+        title_text = self.text_cache.render(self.title_font, "MEJORES PUNTUACIONES", True, YELLOW)
+        screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
+
+        # Solo se consulta la página visible
+        offset = page * HIGH_SCORES_PER_PAGE
+        entries = self.open_leaderboard().top(HIGH_SCORES_PER_PAGE, offset)
+
+        if not entries:
+            no_scores = self.text_cache.render(self.font, "No hay puntuaciones guardadas", True, WHITE)
+            screen.blit(no_scores, (SCREEN_WIDTH // 2 - no_scores.get_width() // 2, 300))
+        else:
+            # Encabezado
+            header_y = 200
+            pos_header = self.text_cache.render(self.font, "#", True, CYAN)
+            player_header = self.text_cache.render(self.font, "Jugador", True, CYAN)
+            score_header = self.text_cache.render(self.font, "Puntuación", True, CYAN)
+            level_header = self.text_cache.render(self.font, "Nivel", True, CYAN)
+            date_header = self.text_cache.render(self.font, "Fecha", True, CYAN)
+
+            screen.blit(pos_header, (120, header_y))
+            screen.blit(player_header, (200, header_y))
+            screen.blit(score_header, (450, header_y))
+            screen.blit(level_header, (630, header_y))
+            screen.blit(date_header, (750, header_y))
+
+            # Lista de puntuaciones
+            for i, entry in enumerate(entries):
+                y_pos = 250 + i * 38
+
+                pos_text = self.text_cache.render(self.font, f"{offset + i + 1}.", True, WHITE)
+                player_text = self.text_cache.render(self.font, entry['player'][:16], True, WHITE)
+                score_text = self.text_cache.render(self.font, f"{entry['score']}", True, WHITE)
+                level_text = self.text_cache.render(self.font, f"{entry['level']}", True, WHITE)
+                date_text = self.text_cache.render(self.font, f"{entry['date']}", True, WHITE)
+
+                screen.blit(pos_text, (120, y_pos))
+                screen.blit(player_text, (200, y_pos))
+                screen.blit(score_text, (450, y_pos))
+                screen.blit(level_text, (630, y_pos))
+                screen.blit(date_text, (750, y_pos))
+
+        if pages > 1:
+            page_text = self.text_cache.render(self.small_font,
+                                               f"Página {page + 1} de {pages}  (IZQUIERDA / DERECHA)", True, CYAN)
+            screen.blit(page_text, (SCREEN_WIDTH // 2 - page_text.get_width() // 2, 640))
+
+        back_text = self.text_cache.render(self.font, "Presiona ESC para volver", True, WHITE)
+        screen.blit(back_text, (SCREEN_WIDTH // 2 - back_text.get_width() // 2, 680))
+        return screen
+
+    def draw_high_scores(self, page, pages):
+        # Cada página se compone al visitarla y se guarda hasta que cambien las puntuaciones
+        if page not in self.high_scores_pages:
+            self.high_scores_pages[page] = self.build_high_scores_screen(page, pages)
+        self.screen.blit(self.high_scores_pages[page], (0, 0))
+
+    def high_score_pages(self):
+        # Esperar a que se guarden las puntuaciones pendientes antes de leer
+        leaderboard = self.open_leaderboard()
+        leaderboard.flush()
+        return max(1, -(-leaderboard.count() // HIGH_SCORES_PER_PAGE))
+
     def show_high_scores(self):
+        pages = self.high_score_pages()
+        page = 0
+
         running = True
         while running:
-            self.screen.blit(self.background, (0, 0))
-
-            title_text = self.title_font.render("MEJORES PUNTUACIONES", True, YELLOW)
-            self.screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
-
-            if not self.high_scores:
-                no_scores = self.font.render("No hay puntuaciones guardadas", True, WHITE)
-                self.screen.blit(no_scores, (SCREEN_WIDTH // 2 - no_scores.get_width() // 2, 300))
-            else:
-                # Encabezado
-                header_y = 200
-                pos_header = self.font.render("#", True, CYAN)
-                score_header = self.font.render("Puntuación", True, CYAN)
-                level_header = self.font.render("Nivel", True, CYAN)
-                date_header = self.font.render("Fecha", True, CYAN)
-
-                self.screen.blit(pos_header, (200, header_y))
-                self.screen.blit(score_header, (300, header_y))
-                self.screen.blit(level_header, (500, header_y))
-                self.screen.blit(date_header, (650, header_y))
-
-                # Lista de puntuaciones
-                for i, entry in enumerate(self.high_scores):
-                    y_pos = 250 + i * 40
-
-                    pos_text = self.font.render(f"{i+1}.", True, WHITE)
-                    score_text = self.font.render(f"{entry['score']}", True, WHITE)
-                    level_text = self.font.render(f"{entry['level']}", True, WHITE)
-                    date_text = self.font.render(f"{entry['date']}", True, WHITE)
-
-                    self.screen.blit(pos_text, (200, y_pos))
-                    self.screen.blit(score_text, (300, y_pos))
-                    self.screen.blit(level_text, (500, y_pos))
-                    self.screen.blit(date_text, (650, y_pos))
-
-            back_text = self.font.render("Presiona ESC para volver", True, WHITE)
-            self.screen.blit(back_text, (SCREEN_WIDTH // 2 - back_text.get_width() // 2, 650))
-
-            pygame.display.flip()
+            self.draw_high_scores(page, pages)
+            self.display.flip()
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -580,38 +905,49 @@ class MathBreakout:
                     if event.key == pygame.K_ESCAPE:
                         running = False
                         self.game_state = MENU
+                    elif event.key in (pygame.K_RIGHT, pygame.K_PAGEDOWN):
+                        page = min(page + 1, pages - 1)
+                    elif event.key in (pygame.K_LEFT, pygame.K_PAGEUP):
+                        page = max(page - 1, 0)
 
             self.clock.tick(30)
 
+    def build_instructions_screen(self):
+        screen = self.background.copy()
+
+        title_text = self.text_cache.render(self.title_font, "INSTRUCCIONES", True, YELLOW)
+        screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
+
+        instructions = [
+            "- Usa las FLECHAS IZQUIERDA y DERECHA para mover la paleta",
+            "- Golpea los ladrillos con la bola para destruirlos",
+            "- Cuando golpeas un ladrillo, deberás resolver un problema matemático",
+            "- Si respondes correctamente, el ladrillo desaparece y ganas puntos",
+            "- Si fallas, pierdes una vida",
+            "- Perderás una vida si la bola cae por debajo de la pantalla",
+            "- El juego termina cuando pierdes todas tus vidas",
+            "- Completar un nivel aumenta la dificultad",
+            "- Presiona ESC durante el juego para pausar",
+            "- ¡Diviértete y mejora tus habilidades matemáticas!"
+        ]
+
+        for i, line in enumerate(instructions):
+            instruction_text = self.text_cache.render(self.font, line, True, WHITE)
+            screen.blit(instruction_text, (150, 200 + i * 40))
+
+        back_text = self.text_cache.render(self.font, "Presiona ESC para volver", True, WHITE)
+        screen.blit(back_text, (SCREEN_WIDTH // 2 - back_text.get_width() // 2, 650))
+        return screen
+
     def show_instructions(self):
+        # Las instrucciones no cambian: se componen una sola vez
+        if self.instructions_screen is None:
+            self.instructions_screen = self.build_instructions_screen()
+
         running = True
         while running:
-            self.screen.blit(self.background, (0, 0))
-
-            title_text = self.title_font.render("INSTRUCCIONES", True, YELLOW)
-            self.screen.blit(title_text, (SCREEN_WIDTH // 2 - title_text.get_width() // 2, 100))
-
-            instructions = [
-                "- Usa las FLECHAS IZQUIERDA y DERECHA para mover la paleta",
-                "- Golpea los ladrillos con la bola para destruirlos",
-                "- Cuando golpeas un ladrillo, deberás resolver un problema matemático",
-                "- Si respondes correctamente, el ladrillo desaparece y ganas puntos",
-                "- Si fallas, pierdes una vida",
-                "- Perderás una vida si la bola cae por debajo de la pantalla",
-                "- El juego termina cuando pierdes todas tus vidas",
-                "- Completar un nivel aumenta la dificultad",
-                "- Presiona ESC durante el juego para pausar",
-                "- ¡Diviértete y mejora tus habilidades matemáticas!"
-            ]
-
-            for i, line in enumerate(instructions):
-                instruction_text = self.font.render(line, True, WHITE)
-                self.screen.blit(instruction_text, (150, 200 + i * 40))
-
-            back_text = self.font.render("Presiona ESC para volver", True, WHITE)
-            self.screen.blit(back_text, (SCREEN_WIDTH // 2 - back_text.get_width() // 2, 650))
-
-            pygame.display.flip()
+            self.screen.blit(self.instructions_screen, (0, 0))
+            self.display.flip()
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
@@ -624,13 +960,6 @@ class MathBreakout:
 
             self.clock.tick(30)
 
-    def calculate_score_for_answer(self):
-        # Dar más puntos por respuestas rápidas
-        base_score = 100
-        time_bonus = max(0, 5 - self.last_problem_time) * 20  # 20 puntos por cada segundo bajo 5
-        level_bonus = self.level * 10  # 10 puntos adicionales por nivel
-        return int(base_score + time_bonus + level_bonus)
-
     def run(self):
         running = True
         self.game_state = MENU
@@ -641,161 +970,107 @@ class MathBreakout:
 
 
             elif self.game_state == PLAYING:
+                profiler = self.profiler
+                profiler.begin_frame()
+
                 # Manejar eventos
                 for event in pygame.event.get():
                     if event.type == pygame.QUIT:
                         running = False
+                    if event.type == pygame.KEYDOWN or event.type == pygame.KEYUP:
+                        self.inputs_changed = True
                     if event.type == pygame.KEYDOWN:
                         if event.key == pygame.K_ESCAPE:
                             self.game_state = PAUSED
-
-                # Controlar la paleta
-                keys = pygame.key.get_pressed()
-                if keys[pygame.K_LEFT] and self.paddle.left > 0:
-                    self.paddle.x -= 10
-                if keys[pygame.K_RIGHT] and self.paddle.right < SCREEN_WIDTH:
-                    self.paddle.x += 10
-
-                # Movimiento de la pelota
-                self.ball.x += self.ball_speed_x
-                self.ball.y += self.ball_speed_y
-
-                # Colisión de la pelota con las paredes
-                if self.ball.left <= 0:
-                    self.ball.left = 0
-                    self.ball_speed_x *= -1
-                elif self.ball.right >= SCREEN_WIDTH:
-                    self.ball.right = SCREEN_WIDTH
-                    self.ball_speed_x *= -1
-                if self.ball.top <= 0:
-                    self.ball.top = 0
-                    self.ball_speed_y *= -1
-
-                # Colisión con la paleta
-                if self.ball.colliderect(self.paddle):
-                    # Cambiar dirección según dónde golpee la paleta (para dar más control)
-                    relative_intersect_x = (self.paddle.x + (PADDLE_WIDTH / 2)) - self.ball.x
-                    normalized_relative_intersect_x = relative_intersect_x / (PADDLE_WIDTH / 2)
-                    bounce_angle = normalized_relative_intersect_x * (np.pi / 3)  # Máximo 60 grados
-
-                    # Calcular nueva dirección
-                    self.ball_speed_x = self.base_ball_speed * -np.sin(bounce_angle)
-                    self.ball_speed_y = self.base_ball_speed * -np.cos(bounce_angle)
-
-                    # Asegurar que la bola no quede atrapada en la paleta
-                    self.ball.bottom = self.paddle.top - 1
-
-                # Colisión con los ladrillos
-                for brick_data in self.bricks[:]:
-                    brick, color = brick_data
-                    if self.ball.colliderect(brick):
-                        # Detectar lado de colisión de manera más precisa
-                        # Calcular distancias a cada lado del ladrillo
-                        left_dist = abs(self.ball.right - brick.left)
-                        right_dist = abs(self.ball.left - brick.right)
-                        top_dist = abs(self.ball.bottom - brick.top)
-                        bottom_dist = abs(self.ball.top - brick.bottom)
-
-                        # Encontrar la distancia mínima para determinar el lado de colisión
-                        min_dist = min(left_dist, right_dist, top_dist, bottom_dist)
-
-                        # Ajustar posición y velocidad según el lado de colisión
-                        if min_dist == left_dist:
-                            self.ball.right = brick.left - 1
-                            self.ball_speed_x = -abs(self.ball_speed_x)
-                        elif min_dist == right_dist:
-                            self.ball.left = brick.right + 1
-                            self.ball_speed_x = abs(self.ball_speed_x)
-                        elif min_dist == top_dist:
-                            self.ball.bottom = brick.top - 1
-                            self.ball_speed_y = -abs(self.ball_speed_y)
-                        elif min_dist == bottom_dist:
-                            self.ball.top = brick.bottom + 1
-                            self.ball_speed_y = abs(self.ball_speed_y)
-
-                        # Generar problema matemático
-                        problem, correct_answer = self.generate_math_problem()
-                        user_answer = self.show_math_problem(problem)
-
-                        # Si el usuario cancela, salir sin destruir el ladrillo
-                        if user_answer is None:
-                            continue
-
-                        if user_answer == correct_answer:
-                            self.brick_hit_sound.play()
-                            # Puntuación basada en el tiempo de respuesta
-                            points = self.calculate_score_for_answer()
-                            self.score += points
-
-                            # Mostrar puntos ganados
-                            self.show_points_popup(points, brick.centerx, brick.centery)
-
-                            # Eliminar ladrillo
-                            self.bricks.remove(brick_data)
-                        else:
-                            self.wrong_answer_sound.play()
-                            self.lives -= 1
-                            if self.lives <= 0:
-                                self.show_game_over()
-                            else:
-                                # Mostrar mensaje de respuesta incorrecta
-                                self.show_wrong_answer_popup(correct_answer)
-
-                                # Mover la bola de nuevo a la posición inicial
-                                self.ball.x = SCREEN_WIDTH // 2 - BALL_RADIUS
-                                self.ball.y = SCREEN_HEIGHT // 2 - BALL_RADIUS
-
-                        # Mantener la velocidad progresiva
-                        ball_speed_base = self.base_ball_speed
-                        ball_speed_direction_x = 1 if self.ball_speed_x > 0 else -1
-                        ball_speed_direction_y = 1 if self.ball_speed_y > 0 else -1
-                        self.ball_speed_x = ball_speed_base * ball_speed_direction_x
-                        self.ball_speed_y = -abs(ball_speed_base * ball_speed_direction_y)
-                        break  # Salir del bucle después de procesar una colisión
+                            self.scene_to_screen()
+                        elif event.key == pygame.K_F2:
+                            # Alternar entre pantalla completa y rectángulos sucios
+                            self.dirty_rects_mode = not self.dirty_rects_mode
+                            self.full_redraw = True
+                        elif event.key == pygame.K_F3:
+                            # Panel de tiempos por fase
+                            profiler.toggle_overlay()
+                            self.full_redraw = True
+                profiler.mark(PHASE_EVENTS)
+
+                # Controlar la paleta. get_pressed() crea una tupla con todo el
+                # teclado, así que solo se consulta cuando llega un evento de tecla
+                if self.bot is not None:
+                    self.inputs = self.bot.inputs(self.sim)
+                elif self.inputs_changed:
+                    keys = pygame.key.get_pressed()
+                    self.inputs = 0
+                    if keys[pygame.K_LEFT]:
+                        self.inputs |= INPUT_LEFT
+                    if keys[pygame.K_RIGHT]:
+                        self.inputs |= INPUT_RIGHT
+                    self.inputs_changed = False
+                inputs = self.inputs
+                profiler.mark(PHASE_INPUT)
+
+                self.sim.timings = profiler.sim_timings if profiler.enabled else None
+                events = self.step_playing(inputs)
+                profiler.mark(PHASE_MOVEMENT)
 
                 # Dibujo
-                self.screen.blit(self.background, (0, 0))
-                pygame.draw.rect(self.screen, BLUE, self.paddle)
-                pygame.draw.ellipse(self.screen, WHITE, self.ball)
-
-                # Dibujar ladrillos con colores
-                for brick, color in self.bricks:
-                    pygame.draw.rect(self.screen, color, brick)
-                    # Añadir borde para mejor visualización
-                    pygame.draw.rect(self.screen, WHITE, brick, 1)
+                dirty = self.draw_playing()
 
-                # Mostrar puntuación y vidas
-                score_text = self.font.render(f"Puntuación: {self.score}", True, WHITE)
-                lives_text = self.font.render(f"Vidas: {self.lives}", True, WHITE)
-                level_text = self.font.render(f"Nivel: {self.level}", True, WHITE)
-
-                self.screen.blit(score_text, (10, 10))
-                self.screen.blit(lives_text, (10, 50))
-                self.screen.blit(level_text, (10, 90))
+                # Colisión con un ladrillo: desafío matemático
+                if self.sim.challenge is not None:
+                    self.start_challenge()
+                    dirty = None
 
                 # Condiciones de game over
-                if self.ball.bottom >= SCREEN_HEIGHT:
-                    self.lives -= 1
-                    if self.lives <= 0:
-                        self.show_game_over()
-                    else:
-                        # Mostrar mensaje de pérdida de vida
-                        self.show_life_lost_popup()
-
-                        # Mover la bola de nuevo a la posición inicial
-                        self.ball.x = SCREEN_WIDTH // 2 - BALL_RADIUS
-                        self.ball.y = SCREEN_HEIGHT // 2 - BALL_RADIUS
-
-                        # Resetear la velocidad de la bola para dar tiempo al jugador
-                        self.ball_speed_x = self.base_ball_speed * (1 if random.random() > 0.5 else -1)
-                        self.ball_speed_y = -self.base_ball_speed
+                if EVENT_LIFE_LOST in events:
+                    # Mostrar mensaje de pérdida de vida
+                    self.show_life_lost_popup()
+                elif self.sim.game_over and self.game_state == PLAYING:
+                    profiler.mark(PHASE_DRAW)
+                    blocked_start = time.perf_counter()
+                    self.show_game_over()
+                    profiler.add_blocked(blocked_start)
 
                 # Nivel completado
-                if not self.bricks:
+                if self.sim.level_complete and self.game_state == PLAYING:
+                    profiler.mark(PHASE_DRAW)
+                    blocked_start = time.perf_counter()
                     self.show_level_completed()
+                    profiler.add_blocked(blocked_start)
+
+                if profiler.show_overlay and self.game_state == PLAYING:
+                    if self.profiler_overlay is None:
+                        self.profiler_overlay = ProfilerOverlay(self.small_font)
+                    if self.display.textures:
+                        # El panel cambia en cada fotograma: se vuelve a subir
+                        self.display.blit(self.profiler_overlay.render(profiler),
+                                          self.profiler_overlay.position, changed=True)
+                    else:
+                        self.profiler_overlay.draw(self.screen, profiler)
+                    dirty = None
+                profiler.mark(PHASE_DRAW)
+
+                self.present_playing(dirty)
+                profiler.mark(PHASE_FLIP)
+                profiler.end_frame(self.clock.get_fps())
+                self.frame_dt = self.clock.tick(self.max_fps) / 1000.0
+                # Las teclas pueden cambiar en otra pantalla sin que se vea aquí
+                if self.game_state != PLAYING:
+                    self.inputs_changed = True
+
+            elif self.game_state == CHALLENGE:
+                # La simulación queda congelada hasta que se responde
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        running = False
+                    else:
+                        self.handle_challenge_event(event)
+                if self.bot is not None and self.game_state == CHALLENGE:
+                    self.autoplay_challenge()
 
-                pygame.display.flip()
-                self.clock.tick(60)
+                if self.game_state == CHALLENGE:
+                    self.draw_challenge()
+                    self.display.flip()
+                self.clock.tick(30)
 
             elif self.game_state == PAUSED:
                 # Mostrar menú de pausa
@@ -821,50 +1096,419 @@ class MathBreakout:
                 # Estado manejado por show_level_completed
                 pass
 
+    def save_positions(self):
+        ball = self.sim.ball
+        self.prev_ball_pos = (ball.x, ball.y)
+        self.prev_paddle_x = self.sim.paddle.x
+        if self.sim.balls is not None:
+            self.sim.balls.save_positions()
+
+    def step_playing(self, inputs):
+        # Avanzar la física en pasos fijos de FRAME_DT según el tiempo real
+        # transcurrido, salvo mientras un mensaje (respuesta incorrecta) la
+        # retiene. Lo que sobra se usa para interpolar el dibujo.
+        self.overlays.update(self.frame_dt)
+        events = self.frame_events
+        events.clear()
+        if self.overlays.holding:
+            self.accumulator = 0.0
+            self.interpolation = 1.0
+            return events
+
+        sim = self.sim
+        self.accumulator = min(self.accumulator + self.frame_dt, MAX_FRAME_TIME)
+        while self.accumulator >= FRAME_DT:
+            self.accumulator -= FRAME_DT
+            self.save_positions()
+            events.extend(sim.step(inputs, FRAME_DT))
+            if self.recorder is not None:
+                self.recorder.step(inputs)
+            if sim.balls is not None and (sim.balls.broken or sim.balls.damaged):
+                # Ladrillos rotos o dañados por las bolas extra
+                self.sounds.play('brick_hit')
+                for brick_data in sim.balls.broken:
+                    self.erase_brick(brick_data[0])
+                for brick_data in sim.balls.damaged:
+                    self.redraw_brick(brick_data)
+            if sim.broken or sim.damaged:
+                # Golpes de la bola principal que no plantearon problema
+                self.sounds.play('brick_hit')
+                for brick_data in sim.broken:
+                    self.erase_brick(brick_data[0])
+                for brick_data in sim.damaged:
+                    self.redraw_brick(brick_data)
+            if (sim.challenge is not None or EVENT_LIFE_LOST in events or sim.game_over
+                    or sim.level_complete):
+                # Impacto, vida perdida o fin de nivel o de partida: se atiende
+                # en este fotograma y se dibuja la posición real
+                self.accumulator = 0.0
+                self.save_positions()
+                break
+
+        self.interpolation = self.accumulator / FRAME_DT
+        return events
+
+    def present_playing(self, dirty):
+        if self.display.textures:
+            if self.game_state == PLAYING:
+                self.overlays.draw(self.display)
+            self.display.end_frame()
+            return
+
+        if self.game_state == PLAYING:
+            self.overlays.draw(self.screen)
+
+        if dirty is None:
+            self.display.flip()
+        else:
+            self.display.update(dirty)
+
+    def build_brick_layer(self):
+        # Los ladrillos solo cambian al responder bien, así que se dibujan una
+        # vez por nivel en una capa aparte y cada fotograma se pega entera
+        bricks = self.sim.bricks
+        self.brick_layer_changed = True
+        if not bricks:
+            self.brick_layer = None
+            return
+
+        left = min(int(brick.x) for brick, _ in bricks)
+        top = min(int(brick.y) for brick, _ in bricks)
+        right = max(int(brick.x + brick.w) + 1 for brick, _ in bricks)
+        bottom = max(int(brick.y + brick.h) + 1 for brick, _ in bricks)
+
+        layer = self.display.convert(pygame.Surface((right - left, bottom - top)))
+        layer.fill(BLACK)
+        self.brick_layer = layer
+        self.brick_layer_pos = (left, top)
+        for brick_data in bricks:
+            self.draw_brick(brick_data)
+
+        # El negro es transparente; RLE acelera el blit de una capa que casi no cambia
+        layer.set_colorkey(BLACK, pygame.RLEACCEL)
+
+    def draw_brick(self, brick_data):
+        brick, color = brick_data
+        left, top = self.brick_layer_pos
+        brick_rect = pygame.Rect(brick.x - left, brick.y - top, brick.w, brick.h)
+        pygame.draw.rect(self.brick_layer, color, brick_rect)
+        # Añadir borde para mejor visualización
+        pygame.draw.rect(self.brick_layer, WHITE, brick_rect, 1)
+        # Un marco interior más por cada golpe extra que le queda
+        for _ in range(self.sim.brick_hits.get(brick_data, 1) - 1):
+            brick_rect.inflate_ip(-6, -6)
+            if brick_rect.width <= 0 or brick_rect.height <= 0:
+                break
+            pygame.draw.rect(self.brick_layer, WHITE, brick_rect, 1)
+
+    def redraw_brick(self, brick_data):
+        # Ladrillo de varios golpes que ha perdido uno
+        if self.brick_layer is None:
+            return
+        self.erase_brick(brick_data[0])
+        # pygame.draw no sabe dibujar sobre una superficie RLE: al bloquearla
+        # se descomprime
+        self.brick_layer.lock()
+        self.draw_brick(brick_data)
+        self.brick_layer.unlock()
+
+    def erase_brick(self, brick):
+        # Borrar solo el rectángulo del ladrillo eliminado
+        if self.brick_layer is None:
+            return
+        left, top = self.brick_layer_pos
+        self.brick_layer.fill(BLACK, (brick.x - left, brick.y - top, brick.w, brick.h))
+        # Con texturas, el fondo se recompone en el siguiente fotograma
+        self.brick_layer_changed = True
+        if self.dirty_rects_mode:
+            self.dirty_rects.append(pygame.Rect(brick.x, brick.y, brick.w, brick.h).inflate(2, 2))
+
+    def draw_playing(self):
+        # Devuelve los rectángulos a actualizar, o None si se redibujó todo
+        if self.display.textures:
+            return self.draw_playing_textures()
+        # Con bolas extra en juego (y el fotograma siguiente) se redibuja todo
+        extra_balls = self.sim.balls is not None and self.sim.balls.count > 0
+        if (self.dirty_rects_mode and not self.full_redraw and not self.overlays.needs_full_redraw
+                and not self.profiler.show_overlay and not extra_balls and not self.extra_balls_drawn):
+            return self.draw_playing_dirty()
+        return self.draw_playing_full()
+
+    def draw_playing_full(self):
+        sim = self.sim
+        extra_balls = sim.balls is not None and sim.balls.count > 0
+        self.screen.blit(self.background, (0, 0))
+
+        # Capa de ladrillos precalculada
+        if self.brick_layer is None and sim.bricks:
+            self.build_brick_layer()
+        if self.brick_layer is not None:
+            self.screen.blit(self.brick_layer, self.brick_layer_pos)
+
+        ball_rect, paddle_rect = self.draw_ball_and_paddle()
+        if extra_balls:
+            self.draw_extra_balls()
+        self.extra_balls_drawn = extra_balls
+
+        # Mostrar puntuación y vidas
+        self.update_hud()
+        for surface, rect in self.hud_items:
+            self.screen.blit(surface, rect)
+
+        self.prev_ball_rect = ball_rect
+        self.prev_paddle_rect = paddle_rect
+        self.dirty_rects.clear()
+        self.full_redraw = False
+        return None
+
+    def draw_playing_textures(self):
+        # Misma escena que draw_playing_full, pero compuesta por SDL con
+        # texturas ya subidas; solo la capa de ladrillos se vuelve a subir
+        # cuando cambia
+        sim = self.sim
+        display = self.display
+        if self.brick_layer is None and sim.bricks:
+            self.build_brick_layer()
+
+        # Fondo y ladrillos van juntos en una textura opaca: el renderizador
+        # por software mezcla muy despacio la capa con color clave
+        changed = self.brick_layer_changed
+        if changed:
+            if self.backdrop is None:
+                self.backdrop = self.background.copy()
+            else:
+                self.backdrop.blit(self.background, (0, 0))
+            if self.brick_layer is not None:
+                self.backdrop.blit(self.brick_layer, self.brick_layer_pos)
+            self.brick_layer_changed = False
+
+        display.begin_frame()
+        display.blit(self.backdrop, (0, 0), changed)
+
+        ball_rect, paddle_rect = self.interpolated_rects()
+        display.blit(self.ball_sprite(WHITE), ball_rect)
+        display.fill(BLUE, paddle_rect)
+        if sim.balls is not None and sim.balls.count > 0:
+            sprite = self.ball_sprite(YELLOW)
+            for x, y in self.extra_ball_positions():
+                display.blit(sprite, (x, y))
+
+        self.update_hud()
+        for surface, rect in self.hud_items:
+            display.blit(surface, rect)
+        self.full_redraw = False
+        return None
+
+    def ball_sprite(self, color):
+        # Bola ya dibujada, para pegarla como textura
+        sprite = self.ball_sprites.get(color)
+        if sprite is None:
+            sprite = pygame.Surface((BALL_RADIUS * 2, BALL_RADIUS * 2), pygame.SRCALPHA)
+            pygame.draw.ellipse(sprite, color, sprite.get_rect())
+            self.ball_sprites[color] = sprite
+        return sprite
+
+    def scene_to_screen(self):
+        # Con texturas la partida no se dibuja en self.screen, pero el
+        # desafío, la pausa y el fin de partida la usan de fondo
+        if self.display.textures:
+            self.draw_playing_full()
+
+    def draw_playing_dirty(self):
+        dirty = self.dirty_rects
+        dirty.append(self.prev_ball_rect)
+        dirty.append(self.prev_paddle_rect)
+
+        # El marcador solo se vuelve a renderizar cuando cambia
+        if self.update_hud():
+            dirty.extend(self.prev_hud_rects)
+            dirty.extend(rect for _, rect in self.hud_items)
+
+        for rect in dirty:
+            self.restore_area(rect)
+
+        ball_rect, paddle_rect = self.draw_ball_and_paddle()
+        dirty.append(ball_rect)
+        dirty.append(paddle_rect)
+
+        # Volver a pintar el marcador si alguna zona restaurada lo tapaba
+        for surface, rect in self.hud_items:
+            if rect.collidelist(dirty) != -1:
+                self.screen.blit(surface, rect)
+
+        self.prev_ball_rect = ball_rect
+        self.prev_paddle_rect = paddle_rect
+        # La lista devuelta se envía a pantalla; el fotograma siguiente
+        # acumula en la otra
+        self.dirty_rects = self.spare_dirty_rects
+        self.dirty_rects.clear()
+        self.spare_dirty_rects = dirty
+        return dirty
+
+    def restore_area(self, rect):
+        # Fondo y ladrillos de una zona de la pantalla
+        self.screen.blit(self.background, rect, rect)
+        if self.brick_layer is not None:
+            left, top = self.brick_layer_pos
+            self.screen.blit(self.brick_layer, rect, rect.move(-left, -top))
+
+    def draw_ball_and_paddle(self):
+        ball_rect, paddle_rect = self.interpolated_rects()
+        pygame.draw.ellipse(self.screen, WHITE, ball_rect)
+        pygame.draw.rect(self.screen, BLUE, paddle_rect)
+        # Un píxel de margen por el redondeo de las posiciones en coma flotante
+        ball_rect.inflate_ip(2, 2)
+        paddle_rect.inflate_ip(2, 2)
+        return ball_rect, paddle_rect
+
+    def interpolated_rects(self):
+        ball = self.sim.ball
+        paddle = self.sim.paddle
+
+        # Posición interpolada entre el paso anterior y el actual
+        alpha = self.interpolation
+        prev_x, prev_y = self.prev_ball_pos
+        ball_x = prev_x + (ball.x - prev_x) * alpha
+        ball_y = prev_y + (ball.y - prev_y) * alpha
+        paddle_x = self.prev_paddle_x + (paddle.x - self.prev_paddle_x) * alpha
+
+        # Se reutiliza el par de rectángulos que no es el del fotograma anterior
+        self.rect_index ^= 1
+        ball_rect = self.ball_rects[self.rect_index]
+        paddle_rect = self.paddle_rects[self.rect_index]
+        ball_rect.update(ball_x, ball_y, ball.w, ball.h)
+        paddle_rect.update(paddle_x, paddle.y, paddle.w, paddle.h)
+        return ball_rect, paddle_rect
+
+    def draw_extra_balls(self):
+        rect = self.extra_ball_rect
+        ellipse = pygame.draw.ellipse
+        for x, y in self.extra_ball_positions():
+            rect.x = x
+            rect.y = y
+            ellipse(self.screen, YELLOW, rect)
+
+    def extra_ball_positions(self):
+        # Posiciones interpoladas de todas las bolas a la vez, en los arrays
+        # de dibujo del grupo; .item() lee floats de Python sin escalares de NumPy
+        balls = self.sim.balls
+        draw_x, draw_y = balls.interpolate(self.interpolation)
+        active = balls.active
+        for i in range(balls.capacity):
+            if active.item(i):
+                yield draw_x.item(i), draw_y.item(i)
+
+    def update_hud(self):
+        sim = self.sim
+        values = (sim.score, sim.lives, sim.level)
+        if values == self.hud_values:
+            return False
+
+        self.prev_hud_rects = [rect for _, rect in self.hud_items]
+        score_text = self.text_cache.render(self.font, f"Puntuación: {sim.score}", True, WHITE)
+        lives_text = self.text_cache.render(self.font, f"Vidas: {sim.lives}", True, WHITE)
+        level_text = self.text_cache.render(self.font, f"Nivel: {sim.level}", True, WHITE)
+        self.hud_items = [(score_text, score_text.get_rect(topleft=(10, 10))),
+                          (lives_text, lives_text.get_rect(topleft=(10, 50))),
+                          (level_text, level_text.get_rect(topleft=(10, 90)))]
+        self.hud_values = values
+        return True
+
     def show_points_popup(self, points, x, y):
         # Añadir una animación pequeña para los puntos ganados
         points_text = self.font.render(f"+{points}", True, GREEN)
-        self.screen.blit(points_text, (x - points_text.get_width() // 2, y))
-        pygame.display.update()
-        pygame.time.wait(200)  # Mostrar brevemente
+        self.overlays.add(FloatingText(points_text, x, y))
+
+    def show_multiball_popup(self):
+        paddle = self.sim.paddle
+        # Sin caché: FloatingText la va volviendo transparente
+        multiball_text = self.font.render("¡Multibola!", True, YELLOW)
+        self.overlays.add(FloatingText(multiball_text, paddle.x + paddle.w / 2, paddle.y - 40))
+
+    def get_dim_surface(self):
+        # Velo negro semitransparente de pausa, fin de partida y nivel
+        # completado: se crea una vez en lugar de en cada fotograma
+        if self.dim_surface is None:
+            self.dim_surface = self.display.convert(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+            self.dim_surface.fill(BLACK)
+            self.dim_surface.set_alpha(180)
+        return self.dim_surface
+
+    def show_red_flash(self, duration):
+        if self.flash_surface is None:
+            self.flash_surface = self.display.convert(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+            self.flash_surface.fill(RED)
+        self.overlays.add(ScreenFlash(self.flash_surface, 100, duration))  # Rojo semitransparente
 
     def show_wrong_answer_popup(self, correct_answer):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((255, 0, 0, 100))  # Rojo semitransparente
-        self.screen.blit(overlay, (0, 0))
-
-        wrong_text = self.font.render("¡Respuesta Incorrecta!", True, WHITE)
-        correct_text = self.font.render(f"La respuesta correcta era: {correct_answer}", True, WHITE)
-        continue_text = self.font.render("Continuar...", True, WHITE)
-
-        self.screen.blit(wrong_text, (SCREEN_WIDTH // 2 - wrong_text.get_width() // 2,
-                                      SCREEN_HEIGHT // 2 - 50))
-        self.screen.blit(correct_text, (SCREEN_WIDTH // 2 - correct_text.get_width() // 2,
-                                        SCREEN_HEIGHT // 2))
-        self.screen.blit(continue_text, (SCREEN_WIDTH // 2 - continue_text.get_width() // 2,
-                                         SCREEN_HEIGHT // 2 + 50))
+        self.show_red_flash(2.0)
 
-        pygame.display.flip()
-        pygame.time.wait(2000)  # Esperar 2 segundos
+        wrong_text = self.text_cache.render(self.font, "¡Respuesta Incorrecta!", True, WHITE)
+        correct_text = self.text_cache.render(self.font, f"La respuesta correcta era: {correct_answer}", True, WHITE)
+        continue_text = self.text_cache.render(self.font, "Continuar...", True, WHITE)
 
-    def show_life_lost_popup(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((255, 0, 0, 100))  # Rojo semitransparente
-        self.screen.blit(overlay, (0, 0))
-
-        life_lost_text = self.font.render(f"¡Perdiste una vida! Te quedan {self.lives}", True, WHITE)
-        continue_text = self.font.render("Continuar...", True, WHITE)
+        # La bola espera 2 segundos en el centro mientras se muestra el mensaje
+        self.overlays.add(MessageOverlay([wrong_text, correct_text, continue_text], 2.0, hold=True))
 
-        self.screen.blit(life_lost_text, (SCREEN_WIDTH // 2 - life_lost_text.get_width() // 2,
-                                          SCREEN_HEIGHT // 2 - 25))
-        self.screen.blit(continue_text, (SCREEN_WIDTH // 2 - continue_text.get_width() // 2,
-                                         SCREEN_HEIGHT // 2 + 25))
-
-        pygame.display.flip()
-        pygame.time.wait(2000)  # Esperar 2 segundos
+    def show_life_lost_popup(self):
+        self.show_red_flash(2.0)
+
+        life_lost_text = self.text_cache.render(self.font, f"¡Perdiste una vida! Te quedan {self.sim.lives}", True, WHITE)
+        self.overlays.add(MessageOverlay([life_lost_text], 2.0))
+
+        # Cuenta atrás antes de volver a lanzar la bola
+        digits = [self.text_cache.render(self.title_font, str(i), True, YELLOW) for i in range(3)]
+        self.overlays.add(Countdown(digits, SCREEN_HEIGHT // 2 + 40, 2.0))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Math Breakout Adventure")
+    parser.add_argument('--dirty-rects', action='store_true',
+                        help="Actualizar solo las zonas que cambian en lugar de la pantalla completa (F2 alterna)")
+    parser.add_argument('--player', default=os.environ.get('USER') or os.environ.get('USERNAME') or "Jugador",
+                        help="Nombre del jugador para la tabla de puntuaciones")
+    parser.add_argument('--startup-profile', action='store_true',
+                        help="Mostrar cuánto tarda cada fase del arranque hasta el primer fotograma")
+    parser.add_argument('--max-fps', type=int, default=60,
+                        help="Límite de fotogramas por segundo durante la partida (0 = sin límite). "
+                             "La velocidad del juego no depende de él")
+    parser.add_argument('--vsync', action='store_true',
+                        help="Sincronizar el dibujo con la pantalla en lugar de usar --max-fps")
+    parser.add_argument('--profile-csv', metavar='ARCHIVO',
+                        help="Volcar los tiempos por fase de cada fotograma a un CSV")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="Semilla de la sesión (fondo, problemas y rebotes)")
+    parser.add_argument('--record', metavar='ARCHIVO',
+                        help="Grabar la sesión para reproducirla con replay.py")
+    parser.add_argument('--event-log', metavar='DIRECTORIO',
+                        help="Guardar los eventos de la partida (problemas, respuestas, vidas y niveles) "
+                             "para resumirlos con log_stats.py")
+    parser.add_argument('--autoplay', action='store_true',
+                        help="Juega un jugador simulado (autoplayer.py); sus puntuaciones no se guardan")
+    parser.add_argument('--bot-accuracy', type=float, default=0.9,
+                        help="Con --autoplay, probabilidad de acertar cada problema")
+    parser.add_argument('--bot-answer-time', type=float, default=3.0,
+                        help="Con --autoplay, mediana del tiempo de respuesta en segundos")
+    parser.add_argument('--level-pack', metavar='ARCHIVO',
+                        help="Paquete de niveles creado con level_pack.py; los niveles que no contiene se generan")
+    parser.add_argument('--renderer', choices=RENDERERS, default='surface',
+                        help="surface: blits por software (por defecto); texture: texturas con el Renderer de SDL")
+    parser.add_argument('--render-scale', type=float, default=1.0,
+                        help="Con --renderer texture, resolución interna de la partida respecto a la ventana "
+                             "(p. ej. 0.5); se amplía al presentar")
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    game = MathBreakout()
+    args = parse_args()
+    profile = StartupProfile(args.startup_profile, IMPORT_START)
+    autoplay = None
+    if args.autoplay:
+        autoplay = {"accuracy": args.bot_accuracy, "answer_time": args.bot_answer_time}
+    game = MathBreakout(dirty_rects=args.dirty_rects, player=args.player, profile=profile,
+                        seed=args.seed, record_path=args.record, profile_csv=args.profile_csv,
+                        max_fps=0 if args.vsync else args.max_fps, vsync=args.vsync,
+                        level_pack_path=args.level_pack, renderer=args.renderer,
+                        render_scale=args.render_scale, event_log_dir=args.event_log, autoplay=autoplay)
     game.run()
     pygame.quit()
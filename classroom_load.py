@@ -0,0 +1,274 @@
+import argparse
+import asyncio
+import random
+import time
+
+from autoplayer import BOT_ACCURACY, BotController
+from classroom_server import (PROTOCOL_VERSION, DEFAULT_HOST, DEFAULT_PORT, MSG_JOIN, MSG_INPUT, MSG_ANSWER,
+                              MSG_WELCOME, MSG_LEVEL, MSG_STATE, MSG_CHALLENGE, MSG_RESULT, MSG_LEADERBOARD,
+                              MSG_GAME_OVER, MSG_ERROR, FRAME, WELCOME, LEVEL, STATE, ANSWER, RESULT, LEADERBOARD,
+                              LEADERBOARD_ENTRY, POSITION, PADDLE, SCORE, COUNT, INDEX, FIELD_BALL,
+                              FIELD_PADDLE, FIELD_SCORE, FIELD_LIVES, FIELD_EXTRA_BALLS, FIELD_REMOVED, FIELD_DAMAGED,
+                              DAMAGED, message, read_message)
+from level_pack import BRICK
+from session_log import parse_problem
+from simulation import (SCREEN_HEIGHT, SCREEN_WIDTH, PADDLE_WIDTH, PADDLE_HEIGHT, BALL_RADIUS, STARTING_LIVES,
+                        Rect)
+
+# Los clientes de carga responden más rápido que un alumno para que el
+# servidor pase más tiempo moviendo bolas que esperando respuestas
+LOAD_ANSWER_TIME = 1.0
+# Resultado de cada operador de session_log.OPERATOR_CODES
+OPERATIONS = {1: lambda a, b: a + b, 2: lambda a, b: a - b, 3: lambda a, b: a * b,
+              4: lambda a, b: a // b if b else 0}
+
+
+class RemoteView:
+    # Lo que el cliente sabe de su partida, reconstruido a partir de los
+    # STATE. Tiene los atributos que usa autoplayer.BotController, así que el
+    # mismo jugador simulado sirve contra el servidor; la velocidad de la
+    # bola se estima con dos posiciones seguidas.
+    def __init__(self):
+        self.paddle = Rect(SCREEN_WIDTH // 2 - PADDLE_WIDTH // 2, SCREEN_HEIGHT - 50, PADDLE_WIDTH, PADDLE_HEIGHT)
+        self.ball = Rect(SCREEN_WIDTH // 2 - BALL_RADIUS, SCREEN_HEIGHT // 2 - BALL_RADIUS,
+                         BALL_RADIUS * 2, BALL_RADIUS * 2)
+        self.ball_speed_x = 0.0
+        self.ball_speed_y = -1.0
+        self.level = 1
+        self.score = 0
+        self.lives = STARTING_LIVES
+        self.challenge = None
+        self.bricks = 0
+        # Golpes que le quedan a cada ladrillo, por su índice en LEVEL
+        self.brick_hits = {}
+        self.extra_balls = 0
+        self.tick = None
+
+    def apply_level(self, payload):
+        self.level = LEVEL.unpack_from(payload)[0]
+        self.brick_hits = {index: record[-1]
+                           for index, record in enumerate(BRICK.iter_unpack(payload[LEVEL.size:]))}
+        self.bricks = len(self.brick_hits)
+
+    def apply_state(self, payload):
+        tick, mask = STATE.unpack_from(payload)
+        offset = STATE.size
+        if mask & FIELD_BALL:
+            x, y = POSITION.unpack_from(payload, offset)
+            offset += POSITION.size
+            if self.tick is not None and tick > self.tick:
+                self.ball_speed_x = (x - self.ball.x) / (tick - self.tick)
+                self.ball_speed_y = (y - self.ball.y) / (tick - self.tick) or self.ball_speed_y
+            self.ball.x, self.ball.y = x, y
+        if mask & FIELD_PADDLE:
+            self.paddle.x = PADDLE.unpack_from(payload, offset)[0]
+            offset += PADDLE.size
+        if mask & FIELD_SCORE:
+            self.score = SCORE.unpack_from(payload, offset)[0]
+            offset += SCORE.size
+        if mask & FIELD_LIVES:
+            self.lives = COUNT.unpack_from(payload, offset)[0]
+            offset += COUNT.size
+        if mask & FIELD_EXTRA_BALLS:
+            self.extra_balls = COUNT.unpack_from(payload, offset)[0]
+            offset += COUNT.size + self.extra_balls * POSITION.size
+        if mask & FIELD_REMOVED:
+            removed = COUNT.unpack_from(payload, offset)[0]
+            offset += COUNT.size
+            for _ in range(removed):
+                self.brick_hits.pop(INDEX.unpack_from(payload, offset)[0], None)
+                offset += INDEX.size
+            self.bricks -= removed
+        if mask & FIELD_DAMAGED:
+            damaged = COUNT.unpack_from(payload, offset)[0]
+            offset += COUNT.size
+            for _ in range(damaged):
+                index, hits = DAMAGED.unpack_from(payload, offset)
+                self.brick_hits[index] = hits
+                offset += DAMAGED.size
+        self.tick = tick
+
+
+class LoadClient:
+    # Un alumno simulado: se conecta, juega con BotController y mide cómo
+    # le llegan los ticks del servidor
+    def __init__(self, index, rng, bot_options):
+        self.name = f"Bot {index:03d}"
+        self.bot = BotController(rng, **bot_options)
+        self.view = RemoteView()
+        self.writer = None
+        self.sent_inputs = 0
+        self.session_id = None
+        self.connected = False
+        # Medidas
+        self.first_tick = None
+        self.first_time = None
+        self.last_tick = None
+        self.last_time = None
+        self.intervals = []
+        self.bytes_received = 0
+        self.states = 0
+        self.answers = 0
+        self.correct = 0
+        self.games_over = 0
+        self.leaderboard = []
+        self.sessions = 0
+        self.error = None
+
+    def send(self, kind, payload=b''):
+        if self.connected:
+            self.writer.write(message(kind, payload))
+
+    async def answer_later(self, value, seconds):
+        await asyncio.sleep(seconds)
+        self.send(MSG_ANSWER, ANSWER.pack(value))
+
+    def on_state(self, payload, now):
+        view = self.view
+        view.apply_state(payload)
+        self.states += 1
+        tick = view.tick
+        if self.first_tick is None:
+            self.first_tick, self.first_time = tick, now
+        elif tick == self.last_tick + 1:
+            # Solo los ticks seguidos: durante un desafío no llegan STATE
+            self.intervals.append(now - self.last_time)
+        self.last_tick, self.last_time = tick, now
+
+        if view.challenge is None:
+            inputs = self.bot.inputs(view)
+            if inputs != self.sent_inputs:
+                self.send(MSG_INPUT, bytes((inputs,)))
+                self.sent_inputs = inputs
+
+    def on_challenge(self, problem):
+        operator, a, b = parse_problem(problem)
+        view = self.view
+        view.challenge = (problem, OPERATIONS.get(operator, lambda a, b: 0)(a, b), None)
+        value, seconds = self.bot.answer(view)
+        asyncio.get_running_loop().create_task(self.answer_later(value, seconds))
+
+    def on_leaderboard(self, payload):
+        self.sessions = LEADERBOARD.unpack_from(payload)[0]
+        offset = LEADERBOARD.size
+        entries = []
+        while offset < len(payload):
+            session_id, score, level, lives, accuracy, length = LEADERBOARD_ENTRY.unpack_from(payload, offset)
+            offset += LEADERBOARD_ENTRY.size
+            name = payload[offset:offset + length].decode('utf-8', 'replace')
+            offset += length
+            entries.append((name, score, level, lives, accuracy))
+        self.leaderboard = entries
+
+    async def run(self, host, port, duration):
+        loop = asyncio.get_running_loop()
+        reader, self.writer = await asyncio.open_connection(host, port)
+        self.connected = True
+        self.send(MSG_JOIN, bytes((PROTOCOL_VERSION,)) + self.name.encode('utf-8'))
+        # Al acabar el tiempo se cierra la conexión y la lectura termina
+        stop = loop.call_later(duration, self.writer.close)
+        try:
+            while True:
+                kind, payload = await read_message(reader)
+                now = loop.time()
+                self.bytes_received += FRAME.size + len(payload)
+                if kind == MSG_STATE:
+                    self.on_state(payload, now)
+                elif kind == MSG_CHALLENGE:
+                    self.on_challenge(payload.decode('utf-8'))
+                elif kind == MSG_RESULT:
+                    correct = RESULT.unpack(payload)[0]
+                    self.view.challenge = None
+                    self.answers += 1
+                    self.correct += correct
+                elif kind == MSG_LEVEL:
+                    self.view.apply_level(payload)
+                elif kind == MSG_LEADERBOARD:
+                    self.on_leaderboard(payload)
+                elif kind == MSG_WELCOME:
+                    self.session_id = WELCOME.unpack(payload)[0]
+                elif kind == MSG_GAME_OVER:
+                    self.games_over += 1
+                    break
+                elif kind == MSG_ERROR:
+                    self.error = payload.decode('utf-8', 'replace')
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            stop.cancel()
+            self.connected = False
+            self.writer.close()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0.0
+
+
+async def run_load(clients, host, port, duration, seed, bot_options, ramp):
+    rng = random.Random(seed)
+    load = [LoadClient(i + 1, random.Random(rng.random()), bot_options) for i in range(clients)]
+    tasks = []
+    for client in load:
+        tasks.append(asyncio.create_task(client.run(host, port, duration)))
+        # Conexiones escalonadas, como alumnos que entran en clase
+        await asyncio.sleep(ramp / max(1, clients))
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    failed = [result for result in results if isinstance(result, Exception)]
+    return load, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para classroom_server.py")
+    parser.add_argument('--clients', type=int, default=40, help="Alumnos simulados conectados a la vez")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--duration', type=float, default=30.0, help="Segundos que juega cada cliente")
+    parser.add_argument('--ramp', type=float, default=1.0, help="Segundos en los que se conectan todos")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--accuracy', type=float, default=BOT_ACCURACY)
+    parser.add_argument('--answer-time', type=float, default=LOAD_ANSWER_TIME)
+    args = parser.parse_args()
+
+    bot_options = {"accuracy": args.accuracy, "answer_time": args.answer_time}
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    load, failed = asyncio.run(run_load(args.clients, args.host, args.port, args.duration, args.seed,
+                                        bot_options, args.ramp))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    if failed:
+        print(f"{len(failed)} clientes no pudieron conectarse: {failed[0]!r}")
+    measured = [client for client in load if client.last_time is not None and client.last_time > client.first_time]
+    if not measured:
+        print("Ningún cliente recibió estado del servidor")
+        return
+    rates = [(c.last_tick - c.first_tick) / (c.last_time - c.first_time) for c in measured]
+    intervals = [interval for client in measured for interval in client.intervals]
+    seconds = sum(c.last_time - c.first_time for c in measured)
+    answers = sum(c.answers for c in load)
+    correct = sum(c.correct for c in load)
+
+    print(f"{len(measured)} clientes con estado durante {args.duration:.0f}s")
+    print(f"Ticks del servidor vistos por cliente: media {sum(rates) / len(rates):.1f}/s  "
+          f"mínimo {min(rates):.1f}/s")
+    print(f"Intervalo entre ticks seguidos: p50 {percentile(intervals, 0.5) * 1000:.1f} ms  "
+          f"p99 {percentile(intervals, 0.99) * 1000:.1f} ms  máximo {max(intervals, default=0) * 1000:.1f} ms")
+    print(f"Recibido por cliente: {sum(c.bytes_received for c in measured) / seconds:.0f} B/s  "
+          f"({sum(c.states for c in measured) / seconds:.1f} STATE/s)")
+    print(f"Respuestas: {answers} ({correct / max(1, answers):.0%} aciertos)  "
+          f"partidas terminadas: {sum(c.games_over for c in load)}")
+    errors = [c.error for c in load if c.error]
+    if errors:
+        print(f"Errores del servidor: {errors[0]} ({len(errors)} clientes)")
+    leaderboard = max(load, key=lambda c: len(c.leaderboard)).leaderboard
+    if leaderboard:
+        print("Clasificación recibida: " + "   ".join(
+            f"{i}. {name} {score} (nivel {level})" for i, (name, score, level, _, _) in enumerate(leaderboard[:3], 1)))
+    print(f"CPU del generador de carga: {cpu / elapsed:.0%} de un núcleo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+import argparse
+import asyncio
+import random
+import struct
+import time
+
+import numpy as np
+
+from level_pack import BRICK
+from problem_bank import ProblemBank
+from simulation import (FRAME_DT, PHYSICS_FPS, INPUT_LEFT, INPUT_RIGHT, EVENT_CORRECT_ANSWER,
+                        EVENT_BRICK_DAMAGED, GameSimulation, session_rng)
+
+# Protocolo del servidor de clase (TCP, little endian). Cada mensaje lleva una
+# cabecera con la longitud de los datos (uint16) y el tipo (uint8).
+#   Cliente -> servidor:
+#     JOIN: versión del protocolo (uint8) y nombre del jugador (UTF-8)
+#     INPUT: teclas pulsadas (uint8, INPUT_LEFT | INPUT_RIGHT)
+#     ANSWER: respuesta al desafío pendiente (int64)
+#   Servidor -> cliente:
+#     WELCOME: sesión (uint32) y ticks por segundo (uint16)
+#     LEVEL: nivel (uint16) y sus ladrillos con el formato de level_pack.BRICK;
+#            el índice de cada ladrillo es su posición en esta lista
+#     STATE: tick (uint32), máscara de campos (uint8) y solo los campos que
+#            han cambiado desde el último STATE (ver FIELD_*)
+#     CHALLENGE: texto del problema (UTF-8)
+#     RESULT: acierto (uint8), puntos (int32) y respuesta correcta (int64)
+#     LEADERBOARD: sesiones (uint16) y las mejores, cada una con sesión
+#                  (uint32), puntuación (int32), nivel (uint16), vidas y
+#                  porcentaje de aciertos (2 × uint8) y nombre (uint8 + UTF-8)
+#     GAME_OVER: puntuación (int32) y nivel (uint16)
+#     ERROR: motivo (UTF-8); el servidor cierra la conexión
+PROTOCOL_VERSION = 2
+FRAME = struct.Struct('<HB')
+
+MSG_JOIN = 1
+MSG_INPUT = 2
+MSG_ANSWER = 3
+MSG_WELCOME = 10
+MSG_LEVEL = 11
+MSG_STATE = 12
+MSG_CHALLENGE = 13
+MSG_RESULT = 14
+MSG_LEADERBOARD = 15
+MSG_GAME_OVER = 16
+MSG_ERROR = 17
+
+WELCOME = struct.Struct('<IH')
+LEVEL = struct.Struct('<H')
+STATE = struct.Struct('<IB')
+ANSWER = struct.Struct('<q')
+RESULT = struct.Struct('<Biq')
+LEADERBOARD = struct.Struct('<H')
+LEADERBOARD_ENTRY = struct.Struct('<IiHBBB')
+GAME_OVER = struct.Struct('<iH')
+
+# Campos de STATE, en este orden tras la cabecera. Las posiciones se envían en
+# píxeles enteros: bastan para dibujar y ocupan la mitad que un float.
+FIELD_BALL = 1  # x, y (2 × int16)
+FIELD_PADDLE = 2  # x (int16)
+FIELD_SCORE = 4  # int32
+FIELD_LIVES = 8  # uint8
+FIELD_EXTRA_BALLS = 16  # número (uint8) y x, y de cada una (2 × int16)
+FIELD_REMOVED = 32  # número (uint8) e índice de cada ladrillo roto (uint16)
+FIELD_DAMAGED = 64  # número (uint8) e índice (uint16) y golpes restantes (uint8) de cada ladrillo dañado
+POSITION = struct.Struct('<hh')
+PADDLE = struct.Struct('<h')
+SCORE = struct.Struct('<i')
+COUNT = struct.Struct('<B')
+INDEX = struct.Struct('<H')
+DAMAGED = struct.Struct('<HB')
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# La clasificación se reparte dos veces por segundo
+LEADERBOARD_TICKS = PHYSICS_FPS // 2
+LEADERBOARD_SIZE = 10
+STATS_SECONDS = 5
+MAX_NAME_BYTES = 32
+# Mensajes de cliente más largos se consideran un error de protocolo
+MAX_CLIENT_MESSAGE = 64
+# Un cliente que no lee lo que se le envía se desconecta al acumular esto
+MAX_CLIENT_BUFFER = 256 * 1024
+# Si el servidor se retrasa más de estos ticks, se descartan en vez de
+# recuperarlos de golpe
+MAX_LAG_TICKS = 5
+ANONYMOUS_PLAYER = "Anónimo"
+
+
+def message(kind, payload=b''):
+    return FRAME.pack(len(payload), kind) + payload
+
+
+async def read_message(reader, max_length=None):
+    # (tipo, datos) del siguiente mensaje; IncompleteReadError al cerrarse
+    length, kind = FRAME.unpack(await reader.readexactly(FRAME.size))
+    if max_length is not None and length > max_length:
+        raise ValueError(f"mensaje demasiado largo ({length} bytes)")
+    payload = await reader.readexactly(length) if length else b''
+    return kind, payload
+
+
+class ClassroomSession:
+    # Una partida autoritativa: la simulación vive en el servidor y el
+    # cliente solo envía teclas y respuestas. El tiempo de respuesta lo mide
+    # el servidor, desde que envía el desafío hasta que llega la respuesta.
+    def __init__(self, session_id, name, writer, seed, problems, logger=None):
+        self.session_id = session_id
+        self.name = name
+        self.writer = writer
+        self.transport = writer.transport
+        self.logger = logger
+        self.sim = GameSimulation(rng=session_rng(seed, f'simulacion:{session_id}'), problems=problems)
+        if logger is not None:
+            logger.attach(self.sim.bus)
+        self.inputs = 0
+        self.answers = 0
+        self.correct = 0
+        self.challenge_time = None
+        self.finished = False
+        self.connected = True
+        # Ladrillos rotos pendientes de enviar, como índices de la lista de LEVEL,
+        # y ladrillos de varios golpes dañados (sus golpes se leen al enviar)
+        self.removed = []
+        self.damaged = []
+        self.brick_index = {}
+        # Últimos valores enviados, para mandar solo lo que cambia
+        self.sent_ball = None
+        self.sent_paddle = None
+        self.sent_score = None
+        self.sent_lives = None
+        self.sent_extra = 0
+        self.pending = bytearray(message(MSG_WELCOME, WELCOME.pack(session_id, PHYSICS_FPS)))
+        self.queue_level()
+
+    @property
+    def accuracy(self):
+        return self.correct * 100 // self.answers if self.answers else 0
+
+    def queue_level(self):
+        sim = self.sim
+        payload = bytearray(LEVEL.pack(sim.level))
+        self.brick_index = {}
+        for index, brick_data in enumerate(sim.bricks):
+            rect, (r, g, b) = brick_data
+            payload += BRICK.pack(int(rect.x), int(rect.y), int(rect.w), int(rect.h), r, g, b,
+                                  sim.brick_hits.get(brick_data, 1))
+            self.brick_index[brick_data] = index
+        self.pending += message(MSG_LEVEL, bytes(payload))
+        # El cliente empieza el nivel sin estado previo
+        self.removed.clear()
+        self.damaged.clear()
+        self.sent_ball = self.sent_paddle = self.sent_score = self.sent_lives = None
+        self.sent_extra = 0
+
+    def send(self):
+        # Entregar lo acumulado al socket sin esperar: write() no bloquea y
+        # el transporte guarda lo que no quepa
+        if self.pending and self.connected:
+            if self.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                self.close()
+                return
+            self.writer.write(bytes(self.pending))
+        self.pending.clear()
+
+    def close(self):
+        if self.connected:
+            self.connected = False
+            self.transport.abort()
+
+    def advance(self, tick, now):
+        # Un paso de física con las últimas teclas recibidas
+        sim = self.sim
+        if self.finished or sim.challenge is not None:
+            return
+        sim.step(self.inputs, FRAME_DT)
+        brick_index = self.brick_index
+        for brick_data in sim.broken:
+            self.removed.append(brick_index[brick_data])
+        self.damaged.extend(sim.damaged)
+        if sim.balls is not None:
+            for brick_data in sim.balls.broken:
+                self.removed.append(brick_index[brick_data])
+            self.damaged.extend(sim.balls.damaged)
+        self.queue_state(tick)
+
+        if sim.challenge is not None:
+            self.challenge_time = now
+            self.pending += message(MSG_CHALLENGE, sim.challenge[0].encode('utf-8'))
+        elif sim.game_over:
+            self.finish()
+        elif sim.level_complete:
+            sim.next_level()
+            self.queue_level()
+
+    def answer(self, value, now, tick):
+        sim = self.sim
+        if self.finished or sim.challenge is None:
+            return
+        correct_answer = sim.challenge[1]
+        brick_data = sim.challenge[2]
+        events = sim.answer(value, now - self.challenge_time)
+        self.challenge_time = None
+        self.answers += 1
+        correct = EVENT_CORRECT_ANSWER in events
+        if correct:
+            self.correct += 1
+            if EVENT_BRICK_DAMAGED in events:
+                self.damaged.append(brick_data)
+            else:
+                self.removed.append(self.brick_index[brick_data])
+        self.pending += message(MSG_RESULT, RESULT.pack(correct, sim.last_points, correct_answer))
+        self.queue_state(tick)
+        if sim.game_over:
+            self.finish()
+        elif sim.level_complete:
+            sim.next_level()
+            self.queue_level()
+
+    def finish(self):
+        self.finished = True
+        self.pending += message(MSG_GAME_OVER, GAME_OVER.pack(self.sim.score, self.sim.level))
+        if self.logger is not None:
+            self.logger.flush()
+
+    def queue_state(self, tick):
+        sim = self.sim
+        mask = 0
+        fields = bytearray()
+
+        ball = (int(sim.ball.x), int(sim.ball.y))
+        if ball != self.sent_ball:
+            mask |= FIELD_BALL
+            fields += POSITION.pack(*ball)
+            self.sent_ball = ball
+        paddle = int(sim.paddle.x)
+        if paddle != self.sent_paddle:
+            mask |= FIELD_PADDLE
+            fields += PADDLE.pack(paddle)
+            self.sent_paddle = paddle
+        if sim.score != self.sent_score:
+            mask |= FIELD_SCORE
+            fields += SCORE.pack(sim.score)
+            self.sent_score = sim.score
+        lives = max(0, sim.lives)
+        if lives != self.sent_lives:
+            mask |= FIELD_LIVES
+            fields += COUNT.pack(lives)
+            self.sent_lives = lives
+        balls = sim.balls
+        extra = balls.count if balls is not None else 0
+        if extra or self.sent_extra:
+            # Las bolas extra se mueven en cada paso: se envían mientras haya
+            # y una vez más con 0 al desaparecer
+            mask |= FIELD_EXTRA_BALLS
+            fields += COUNT.pack(extra)
+            if extra:
+                # Todas a la vez: int16 truncado, como int() en la bola principal
+                active = balls.active
+                fields += np.column_stack((balls.x[active], balls.y[active])).astype('<i2').tobytes()
+            self.sent_extra = extra
+        if self.removed:
+            mask |= FIELD_REMOVED
+            fields += COUNT.pack(len(self.removed))
+            for index in self.removed:
+                fields += INDEX.pack(index)
+            self.removed.clear()
+        if self.damaged:
+            # Los que se han roto después de dañarse ya van en FIELD_REMOVED
+            hits = sim.brick_hits
+            damaged = [(self.brick_index[brick_data], hits[brick_data])
+                       for brick_data in dict.fromkeys(self.damaged) if brick_data in hits]
+            self.damaged.clear()
+            if damaged:
+                mask |= FIELD_DAMAGED
+                fields += COUNT.pack(len(damaged))
+                for index, remaining in damaged:
+                    fields += DAMAGED.pack(index, remaining)
+
+        if mask:
+            self.pending += message(MSG_STATE, STATE.pack(tick, mask) + bytes(fields))
+
+
+class ClassroomServer:
+    # Servidor asyncio de un solo hilo: todas las sesiones avanzan juntas en
+    # un tick común de 60 Hz, y los mensajes de cada tick se escriben en los
+    # sockets sin esperar a los clientes. Las sesiones terminadas o
+    # desconectadas siguen en la clasificación hasta que se para el servidor.
+    def __init__(self, seed=None, event_log_dir=None, quiet=False):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.problems = ProblemBank(self.seed)
+        self.event_log_dir = event_log_dir
+        self.quiet = quiet
+        self.sessions = {}
+        self.next_session_id = 1
+        self.tick = 0
+        # Estadísticas del tick en la ventana actual
+        self.tick_times = []
+        self.late_ticks = 0
+
+    def add_session(self, name, writer):
+        logger = None
+        if self.event_log_dir is not None:
+            from session_log import SessionLogger
+            logger = SessionLogger(self.event_log_dir, name, f"{self.seed}:{self.next_session_id}")
+        session = ClassroomSession(self.next_session_id, name, writer, self.seed, self.problems, logger)
+        self.sessions[session.session_id] = session
+        self.next_session_id += 1
+        session.send()
+        return session
+
+    async def handle_client(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        session = None
+        try:
+            kind, payload = await read_message(reader, MAX_CLIENT_MESSAGE)
+            if kind != MSG_JOIN or not payload or payload[0] != PROTOCOL_VERSION:
+                writer.write(message(MSG_ERROR, "Versión del protocolo no compatible".encode('utf-8')))
+                await writer.drain()
+                return
+            name = payload[1:MAX_NAME_BYTES + 1].decode('utf-8', 'ignore').strip() or ANONYMOUS_PLAYER
+            session = self.add_session(name, writer)
+
+            while session.connected:
+                kind, payload = await read_message(reader, MAX_CLIENT_MESSAGE)
+                if kind == MSG_INPUT and payload:
+                    session.inputs = payload[0] & (INPUT_LEFT | INPUT_RIGHT)
+                elif kind == MSG_ANSWER and len(payload) == ANSWER.size:
+                    session.answer(ANSWER.unpack(payload)[0], loop.time(), self.tick)
+                    session.send()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            if session is not None:
+                session.connected = False
+                if session.logger is not None:
+                    session.logger.close()
+            writer.close()
+
+    def leaderboard_message(self):
+        ranking = sorted(self.sessions.values(), key=lambda s: (-s.sim.score, s.session_id))
+        payload = bytearray(LEADERBOARD.pack(len(ranking)))
+        for session in ranking[:LEADERBOARD_SIZE]:
+            name = session.name.encode('utf-8')
+            payload += LEADERBOARD_ENTRY.pack(session.session_id, session.sim.score, session.sim.level,
+                                              max(0, session.sim.lives), session.accuracy, len(name))
+            payload += name
+        return message(MSG_LEADERBOARD, bytes(payload)), ranking
+
+    def run_tick(self, now):
+        self.tick += 1
+        tick = self.tick
+        leaderboard = None
+        if tick % LEADERBOARD_TICKS == 0:
+            leaderboard = self.leaderboard_message()[0]
+        for session in self.sessions.values():
+            if not session.connected:
+                continue
+            session.advance(tick, now)
+            if leaderboard is not None:
+                session.pending += leaderboard
+            session.send()
+
+    def print_stats(self, window):
+        times = sorted(self.tick_times)
+        self.tick_times = []
+        if not times:
+            return
+        connected = sum(1 for session in self.sessions.values() if session.connected)
+        mean = sum(times) / len(times)
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+        print(f"{connected} sesiones conectadas ({len(self.sessions)} en total)  "
+              f"{len(times) / window:.1f} ticks/s  tick medio {mean * 1000:.2f} ms  "
+              f"p99 {p99 * 1000:.2f} ms  carga {sum(times) / window:.0%}  "
+              f"ticks descartados {self.late_ticks}", flush=True)
+        ranking = self.leaderboard_message()[1][:3]
+        if ranking:
+            print("  " + "   ".join(f"{i}. {s.name} {s.sim.score} (nivel {s.sim.level})"
+                                    for i, s in enumerate(ranking, 1)), flush=True)
+
+    async def tick_loop(self, duration=None):
+        # Los ticks se programan sobre un reloj fijo para que el retraso de
+        # uno no desplace a los siguientes
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        next_tick = start
+        next_stats = start + STATS_SECONDS
+        while duration is None or loop.time() - start < duration:
+            now = loop.time()
+            if now - next_tick > MAX_LAG_TICKS * FRAME_DT:
+                self.late_ticks += int((now - next_tick) / FRAME_DT)
+                next_tick = now
+            begin = time.perf_counter()
+            self.run_tick(now)
+            self.tick_times.append(time.perf_counter() - begin)
+
+            if not self.quiet and now >= next_stats:
+                self.print_stats(STATS_SECONDS)
+                next_stats += STATS_SECONDS
+            next_tick += FRAME_DT
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    async def serve(self, host, port, duration=None):
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Servidor de clase en {host}:{port} (semilla {self.seed}, {PHYSICS_FPS} ticks/s)", flush=True)
+        try:
+            async with server:
+                await self.tick_loop(duration)
+        finally:
+            for session in self.sessions.values():
+                session.close()
+                if session.logger is not None:
+                    session.logger.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Servidor de clase: muchas partidas sin ventana con una clasificación común")
+    parser.add_argument('--host', default=DEFAULT_HOST,
+                        help="Dirección de escucha (por defecto solo este equipo)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--seed', type=int, default=None, help="Semilla de las partidas y del banco de problemas")
+    parser.add_argument('--duration', type=float, default=None, help="Parar tras estos segundos")
+    parser.add_argument('--event-log', metavar='DIRECTORIO', default=None,
+                        help="Guardar los eventos de cada sesión (ver log_stats.py)")
+    parser.add_argument('--quiet', action='store_true', help="No mostrar estadísticas periódicas")
+    args = parser.parse_args()
+
+    server = ClassroomServer(args.seed, args.event_log, args.quiet)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.duration))
+    except KeyboardInterrupt:
+        pass
+    _, ranking = server.leaderboard_message()
+    if ranking:
+        print("\nClasificación final:")
+        for position, session in enumerate(ranking[:LEADERBOARD_SIZE], 1):
+            print(f"{position:>3}. {session.name:<24} {session.sim.score:>7}  nivel {session.sim.level}  "
+                  f"aciertos {session.accuracy}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+from collections import OrderedDict
+
+import pygame
+
+from simulation import SCREEN_WIDTH, SCREEN_HEIGHT
+
+RENDERERS = ('surface', 'texture')
+# Texturas de superficies (texto, mensajes) que se conservan a la vez
+TEXTURE_CACHE_SIZE = 256
+# Resolución interna mínima respecto a la ventana
+MIN_RENDER_SCALE = 0.25
+
+
+class SurfaceDisplay:
+    # Pantalla de siempre: todo se dibuja con blits sobre la superficie de la
+    # ventana y se envía entera (flip) o por zonas (update)
+    textures = False
+
+    def __init__(self, vsync=False):
+        self.screen = None
+        if vsync:
+            try:
+                # La sincronización vertical requiere una ventana SCALED u OpenGL
+                self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SCALED, vsync=1)
+            except pygame.error as e:
+                print(f"Sincronización vertical no disponible: {e}")
+        if self.screen is None:
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.display.set_caption("Math Breakout Adventure")
+
+    def convert(self, surface):
+        return surface.convert()
+
+    def flip(self):
+        pygame.display.flip()
+
+    def update(self, rects):
+        pygame.display.update(rects)
+
+
+class TextureDisplay:
+    # Ventana con pygame._sdl2.video.Renderer. La partida se compone con
+    # texturas (fondo, capa de ladrillos, texto, mensajes) que se suben una
+    # vez y SDL pega en cada fotograma; sin GPU se usa su renderizador por
+    # software. Las demás pantallas se dibujan en una superficie en memoria
+    # que se sube entera al presentarla.
+    #
+    # Con scale < 1 la partida se compone en una textura de menor resolución
+    # interna que se amplía a la ventana al final. Las coordenadas siguen
+    # siendo las del juego: el Renderer las escala, y las texturas se suben
+    # ya reducidas para que cada pegado sea 1:1.
+    textures = True
+
+    def __init__(self, scale=1.0, vsync=False):
+        from pygame._sdl2.video import Renderer, Texture, Window
+
+        self.texture_class = Texture
+        self.window = Window("Math Breakout Adventure", size=(SCREEN_WIDTH, SCREEN_HEIGHT))
+        # accelerated=-1: con GPU si la hay y, si no, por software
+        self.renderer = Renderer(self.window, accelerated=-1, vsync=vsync, target_texture=True)
+        self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        self.screen_texture = None
+
+        self.scale = min(1.0, max(MIN_RENDER_SCALE, scale))
+        self.internal_size = (max(1, round(SCREEN_WIDTH * self.scale)), max(1, round(SCREEN_HEIGHT * self.scale)))
+        self.target = None
+        if self.scale < 1.0:
+            self.target = Texture(self.renderer, self.internal_size, target=True)
+
+        # id(superficie) -> (superficie, textura); se guarda la superficie
+        # para que su id no pueda reutilizarse mientras la textura exista
+        self.cache = OrderedDict()
+        self.clear_color = pygame.Color(0, 0, 0)
+        self.rect = pygame.Rect(0, 0, 0, 0)
+
+    def convert(self, surface):
+        # Sin set_mode no hay formato de pantalla; SDL convierte al subir la textura
+        return surface
+
+    def flip(self):
+        # Pantallas fuera de la partida: se sube la superficie completa
+        if self.screen_texture is None:
+            self.screen_texture = self.texture_class(self.renderer, (SCREEN_WIDTH, SCREEN_HEIGHT), streaming=True)
+        self.screen_texture.update(self.screen)
+        renderer = self.renderer
+        renderer.target = None
+        renderer.scale = (1.0, 1.0)
+        self.screen_texture.draw()
+        renderer.present()
+
+    def update(self, rects):
+        self.flip()
+
+    def begin_frame(self):
+        renderer = self.renderer
+        renderer.target = self.target
+        # El objetivo de dibujo cambia la escala: se fija después
+        renderer.scale = (self.scale, self.scale)
+        renderer.draw_color = self.clear_color
+        renderer.clear()
+
+    def end_frame(self):
+        renderer = self.renderer
+        if self.target is not None:
+            renderer.target = None
+            renderer.scale = (1.0, 1.0)
+            self.target.draw()
+        renderer.present()
+
+    def _texture(self, surface, changed):
+        key = id(surface)
+        entry = self.cache.get(key)
+        if entry is not None and not changed:
+            self.cache.move_to_end(key)
+            return entry[1]
+
+        upload = surface
+        if self.scale < 1.0:
+            size = (max(1, round(surface.get_width() * self.scale)),
+                    max(1, round(surface.get_height() * self.scale)))
+            if surface.get_colorkey() is not None or surface.get_bitsize() < 24:
+                # La transparencia por color clave no admite suavizado
+                upload = pygame.transform.scale(surface, size)
+            else:
+                upload = pygame.transform.smoothscale(surface, size)
+        texture = self.texture_class.from_surface(self.renderer, upload)
+        self.cache[key] = (surface, texture)
+        self.cache.move_to_end(key)
+        if len(self.cache) > TEXTURE_CACHE_SIZE:
+            self.cache.popitem(last=False)
+        return texture
+
+    def blit(self, surface, dest, changed=False):
+        # Mismo uso que Surface.blit, para que las superposiciones dibujen
+        # igual en los dos modos. changed vuelve a subir la superficie.
+        texture = self._texture(surface, changed)
+        alpha = surface.get_alpha()
+        texture.alpha = 255 if alpha is None else alpha
+        rect = self.rect
+        rect.update(dest[0], dest[1], surface.get_width(), surface.get_height())
+        texture.draw(dstrect=rect)
+
+    def fill(self, color, rect):
+        # Los colores del juego son RGB y el Renderer espera RGBA
+        self.renderer.draw_color = pygame.Color(color)
+        self.renderer.fill_rect(rect)
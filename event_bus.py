@@ -0,0 +1,34 @@
+from collections import namedtuple
+
+# Eventos de partida con tipo propio, publicados por GameSimulation. frame es
+# el paso de física en que ocurren; problem, el texto del desafío ("12 + 5 = ?")
+BrickHit = namedtuple('BrickHit', 'frame level lives problem')
+# seconds: tiempo de respuesta; points: 0 si la respuesta es incorrecta
+Answer = namedtuple('Answer', 'frame level problem correct seconds points')
+# wrong_answer distingue la vida perdida por fallar de la bola que cae
+LifeLost = namedtuple('LifeLost', 'frame level lives wrong_answer')
+# seconds: duración del nivel (física más tiempo respondiendo)
+LevelComplete = namedtuple('LevelComplete', 'frame level seconds score')
+
+EVENT_TYPES = (BrickHit, Answer, LifeLost, LevelComplete)
+
+
+class EventBus:
+    # Reparto de eventos a los suscriptores de cada tipo. Quien publica
+    # comprueba active antes de construir el evento: sin suscriptores, cada
+    # punto de publicación cuesta solo leer un booleano.
+    def __init__(self):
+        self.handlers = {event_type: [] for event_type in EVENT_TYPES}
+        self.active = False
+
+    def subscribe(self, event_type, handler):
+        self.handlers[event_type].append(handler)
+        self.active = True
+
+    def unsubscribe(self, event_type, handler):
+        self.handlers[event_type].remove(handler)
+        self.active = any(self.handlers.values())
+
+    def publish(self, event):
+        for handler in self.handlers[type(event)]:
+            handler(event)
@@ -0,0 +1,118 @@
+import csv
+import time
+from collections import deque
+
+# Fases de un fotograma del bucle de juego
+PHASE_EVENTS = 0
+PHASE_INPUT = 1
+PHASE_MOVEMENT = 2
+PHASE_WALLS = 3
+PHASE_PADDLE = 4
+PHASE_BRICKS = 5
+PHASE_DRAW = 6
+PHASE_FLIP = 7
+PHASE_NAMES = ['eventos', 'entrada', 'movimiento', 'paredes', 'paleta', 'ladrillos', 'dibujo', 'flip']
+
+# Posiciones en GameSimulation.timings (segundos acumulados en el paso)
+SIM_WALLS = 0
+SIM_PADDLE = 1
+SIM_BRICKS = 2
+
+HISTORY = 240
+# Peso de cada fotograma en las medias móviles
+SMOOTHING = 0.05
+
+
+class FrameProfiler:
+    # Tiempos por fase de cada fotograma. Desactivado, cada llamada solo
+    # comprueba un booleano; se activa al mostrar el panel (F3) o al volcar
+    # las muestras a CSV.
+    def __init__(self, csv_path=None, history=HISTORY):
+        self.show_overlay = False
+        self.csv_file = None
+        self.csv_writer = None
+        if csv_path is not None:
+            self.csv_file = open(csv_path, 'w', newline='')
+            self.csv_writer = csv.writer(self.csv_file)
+            self.csv_writer.writerow(['fotograma', 'intervalo_ms'] + [f"{name}_ms" for name in PHASE_NAMES] +
+                                     ['bloqueos_ms', 'fps'])
+        self.enabled = self.csv_writer is not None
+
+        self.current = [0.0] * len(PHASE_NAMES)
+        # La simulación acumula aquí sus colisiones (GameSimulation.timings)
+        self.sim_timings = [0.0, 0.0, 0.0]
+        self.averages = [0.0] * len(PHASE_NAMES)
+        self.blocked = 0.0
+        self.blocked_average = 0.0
+        self.intervals = deque(maxlen=history)
+        self.fps = 0.0
+        self.frame = 0
+        self.frame_start = None
+        self.last = 0.0
+
+    def toggle_overlay(self):
+        self.show_overlay = not self.show_overlay
+        self.enabled = self.show_overlay or self.csv_writer is not None
+        self.frame_start = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self.frame_start is not None:
+            # Intervalo real entre fotogramas, incluida la espera de clock.tick
+            self.intervals.append(now - self.frame_start)
+        self.frame_start = self.last = now
+        current = self.current
+        for i in range(len(current)):
+            current[i] = 0.0
+        sim_timings = self.sim_timings
+        sim_timings[SIM_WALLS] = sim_timings[SIM_PADDLE] = sim_timings[SIM_BRICKS] = 0.0
+        self.blocked = 0.0
+
+    def mark(self, phase):
+        # Atribuye a la fase el tiempo transcurrido desde la marca anterior
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[phase] += now - self.last
+        self.last = now
+
+    def add_blocked(self, start):
+        # Tiempo dentro de una pantalla bloqueante (fin de partida, nivel completado)
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.blocked += now - start
+        self.last = now
+
+    def end_frame(self, fps):
+        if not self.enabled or self.frame_start is None:
+            return
+        current = self.current
+        sim_timings = self.sim_timings
+        # Las colisiones se miden dentro del paso de la simulación
+        current[PHASE_WALLS] = sim_timings[SIM_WALLS]
+        current[PHASE_PADDLE] = sim_timings[SIM_PADDLE]
+        current[PHASE_BRICKS] = sim_timings[SIM_BRICKS]
+        current[PHASE_MOVEMENT] = max(0.0, current[PHASE_MOVEMENT] - sum(sim_timings))
+
+        averages = self.averages
+        for i, value in enumerate(current):
+            averages[i] += (value - averages[i]) * SMOOTHING
+        self.blocked_average += (self.blocked - self.blocked_average) * SMOOTHING
+        self.fps = fps
+        self.frame += 1
+
+        if self.csv_writer is not None:
+            interval = self.intervals[-1] if self.intervals else 0.0
+            self.csv_writer.writerow([self.frame, f"{interval * 1000:.3f}"] +
+                                     [f"{value * 1000:.3f}" for value in current] +
+                                     [f"{self.blocked * 1000:.3f}", f"{fps:.1f}"])
+
+    def close(self):
+        if self.csv_file is not None:
+            self.csv_file.close()
+            self.csv_file = None
+            self.csv_writer = None
+            self.enabled = self.show_overlay
@@ -0,0 +1,171 @@
+import os
+import queue
+import sqlite3
+import threading
+from datetime import datetime
+
+from score_store import HighScoreStore
+
+ANONYMOUS_PLAYER = "Anónimo"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER NOT NULL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_scores_score ON scores (score DESC);
+CREATE INDEX IF NOT EXISTS idx_scores_level ON scores (level, score DESC);
+CREATE INDEX IF NOT EXISTS idx_scores_player ON scores (player, score DESC);
+CREATE INDEX IF NOT EXISTS idx_scores_date ON scores (date);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_STOP = object()
+
+
+def to_iso_date(date):
+    # Las puntuaciones antiguas guardan la fecha como dd/mm/aaaa
+    try:
+        return datetime.strptime(date, "%d/%m/%Y").strftime("%Y-%m-%d")
+    except ValueError:
+        return date
+
+
+def to_display_date(date):
+    try:
+        return datetime.strptime(date, "%Y-%m-%d").strftime("%d/%m/%Y")
+    except ValueError:
+        return date
+
+
+class Leaderboard:
+    # Tabla de clasificación con varios jugadores sobre sqlite3, con índices
+    # por puntuación, nivel, jugador y fecha. Las lecturas usan la conexión
+    # del hilo principal; las inserciones se hacen en un hilo escritor con su
+    # propia conexión para no bloquear el juego.
+    def __init__(self, path='high_scores.db', legacy_path='high_scores.json'):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.connection = self._connect()
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.queue = queue.Queue()
+        self.thread = None
+        self.migrate_legacy()
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path)
+        connection.row_factory = sqlite3.Row
+        if self.path != ':memory:':
+            # WAL permite leer mientras el hilo escritor inserta
+            connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def migrate_legacy(self):
+        # Importar una sola vez las puntuaciones de high_scores.json
+        row = self.connection.execute("SELECT value FROM meta WHERE key = 'legacy_migrated'").fetchone()
+        if row is not None or not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+
+        entries = HighScoreStore(self.legacy_path).load()
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO scores (player, score, level, date) VALUES (?, ?, ?, ?)",
+                [(entry.get("player", ANONYMOUS_PLAYER), entry["score"], entry["level"],
+                  to_iso_date(entry["date"])) for entry in entries])
+            self.connection.execute("INSERT INTO meta (key, value) VALUES ('legacy_migrated', ?)",
+                                    (self.legacy_path,))
+
+    def add(self, player, score, level, date=None):
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        if self.path == ':memory:':
+            # Una base en memoria no se comparte entre conexiones
+            with self.connection:
+                self._insert(self.connection, [(player, score, level, date)])
+            return
+
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._writer, daemon=True)
+            self.thread.start()
+        self.queue.put((player, score, level, date))
+
+    def _insert(self, connection, rows):
+        connection.executemany("INSERT INTO scores (player, score, level, date) VALUES (?, ?, ?, ?)", rows)
+
+    def _writer(self):
+        connection = self._connect()
+        while True:
+            item = self.queue.get()
+            rows = []
+            received = 0
+            stop = False
+            # Agrupar todo lo pendiente en una sola transacción
+            while True:
+                received += 1
+                if item is _STOP:
+                    stop = True
+                else:
+                    rows.append(item)
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if rows:
+                with connection:
+                    self._insert(connection, rows)
+            for _ in range(received):
+                self.queue.task_done()
+            if stop:
+                connection.close()
+                return
+
+    def flush(self):
+        # Esperar a que las inserciones pendientes sean visibles
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(_STOP)
+            self.thread.join()
+            self.thread = None
+        self.connection.close()
+
+    def _rows(self, query, params):
+        return [{"player": row["player"], "score": row["score"], "level": row["level"],
+                 "date": to_display_date(row["date"])}
+                for row in self.connection.execute(query, params)]
+
+    def count(self, level=None):
+        if level is None:
+            return self.connection.execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+        return self.connection.execute("SELECT COUNT(*) FROM scores WHERE level = ?", (level,)).fetchone()[0]
+
+    def top(self, k=10, offset=0):
+        return self._rows("SELECT player, score, level, date FROM scores "
+                          "ORDER BY score DESC, id LIMIT ? OFFSET ?", (k, offset))
+
+    def top_for_level(self, level, k=10, offset=0):
+        return self._rows("SELECT player, score, level, date FROM scores WHERE level = ? "
+                          "ORDER BY score DESC, id LIMIT ? OFFSET ?", (level, k, offset))
+
+    def top_since(self, date, k=10):
+        # date en formato aaaa-mm-dd
+        return self._rows("SELECT player, score, level, date FROM scores WHERE date >= ? "
+                          "ORDER BY score DESC, id LIMIT ?", (date, k))
+
+    def player_best(self, player):
+        rows = self._rows("SELECT player, score, level, date FROM scores WHERE player = ? "
+                          "ORDER BY score DESC, id LIMIT 1", (player,))
+        return rows[0] if rows else None
+
+    def best_per_player(self, k=10, offset=0):
+        return self._rows("SELECT player, MAX(score) AS score, level, date FROM scores "
+                          "GROUP BY player ORDER BY score DESC LIMIT ? OFFSET ?", (k, offset))
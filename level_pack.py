@@ -0,0 +1,210 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+
+# Formato de los paquetes de niveles (little endian):
+#   cabecera: b'MBLP', versión (uint8), 3 bytes de relleno, número de niveles (uint32)
+#   índice: por nivel, primer ladrillo (uint32), número de ladrillos (uint16),
+#           reservado (uint16) y nombre en UTF-8 (24 bytes, rellenado con ceros)
+#   ladrillos: registros de tamaño fijo con x, y (int16), ancho, alto (uint16),
+#              color RGB (3 × uint8) y golpes necesarios para romperlo (uint8)
+MAGIC = b'MBLP'
+VERSION = 1
+HEADER = struct.Struct('<4sB3xI')
+LEVEL = struct.Struct('<IHH24s')
+BRICK = struct.Struct('<hhHHBBBB')
+
+NAME_SIZE = 24
+MAX_BRICKS_PER_LEVEL = 0xFFFF
+MAX_HITS = 255
+# Rangos de los campos de BRICK: (mínimo, máximo) por campo
+COORD_RANGE = (-0x8000, 0x7FFF)
+SIZE_RANGE = (1, 0xFFFF)
+COLOR_RANGE = (0, 0xFF)
+
+
+class LevelPack:
+    # Paquete de niveles proyectado en memoria. Abrirlo solo lee la cabecera:
+    # el índice y los ladrillos de cada nivel se decodifican al pedirlo, así
+    # que el coste no depende de cuántos niveles tenga el paquete.
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Un archivo vacío no se puede proyectar
+            self.file.close()
+            raise ValueError(f"{path} no es un paquete de niveles válido")
+
+        if len(self.data) < HEADER.size:
+            self.close()
+            raise ValueError(f"{path} no es un paquete de niveles válido")
+        magic, version, self.level_count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} no es un paquete de niveles válido")
+        if version != VERSION:
+            self.close()
+            raise ValueError(f"{path} usa otra versión del formato ({version}, se esperaba {VERSION})")
+
+        self.bricks_offset = HEADER.size + self.level_count * LEVEL.size
+        if len(self.data) < self.bricks_offset:
+            self.close()
+            raise ValueError(f"{path} está incompleto")
+
+    def __len__(self):
+        return self.level_count
+
+    def _entry(self, level):
+        # Los niveles se numeran desde 1, como en el juego
+        if not 1 <= level <= self.level_count:
+            raise IndexError(f"El paquete {self.path} no tiene nivel {level}")
+        return LEVEL.unpack_from(self.data, HEADER.size + (level - 1) * LEVEL.size)
+
+    def name(self, level):
+        return self._entry(level)[3].rstrip(b'\0').decode('utf-8', 'replace')
+
+    def bricks(self, level):
+        # Lista de (x, y, ancho, alto, (r, g, b), golpes) del nivel
+        first, count, _, _ = self._entry(level)
+        start = self.bricks_offset + first * BRICK.size
+        end = start + count * BRICK.size
+        if end > len(self.data):
+            raise ValueError(f"El nivel {level} de {self.path} está incompleto")
+        return [(x, y, w, h, (r, g, b), hits)
+                for x, y, w, h, r, g, b, hits in BRICK.iter_unpack(self.data[start:end])]
+
+    def close(self):
+        if not self.data.closed:
+            self.data.close()
+        self.file.close()
+
+
+def encode_name(name):
+    # Se recorta por bytes sin partir un carácter UTF-8
+    encoded = name.encode('utf-8')[:NAME_SIZE]
+    return encoded.decode('utf-8', 'ignore').encode('utf-8')
+
+
+def check_brick(number, brick):
+    # Comprueba que el ladrillo cabe en su registro antes de empaquetarlo:
+    # struct.error no dice en qué nivel está el valor fuera de rango
+    x, y, w, h, (r, g, b), hits = brick
+    fields = (("x", x, COORD_RANGE), ("y", y, COORD_RANGE), ("ancho", w, SIZE_RANGE), ("alto", h, SIZE_RANGE),
+              ("rojo", r, COLOR_RANGE), ("verde", g, COLOR_RANGE), ("azul", b, COLOR_RANGE),
+              ("golpes", hits, (1, MAX_HITS)))
+    for field, value, (low, high) in fields:
+        if not low <= value <= high:
+            raise ValueError(f"El nivel {number} tiene un ladrillo con {field} = {value} (de {low} a {high})")
+
+
+def write_pack(path, levels):
+    # levels: lista de (nombre, ladrillos) con ladrillos como los de LevelPack.bricks
+    index = bytearray()
+    records = bytearray()
+    first = 0
+    for number, (name, bricks) in enumerate(levels, start=1):
+        if len(bricks) > MAX_BRICKS_PER_LEVEL:
+            raise ValueError(f"El nivel {number} tiene más de {MAX_BRICKS_PER_LEVEL} ladrillos")
+        index += LEVEL.pack(first, len(bricks), 0, encode_name(name))
+        for brick in bricks:
+            check_brick(number, brick)
+            x, y, w, h, (r, g, b), hits = brick
+            records += BRICK.pack(x, y, w, h, r, g, b, hits)
+        first += len(bricks)
+
+    with open(path + '.tmp', 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(levels)))
+        f.write(index)
+        f.write(records)
+    # Renombrado atómico, como las puntuaciones
+    os.replace(path + '.tmp', path)
+
+
+def levels_from_json(data):
+    # {"levels": [{"name": ..., "bricks": [{"x", "y", "w", "h", "color": [r, g, b], "hits"}]}]}
+    levels = []
+    for number, level in enumerate(data["levels"], start=1):
+        bricks = []
+        for brick in level["bricks"]:
+            try:
+                r, g, b = brick["color"]
+                bricks.append((int(brick["x"]), int(brick["y"]), int(brick["w"]), int(brick["h"]),
+                               (int(r), int(g), int(b)), int(brick.get("hits", 1))))
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Ladrillo no válido en el nivel {number}: {brick} ({e})")
+        if not bricks:
+            # Un nivel sin ladrillos se daría por completado nada más empezar
+            raise ValueError(f"El nivel {number} no tiene ladrillos")
+        levels.append((level.get("name", f"Nivel {number}"), bricks))
+    return levels
+
+
+def levels_to_json(pack):
+    return {"levels": [{"name": pack.name(level),
+                        "bricks": [{"x": x, "y": y, "w": w, "h": h, "color": list(color), "hits": hits}
+                                   for x, y, w, h, color, hits in pack.bricks(level)]}
+                       for level in range(1, len(pack) + 1)]}
+
+
+def generated_levels(count):
+    # Los niveles del generador del juego, como punto de partida para editar
+    from simulation import generate_bricks
+    return [(f"Nivel {level}", generate_bricks(level)) for level in range(1, count + 1)]
+
+
+def import_json(json_path, pack_path):
+    with open(json_path, 'r', encoding='utf-8') as f:
+        levels = levels_from_json(json.load(f))
+    write_pack(pack_path, levels)
+    return len(levels)
+
+
+def export_json(pack_path, json_path):
+    pack = LevelPack(pack_path)
+    try:
+        data = levels_to_json(pack)
+    finally:
+        pack.close()
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+    return len(data["levels"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crear y revisar paquetes de niveles (--level-pack)")
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('import', help="Convertir un JSON de niveles en un paquete")
+    command.add_argument('json_file')
+    command.add_argument('pack_file')
+    command = commands.add_parser('export', help="Volcar un paquete a JSON para editarlo")
+    command.add_argument('pack_file')
+    command.add_argument('json_file')
+    command = commands.add_parser('info', help="Listar los niveles de un paquete")
+    command.add_argument('pack_file')
+    command = commands.add_parser('generate', help="Guardar como paquete los niveles que genera el juego")
+    command.add_argument('levels', type=int)
+    command.add_argument('pack_file')
+    args = parser.parse_args()
+
+    if args.command == 'import':
+        count = import_json(args.json_file, args.pack_file)
+        print(f"{count} niveles guardados en {args.pack_file}")
+    elif args.command == 'export':
+        count = export_json(args.pack_file, args.json_file)
+        print(f"{count} niveles exportados a {args.json_file}")
+    elif args.command == 'generate':
+        write_pack(args.pack_file, generated_levels(args.levels))
+        print(f"{args.levels} niveles guardados en {args.pack_file}")
+    else:
+        pack = LevelPack(args.pack_file)
+        for level in range(1, len(pack) + 1):
+            print(f"{level:>5}  {pack.name(level):<24}  {len(pack.bricks(level))} ladrillos")
+        pack.close()
+
+
+if __name__ == "__main__":
+    main()
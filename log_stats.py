@@ -0,0 +1,192 @@
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+
+from session_log import (HEADER, MAGIC, VERSION, RECORD, SESSIONS_FILE, OPERATOR_CODES,
+                         KIND_ANSWER, KIND_LIFE_LOST, KIND_LEVEL_COMPLETE)
+
+# Mismo orden y tamaño que session_log.RECORD: cada archivo se lee de una vez
+# como array estructurado, sin decodificar registro a registro
+RECORD_DTYPE = np.dtype([('time', '<f8'), ('session', '<u8'), ('kind', 'u1'), ('operator', 'u1'),
+                         ('flag', 'u1'), ('lives', 'u1'), ('level', '<u2'), ('a', '<i4'), ('b', '<i4'),
+                         ('seconds', '<f4'), ('points', '<i4')])
+assert RECORD_DTYPE.itemsize == RECORD.size
+
+OPERATOR_NAMES = {code: symbol for symbol, code in OPERATOR_CODES.items()}
+UNKNOWN_PLAYER = "?"
+
+
+def find_files(paths, pattern):
+    # Directorios (se recorren enteros, p. ej. uno por equipo) o archivos sueltos
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            found.extend(glob.glob(os.path.join(path, '**', pattern), recursive=True))
+        elif fnmatch.fnmatch(os.path.basename(path), pattern):
+            found.append(path)
+    return sorted(found)
+
+
+def load_events(paths):
+    arrays = []
+    for path in find_files(paths, '*.mbev'):
+        with open(path, 'rb') as f:
+            header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            continue
+        magic, version, record_size = HEADER.unpack(header)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            print(f"Se omite {path}: no es un registro de eventos de esta versión")
+            continue
+        # Un último registro a medias (cierre inesperado) se descarta
+        count = (os.path.getsize(path) - HEADER.size) // record_size
+        arrays.append(np.fromfile(path, dtype=RECORD_DTYPE, count=count, offset=HEADER.size))
+    if not arrays:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.concatenate(arrays)
+
+
+def load_players(paths):
+    # Sesión (uint64) -> jugador, a partir de los sessions.jsonl
+    players = {}
+    for path in find_files(paths, SESSIONS_FILE):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    players[int(entry["session"], 16)] = entry["player"]
+                except (json.JSONDecodeError, KeyError, ValueError):
+                    continue
+    return players
+
+
+def tally(keys, values, weights=None):
+    # Recuento (o suma de weights) por clave; keys ordenadas y sin repetir
+    # que contienen todos los valores
+    return np.bincount(np.searchsorted(keys, values), weights=weights, minlength=keys.size)
+
+
+def answer_stats(keys, values, correct, seconds):
+    # Respuestas, tasa de aciertos y tiempo medio por clave
+    answers = tally(keys, values)
+    divisor = np.maximum(answers, 1)
+    return answers, tally(keys, values, correct) / divisor, tally(keys, values, seconds) / divisor
+
+
+def summarize(events, players):
+    answers = events[events['kind'] == KIND_ANSWER]
+    correct = answers['flag'].astype(float)
+    seconds = answers['seconds'].astype(float)
+    lives = events[events['kind'] == KIND_LIFE_LOST]
+    levels = events[events['kind'] == KIND_LEVEL_COMPLETE]
+
+    summary = {
+        "eventos": int(events.size),
+        "sesiones": int(np.unique(events['session']).size),
+        "respuestas": int(answers.size),
+        "aciertos": float(correct.mean()) if answers.size else 0.0,
+        "tiempo_medio": float(seconds.mean()) if answers.size else 0.0,
+        "vidas_perdidas": int(lives.size),
+        "vidas_por_fallo": int(np.count_nonzero(lives['flag'])),
+        "niveles_completados": int(levels.size),
+    }
+
+    keys = np.unique(answers['operator'])
+    counts, accuracy, mean_seconds = answer_stats(keys, answers['operator'], correct, seconds)
+    summary["por_operador"] = [
+        {"operador": OPERATOR_NAMES.get(int(key), "?"), "respuestas": int(count),
+         "aciertos": float(rate), "tiempo_medio": float(mean)}
+        for key, count, rate, mean in zip(keys, counts, accuracy, mean_seconds)]
+
+    keys = np.union1d(np.union1d(answers['level'], lives['level']), levels['level'])
+    counts, accuracy, mean_seconds = answer_stats(keys, answers['level'], correct, seconds)
+    lost = tally(keys, lives['level'])
+    completed = tally(keys, levels['level'])
+    durations = tally(keys, levels['level'], levels['seconds'].astype(float)) / np.maximum(completed, 1)
+    summary["por_nivel"] = [
+        {"nivel": int(key), "respuestas": int(count), "aciertos": float(rate), "tiempo_medio": float(mean),
+         "vidas_perdidas": int(lost_count), "completado": int(done), "duracion_media": float(duration)}
+        for key, count, rate, mean, lost_count, done, duration
+        in zip(keys, counts, accuracy, mean_seconds, lost, completed, durations)]
+
+    # Cada sesión se asigna a su jugador; las sesiones del mismo jugador (en
+    # días o equipos distintos) se suman. Solo se recorre en Python la lista
+    # de sesiones, no los eventos.
+    sessions, inverse = np.unique(answers['session'], return_inverse=True)
+    names = sorted({players.get(int(session), UNKNOWN_PLAYER) for session in sessions})
+    name_index = {name: i for i, name in enumerate(names)}
+    session_player = np.array([name_index[players.get(int(session), UNKNOWN_PLAYER)] for session in sessions],
+                              dtype=np.int64)
+    keys = np.arange(len(names))
+    counts, accuracy, mean_seconds = answer_stats(keys, session_player[inverse], correct, seconds)
+    summary["por_jugador"] = sorted(
+        ({"jugador": names[key], "respuestas": int(count), "aciertos": float(rate), "tiempo_medio": float(mean)}
+         for key, count, rate, mean in zip(keys, counts, accuracy, mean_seconds)),
+        key=lambda row: (-row["respuestas"], row["jugador"]))
+    return summary
+
+
+def print_summary(summary, top):
+    print(f"{summary['sesiones']} sesiones, {summary['eventos']} eventos")
+    print(f"Respuestas: {summary['respuestas']}  aciertos {summary['aciertos']:.1%}  "
+          f"tiempo medio {summary['tiempo_medio']:.2f}s")
+    print(f"Vidas perdidas: {summary['vidas_perdidas']} ({summary['vidas_por_fallo']} por respuestas incorrectas)  "
+          f"Niveles completados: {summary['niveles_completados']}")
+
+    print(f"\n{'operador':<9} {'respuestas':>10} {'aciertos':>9} {'tiempo':>8}")
+    for row in summary["por_operador"]:
+        print(f"{row['operador']:<9} {row['respuestas']:>10} {row['aciertos']:>9.1%} {row['tiempo_medio']:>7.2f}s")
+
+    print(f"\n{'nivel':<6} {'respuestas':>10} {'aciertos':>9} {'tiempo':>8} {'vidas':>6} {'completado':>10} "
+          f"{'duración':>9}")
+    for row in summary["por_nivel"]:
+        print(f"{row['nivel']:<6} {row['respuestas']:>10} {row['aciertos']:>9.1%} {row['tiempo_medio']:>7.2f}s "
+              f"{row['vidas_perdidas']:>6} {row['completado']:>10} {row['duracion_media']:>8.0f}s")
+
+    print(f"\n{'jugador':<24} {'respuestas':>10} {'aciertos':>9} {'tiempo':>8}")
+    for row in summary["por_jugador"][:top]:
+        print(f"{row['jugador']:<24} {row['respuestas']:>10} {row['aciertos']:>9.1%} {row['tiempo_medio']:>7.2f}s")
+    if len(summary["por_jugador"]) > top:
+        print(f"... y {len(summary['por_jugador']) - top} jugadores más (--top)")
+
+
+def parse_date(text):
+    return datetime.strptime(text, "%Y-%m-%d").timestamp()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumen de los registros de eventos de --event-log")
+    parser.add_argument('paths', nargs='+', help="Directorios de registros (se recorren enteros) o archivos .mbev")
+    parser.add_argument('--since', type=parse_date, help="Solo eventos desde esta fecha (aaaa-mm-dd)")
+    parser.add_argument('--until', type=parse_date, help="Solo eventos anteriores a esta fecha (aaaa-mm-dd)")
+    parser.add_argument('--top', type=int, default=20, help="Jugadores que se muestran")
+    parser.add_argument('--json', metavar='ARCHIVO', help="Guardar el resumen completo en JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    events = load_events(args.paths)
+    players = load_players(args.paths)
+    loaded = time.perf_counter() - start
+    if args.since is not None:
+        events = events[events['time'] >= args.since]
+    if args.until is not None:
+        events = events[events['time'] < args.until]
+    summary = summarize(events, players)
+    elapsed = time.perf_counter() - start
+
+    print_summary(summary, args.top)
+    print(f"\nLeídos en {loaded:.2f}s; resumen completo en {elapsed:.2f}s")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        print(f"Resumen guardado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+import argparse
+import threading
+import time
+
+import numpy as np
+
+# Operadores (códigos usados en los arrays)
+OP_ADD = 0
+OP_SUB = 1
+OP_MUL = 2
+OP_DIV = 3
+OPERATOR_SYMBOLS = ['+', '-', '*', '÷']
+# Nombres para las cuotas por operador (weights), como en generate_math_problem
+OPERATOR_NAMES = ['+', '-', '*', '/']
+
+POOL_SIZE = 200
+LOW_WATER = 50
+
+
+def operators_for_level(level):
+    # Aumentar complejidad del problema con el nivel
+    if level > 3:
+        return [OP_ADD, OP_SUB, OP_MUL, OP_DIV]
+    return [OP_ADD, OP_SUB, OP_MUL]
+
+
+def generate_operands(operator, level, count, rng):
+    # Mismos rangos que GameSimulation.generate_math_problem, en bloque
+    if operator == OP_ADD:
+        a = rng.integers(1, 20 + level * 5, size=count, endpoint=True)
+        b = rng.integers(1, 20 + level * 5, size=count, endpoint=True)
+        answer = a + b
+    elif operator == OP_SUB:
+        a = rng.integers(10, 50 + level * 10, size=count, endpoint=True)
+        b = (rng.random(count) * a).astype(np.int64) + 1
+        answer = a - b
+    elif operator == OP_MUL:
+        a = rng.integers(1, 10 + level, size=count, endpoint=True)
+        b = rng.integers(1, 10 + level, size=count, endpoint=True)
+        answer = a * b
+    else:  # División exacta para niveles superiores
+        b = rng.integers(1, 10, size=count, endpoint=True)
+        answer = rng.integers(1, 10, size=count, endpoint=True)
+        a = b * answer
+    return a, b, answer
+
+
+def operator_shares(level, operators, weights):
+    # Fracción de problemas de cada operador del nivel según weights (por
+    # nombre de OPERATOR_NAMES); los operadores sin peso no salen
+    shares = np.array([weights.get(OPERATOR_NAMES[op], 0.0) for op in operators], dtype=float)
+    if shares.sum() <= 0 or (shares < 0).any():
+        names = ", ".join(OPERATOR_NAMES[op] for op in operators)
+        raise ValueError(f"Los pesos {weights} no dan problemas en el nivel {level} (operadores: {names})")
+    return shares / shares.sum()
+
+
+def generate_problems(level, count, rng=None, weights=None):
+    # Genera count problemas del nivel sin eliminar repetidos, para análisis
+    # masivo fuera del juego. Devuelve arrays: operador, a, b y respuesta.
+    rng = rng if rng is not None else np.random.default_rng()
+    operators = operators_for_level(level)
+    probabilities = None
+    if weights is not None:
+        probabilities = operator_shares(level, operators, weights)
+
+    op = rng.choice(np.array(operators, dtype=np.int8), size=count, p=probabilities)
+    a = np.empty(count, dtype=np.int64)
+    b = np.empty(count, dtype=np.int64)
+    answer = np.empty(count, dtype=np.int64)
+    for operator in operators:
+        mask = op == operator
+        a[mask], b[mask], answer[mask] = generate_operands(operator, level, int(mask.sum()), rng)
+    return op, a, b, answer
+
+
+def generate_pool(level, size, rng, weights=None):
+    # Reserva barajada de problemas sin repetir, con una cuota por operador
+    operators = operators_for_level(level)
+    if weights is None:
+        shares = np.full(len(operators), 1.0 / len(operators))
+    else:
+        shares = operator_shares(level, operators, weights)
+    quotas = np.floor(shares * size).astype(int)
+    quotas[:size - quotas.sum()] += 1
+
+    ops, a_parts, b_parts, answers = [], [], [], []
+    for operator, quota in zip(operators, quotas):
+        if quota == 0:
+            continue
+        # Se sobremuestrea para que, tras quitar repetidos, queden suficientes
+        a, b, answer = generate_operands(operator, level, quota * 4, rng)
+        _, first = np.unique(a * 1000003 + b, return_index=True)
+        first = rng.permutation(first)[:quota]
+        ops.append(np.full(first.size, operator, dtype=np.int8))
+        a_parts.append(a[first])
+        b_parts.append(b[first])
+        answers.append(answer[first])
+
+    op = np.concatenate(ops)
+    order = rng.permutation(op.size)
+    return (op[order], np.concatenate(a_parts)[order],
+            np.concatenate(b_parts)[order], np.concatenate(answers)[order])
+
+
+class ProblemBank:
+    # Reservas de problemas por nivel generadas en bloque con NumPy. Cuando una
+    # reserva baja de low_water se prepara la siguiente en un hilo aparte, así
+    # que pedir un problema nunca cuesta más que leer un array.
+    def __init__(self, seed=None, pool_size=POOL_SIZE, low_water=LOW_WATER, weights=None):
+        self.seed = seed if seed is not None else int(np.random.SeedSequence().entropy % (2 ** 63))
+        self.pool_size = pool_size
+        self.low_water = low_water
+        self.weights = weights
+        self.pools = {}
+        self.positions = {}
+        self.refills = {}
+        # Reservas que se están generando en segundo plano: nivel -> (hilo, resultado)
+        self.pending = {}
+
+    def _reserve_rng(self, level):
+        # Cada reserva usa su propia semilla, fijada al pedirla: el resultado
+        # no depende de si se generó en segundo plano o no
+        refill = self.refills.get(level, 0)
+        self.refills[level] = refill + 1
+        return np.random.default_rng([self.seed, level, refill])
+
+    def _fill(self, level, rng, result):
+        result['pool'] = generate_pool(level, self.pool_size, rng, self.weights)
+
+    def _refill_in_background(self, level):
+        if level in self.pending:
+            return
+        result = {}
+        thread = threading.Thread(target=self._fill, args=(level, self._reserve_rng(level), result),
+                                  daemon=True)
+        self.pending[level] = (thread, result)
+        thread.start()
+
+    def _next_pool(self, level):
+        pending = self.pending.pop(level, None)
+        if pending is not None:
+            thread, result = pending
+            thread.join()
+            return result['pool']
+        return generate_pool(level, self.pool_size, self._reserve_rng(level), self.weights)
+
+    def next_problem(self, level):
+        pool = self.pools.get(level)
+        position = self.positions.get(level, 0)
+        if pool is None or position >= pool[0].size:
+            pool = self.pools[level] = self._next_pool(level)
+            position = 0
+
+        op, a, b, answer = pool
+        self.positions[level] = position + 1
+        if op.size - position - 1 <= self.low_water:
+            self._refill_in_background(level)
+
+        problem = f"{a[position]} {OPERATOR_SYMBOLS[op[position]]} {b[position]} = ?"
+        return problem, int(answer[position])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generación masiva de problemas para análisis de dificultad")
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--output', help="Guardar los problemas en un archivo .npz")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    op, a, b, answer = generate_problems(args.level, args.count, np.random.default_rng(args.seed))
+    elapsed = time.perf_counter() - start
+    print(f"{args.count} problemas del nivel {args.level} en {elapsed:.2f}s")
+
+    for operator in operators_for_level(args.level):
+        answers = answer[op == operator]
+        if answers.size:
+            print(f"  {OPERATOR_SYMBOLS[operator]}: {answers.size} problemas, respuesta media {answers.mean():.1f}, "
+                  f"p95 {np.percentile(answers, 95):.0f}, máxima {answers.max()}")
+
+    if args.output:
+        np.savez_compressed(args.output, operator=op, a=a, b=b, answer=answer)
+        print(f"Guardado en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+import argparse
+import struct
+import time
+
+from simulation import FRAME_DT, GameSimulation, session_rng
+
+# Formato del registro de sesión (little endian):
+#   cabecera: b'MBRL', versión (uint8), semilla (uint64)
+#   registros: una etiqueta (uint8) seguida de sus datos
+MAGIC = b'MBRL'
+VERSION = 2
+HEADER = struct.Struct('<4sBQ')
+
+REC_STEPS = 1   # entradas (uint8) repetidas durante count pasos (uint16)
+REC_ANSWER = 2  # respuesta (int64) y tiempo de respuesta en segundos (float64)
+REC_CANCEL = 3  # desafío cancelado con ESC
+REC_RESET = 4   # partida reiniciada en el nivel indicado (uint16)
+
+STEPS = struct.Struct('<BBH')
+ANSWER = struct.Struct('<Bqd')
+CANCEL = struct.Struct('<B')
+RESET = struct.Struct('<BH')
+
+MAX_RUN = 0xFFFF
+INT64_MIN = -2 ** 63
+INT64_MAX = 2 ** 63 - 1
+# Tamaño del búfer antes de escribir en disco
+FLUSH_SIZE = 64 * 1024
+
+
+class SessionRecorder:
+    # Graba en binario lo necesario para reproducir una sesión: las teclas de
+    # cada paso de física (comprimidas por tramos iguales), las respuestas con
+    # su tiempo y los reinicios de partida. Todo lo aleatorio sale de la semilla.
+    def __init__(self, path, seed):
+        self.file = open(path, 'wb')
+        self.buffer = bytearray(HEADER.pack(MAGIC, VERSION, seed))
+        self.run_inputs = 0
+        self.run_length = 0
+
+    def _end_run(self):
+        if self.run_length:
+            self.buffer += STEPS.pack(REC_STEPS, self.run_inputs, self.run_length)
+            self.run_length = 0
+        if len(self.buffer) >= FLUSH_SIZE:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+
+    def step(self, inputs):
+        if inputs != self.run_inputs or self.run_length == MAX_RUN:
+            self._end_run()
+            self.run_inputs = inputs
+        self.run_length += 1
+
+    def answer(self, value, elapsed):
+        self._end_run()
+        # Una respuesta fuera de rango es igual de incorrecta al recortarla
+        value = min(max(value, INT64_MIN), INT64_MAX)
+        self.buffer += ANSWER.pack(REC_ANSWER, value, elapsed)
+
+    def cancel(self):
+        self._end_run()
+        self.buffer += CANCEL.pack(REC_CANCEL)
+
+    def reset(self, level):
+        self._end_run()
+        self.buffer += RESET.pack(REC_RESET, level)
+
+    def close(self):
+        if self.file.closed:
+            return
+        self._end_run()
+        self.file.write(self.buffer)
+        self.buffer.clear()
+        self.file.close()
+
+
+def read_session(path):
+    # Devuelve la semilla y la lista de registros como tuplas (etiqueta, ...)
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    magic, version, seed = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} no es un registro de sesión válido")
+    if version != VERSION:
+        # La física cambia entre versiones: una sesión antigua no se reproduce igual
+        raise ValueError(f"{path} se grabó con otra versión del juego ({version}, se esperaba {VERSION})")
+
+    records = []
+    offset = HEADER.size
+    while offset < len(data):
+        tag = data[offset]
+        if tag == REC_STEPS:
+            records.append(STEPS.unpack_from(data, offset))
+            offset += STEPS.size
+        elif tag == REC_ANSWER:
+            records.append(ANSWER.unpack_from(data, offset))
+            offset += ANSWER.size
+        elif tag == REC_CANCEL:
+            records.append(CANCEL.unpack_from(data, offset))
+            offset += CANCEL.size
+        elif tag == REC_RESET:
+            records.append(RESET.unpack_from(data, offset))
+            offset += RESET.size
+        else:
+            raise ValueError(f"Registro desconocido {tag} en la posición {offset}")
+    return seed, records
+
+
+def replay_session(seed, records, problems=None, level_pack=None):
+    # Vuelve a ejecutar la sesión sin ventana y tan rápido como se pueda.
+    # Se construye igual que en MathBreakout.reset_game para obtener los
+    # mismos ladrillos, problemas y rebotes; una sesión jugada con
+    # --level-pack necesita el mismo paquete.
+    if problems is None:
+        from problem_bank import ProblemBank
+        problems = ProblemBank(seed)
+
+    sim = None
+    for record in records:
+        tag = record[0]
+        if tag == REC_STEPS:
+            step = sim.step
+            inputs = record[1]
+            for _ in range(record[2]):
+                step(inputs, FRAME_DT)
+        elif tag == REC_ANSWER:
+            sim.answer(record[1], record[2])
+        elif tag == REC_CANCEL:
+            sim.cancel_challenge()
+        elif sim is None:
+            sim = GameSimulation(record[1], rng=session_rng(seed, 'simulacion'), problems=problems,
+                                 level_pack=level_pack)
+        else:
+            sim.reset(record[1])
+    return sim
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reproducir sin ventana una sesión grabada con --record")
+    parser.add_argument('session', help="Archivo de sesión")
+    parser.add_argument('--level-pack', metavar='ARCHIVO', help="Paquete de niveles con el que se jugó la sesión")
+    args = parser.parse_args()
+
+    level_pack = None
+    if args.level_pack is not None:
+        from level_pack import LevelPack
+        level_pack = LevelPack(args.level_pack)
+
+    seed, records = read_session(args.session)
+    start = time.perf_counter()
+    sim = replay_session(seed, records, level_pack=level_pack)
+    elapsed = time.perf_counter() - start
+
+    if sim is None:
+        print("La sesión no contiene ninguna partida")
+        return
+    print(f"Nivel: {sim.level}  Puntuación: {sim.score}  Vidas: {sim.lives}")
+    print(f"{sim.frame} pasos ({sim.frame * FRAME_DT:.0f}s de juego) en {elapsed:.3f}s "
+          f"({sim.frame / elapsed:.0f} pasos/s)")
+
+
+if __name__ == "__main__":
+    main()
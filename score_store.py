@@ -0,0 +1,138 @@
+import json
+import os
+import queue
+import threading
+
+MAX_HIGH_SCORES = 10
+# Entradas en el diario antes de compactarlo en segundo plano
+COMPACT_EVERY = 100
+
+_STOP = object()
+
+
+def atomic_write_json(path, data):
+    # Escribir en un temporal y renombrar: el archivo queda entero o no cambia
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class HighScoreStore:
+    # Puntuaciones altas persistidas sin bloquear el bucle del juego. Cada
+    # puntuación nueva se añade a un diario (una línea JSON) desde un hilo
+    # escritor que agrupa las escrituras pendientes; al arrancar, el diario
+    # se aplica sobre la instantánea y se compacta con un renombrado atómico.
+    def __init__(self, path='high_scores.json', max_entries=MAX_HIGH_SCORES):
+        self.path = path
+        self.journal_path = path + '.journal'
+        self.max_entries = max_entries
+        self.high_scores = []
+        self.queue = queue.Queue()
+        self.thread = None
+        self.journal_length = 0
+
+    def _read_snapshot(self):
+        try:
+            with open(self.path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+        except json.JSONDecodeError as e:
+            # Archivo dañado (p. ej. de una versión anterior que escribía en el
+            # sitio): se aparta en lugar de perderlo en silencio
+            print(f"Error cargando puntuaciones: {e}")
+            os.replace(self.path, self.path + '.corrupt')
+            return []
+
+    def _read_journal(self):
+        entries = []
+        try:
+            with open(self.journal_path, 'r') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Última línea a medias tras un cierre inesperado
+                        break
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _top(self, entries):
+        entries.sort(key=lambda x: x["score"], reverse=True)
+        return entries[:self.max_entries]
+
+    def load(self):
+        entries = self._read_snapshot() + self._read_journal()
+        self.high_scores = self._top(entries)
+
+        # Compactar: la instantánea pasa a contener el diario, que se vacía
+        if os.path.exists(self.journal_path):
+            atomic_write_json(self.path, self.high_scores)
+            os.remove(self.journal_path)
+        self.journal_length = 0
+        return self.high_scores
+
+    def add(self, entry):
+        # Insertar en orden sin reordenar toda la lista
+        position = len(self.high_scores)
+        while position > 0 and self.high_scores[position - 1]["score"] < entry["score"]:
+            position -= 1
+        if position >= self.max_entries:
+            return self.high_scores
+        self.high_scores.insert(position, entry)
+        del self.high_scores[self.max_entries:]
+
+        self._start_writer()
+        self.queue.put(entry)
+        return self.high_scores
+
+    def _start_writer(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._writer, daemon=True)
+            self.thread.start()
+
+    def _writer(self):
+        while True:
+            item = self.queue.get()
+            batch = []
+            stop = False
+            # Agrupar todo lo pendiente en una sola escritura
+            while True:
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._append(batch)
+            if stop:
+                return
+
+    def _append(self, batch):
+        with open(self.journal_path, 'a') as f:
+            for entry in batch:
+                f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.journal_length += len(batch)
+
+        if self.journal_length >= COMPACT_EVERY:
+            entries = self._read_snapshot() + self._read_journal()
+            atomic_write_json(self.path, self._top(entries))
+            os.remove(self.journal_path)
+            self.journal_length = 0
+
+    def close(self):
+        # Esperar a que se escriba todo lo pendiente
+        if self.thread is not None:
+            self.queue.put(_STOP)
+            self.thread.join()
+            self.thread = None
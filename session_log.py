@@ -0,0 +1,186 @@
+import json
+import os
+import queue
+import socket
+import struct
+import threading
+import time
+from datetime import datetime
+
+from event_bus import Answer, BrickHit, LevelComplete, LifeLost
+
+# Formato de los registros de eventos (little endian):
+#   cabecera: b'MBEV', versión (uint8), tamaño de registro (uint16)
+#   registros de tamaño fijo, uno por evento: hora (float64, segundos Unix),
+#   sesión (uint64), tipo, operador, indicador, vidas (4 × uint8), nivel
+#   (uint16), operandos a y b (2 × int32), segundos (float32) y puntos (int32)
+# Los registros de tamaño fijo se leen con NumPy sin decodificarlos uno a uno
+# (ver log_stats.py). El indicador es el acierto en las respuestas y, en las
+# vidas perdidas, si la vida se perdió por una respuesta incorrecta.
+MAGIC = b'MBEV'
+VERSION = 1
+HEADER = struct.Struct('<4sBH')
+RECORD = struct.Struct('<dQBBBBHiifi')
+
+KIND_BRICK_HIT = 1
+KIND_ANSWER = 2
+KIND_LIFE_LOST = 3
+KIND_LEVEL_COMPLETE = 4
+
+# Códigos de operador; 0 si el problema no tiene la forma "a op b = ?"
+OPERATOR_CODES = {'+': 1, '-': 2, '*': 3, '÷': 4}
+
+# Eventos que se acumulan antes de pasarlos al hilo escritor
+BATCH_RECORDS = 256
+# Tamaño a partir del cual se empieza un archivo nuevo
+ROTATE_BYTES = 4 * 1024 * 1024
+# Una línea JSON por sesión con el jugador, la semilla y el equipo
+SESSIONS_FILE = 'sessions.jsonl'
+
+_STOP = object()
+
+
+def parse_problem(problem):
+    # "12 + 5 = ?" -> (código de operador, 12, 5)
+    parts = problem.split()
+    try:
+        return OPERATOR_CODES[parts[1]], int(parts[0]), int(parts[2])
+    except (IndexError, KeyError, ValueError):
+        return 0, 0, 0
+
+
+class SessionLogger:
+    # Suscriptor del bus de eventos que guarda la sesión en registros binarios
+    # de solo añadido. Cada evento se empaqueta en un búfer; al llenarse un
+    # lote (o al terminar un nivel o la partida) el búfer pasa a un hilo
+    # escritor, así que el bucle del juego nunca espera al disco. Los
+    # archivos rotan al superar max_bytes y nunca se reescriben.
+    def __init__(self, directory, player, seed, max_bytes=ROTATE_BYTES, batch_records=BATCH_RECORDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.batch_records = batch_records
+        os.makedirs(directory, exist_ok=True)
+        # Aleatoria para que no choque con las de otros equipos del centro
+        self.session = int.from_bytes(os.urandom(8), 'little')
+        self.started = datetime.now()
+
+        self.buffer = bytearray()
+        self.buffered = 0
+        self.queue = queue.Queue()
+        self.thread = None
+        # Estado del hilo escritor
+        self.file = None
+        self.file_bytes = 0
+        self.file_index = 0
+
+        self.queue.put({"session": f"{self.session:016x}", "player": player, "seed": seed,
+                        "host": socket.gethostname(), "start": self.started.isoformat(timespec='seconds')})
+
+    def attach(self, bus):
+        bus.subscribe(BrickHit, self.on_brick_hit)
+        bus.subscribe(Answer, self.on_answer)
+        bus.subscribe(LifeLost, self.on_life_lost)
+        bus.subscribe(LevelComplete, self.on_level_complete)
+
+    def detach(self, bus):
+        bus.unsubscribe(BrickHit, self.on_brick_hit)
+        bus.unsubscribe(Answer, self.on_answer)
+        bus.unsubscribe(LifeLost, self.on_life_lost)
+        bus.unsubscribe(LevelComplete, self.on_level_complete)
+
+    def _record(self, kind, operator, flag, lives, level, a, b, seconds, points):
+        self.buffer += RECORD.pack(time.time(), self.session, kind, operator, flag, max(0, lives),
+                                   level, a, b, seconds, points)
+        self.buffered += 1
+        if self.buffered >= self.batch_records:
+            self.flush()
+
+    def on_brick_hit(self, event):
+        operator, a, b = parse_problem(event.problem)
+        self._record(KIND_BRICK_HIT, operator, 0, event.lives, event.level, a, b, 0.0, 0)
+
+    def on_answer(self, event):
+        operator, a, b = parse_problem(event.problem)
+        self._record(KIND_ANSWER, operator, event.correct, 0, event.level, a, b, event.seconds, event.points)
+
+    def on_life_lost(self, event):
+        self._record(KIND_LIFE_LOST, 0, event.wrong_answer, event.lives, event.level, 0, 0, 0.0, 0)
+        if event.lives <= 0:
+            # Fin de la partida: que quede en disco aunque se cierre el juego
+            self.flush()
+
+    def on_level_complete(self, event):
+        self._record(KIND_LEVEL_COMPLETE, 0, 0, 0, event.level, 0, 0, event.seconds, event.score)
+        self.flush()
+
+    def flush(self):
+        # Entregar el lote al hilo escritor sin esperar a que se escriba
+        if not self.buffered:
+            return
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._writer, daemon=True)
+            self.thread.start()
+        self.queue.put(bytes(self.buffer))
+        self.buffer.clear()
+        self.buffered = 0
+
+    def wait(self):
+        # Esperar a que todo lo entregado esté escrito
+        if self.thread is not None:
+            self.queue.join()
+
+    def close(self):
+        self.flush()
+        if self.thread is not None:
+            self.queue.put(_STOP)
+            self.thread.join()
+            self.thread = None
+
+    def _writer(self):
+        while True:
+            item = self.queue.get()
+            batch = bytearray()
+            sessions = []
+            received = 0
+            stop = False
+            # Agrupar todo lo pendiente en una sola escritura
+            while True:
+                received += 1
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, dict):
+                    sessions.append(item)
+                else:
+                    batch += item
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if sessions:
+                with open(os.path.join(self.directory, SESSIONS_FILE), 'a', encoding='utf-8') as f:
+                    for session in sessions:
+                        f.write(json.dumps(session, ensure_ascii=False) + '\n')
+            if batch:
+                self._write_records(batch)
+            for _ in range(received):
+                self.queue.task_done()
+            if stop:
+                if self.file is not None:
+                    self.file.close()
+                return
+
+    def _write_records(self, batch):
+        if self.file is not None and self.file_bytes + len(batch) > self.max_bytes:
+            self.file.close()
+            self.file = None
+        if self.file is None:
+            self.file_index += 1
+            name = f"events-{self.started:%Y%m%d-%H%M%S}-{self.session:016x}-{self.file_index:03d}.mbev"
+            self.file = open(os.path.join(self.directory, name), 'xb')
+            self.file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+            self.file_bytes = HEADER.size
+        self.file.write(batch)
+        # Los registros quedan enteros en disco al terminar cada lote
+        self.file.flush()
+        self.file_bytes += len(batch)
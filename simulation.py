@@ -0,0 +1,746 @@
+import argparse
+import math
+import random
+import time
+
+from event_bus import Answer, BrickHit, EventBus, LevelComplete, LifeLost
+
+# Screen dimensions
+SCREEN_WIDTH = 1024
+SCREEN_HEIGHT = 768
+PADDLE_WIDTH = 100
+PADDLE_HEIGHT = 20
+BALL_RADIUS = 10
+BRICK_WIDTH = 80
+BRICK_HEIGHT = 30
+
+# Retícula de ladrillos
+BRICK_GAP = 5
+BRICK_OFFSET_X = 50
+BRICK_OFFSET_Y = 50
+BRICK_COLUMNS = 10
+BASE_BRICK_ROWS = 5
+MAX_BRICK_ROWS = 12  # Límite de filas para que no sea imposible
+
+# Colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+GREEN = (0, 255, 0)
+YELLOW = (255, 255, 0)
+PURPLE = (128, 0, 128)
+ORANGE = (255, 165, 0)
+CYAN = (0, 255, 255)
+
+# Más colores para mayor variedad
+BRICK_COLORS = [RED, BLUE, GREEN, YELLOW, PURPLE, ORANGE, CYAN]
+
+# La física original avanzaba un paso por fotograma a 60 FPS; las velocidades
+# siguen expresadas en píxeles por fotograma a esa frecuencia
+PHYSICS_FPS = 60
+FRAME_DT = 1.0 / PHYSICS_FPS
+PADDLE_SPEED = 10
+STARTING_LIVES = 6
+
+# Velocidad de la bola: BALL_SPEED_BASE + nivel * BALL_SPEED_PER_LEVEL
+BALL_SPEED_BASE = 5
+BALL_SPEED_PER_LEVEL = 0.5
+
+# Entradas del jugador (máscara de bits)
+INPUT_LEFT = 1
+INPUT_RIGHT = 2
+
+# Eventos emitidos por step() y answer()
+EVENT_BRICK_HIT = 'brick_hit'
+EVENT_CORRECT_ANSWER = 'correct_answer'
+EVENT_WRONG_ANSWER = 'wrong_answer'
+EVENT_LIFE_LOST = 'life_lost'
+EVENT_GAME_OVER = 'game_over'
+EVENT_LEVEL_COMPLETE = 'level_complete'
+EVENT_MULTIBALL = 'multiball'
+EVENT_BRICK_BROKEN = 'brick_broken'
+EVENT_BRICK_DAMAGED = 'brick_damaged'
+
+# Multibola: cada MULTIBALL_STREAK aciertos seguidos salen MULTIBALL_BALLS
+# bolas extra desde la paleta; los ladrillos que rompen dan BONUS_BRICK_POINTS
+MULTIBALL_STREAK = 3
+MULTIBALL_BALLS = 3
+BONUS_BRICK_POINTS = 50
+
+# Rebotes que se resuelven como máximo dentro de un mismo paso
+MAX_BOUNCES_PER_STEP = 4
+
+
+class Rect:
+    # Rectángulo mínimo en coma flotante para no depender de pygame.Rect
+    __slots__ = ('x', 'y', 'w', 'h')
+
+    def __init__(self, x, y, w, h):
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+
+    @property
+    def left(self):
+        return self.x
+
+    @left.setter
+    def left(self, value):
+        self.x = value
+
+    @property
+    def right(self):
+        return self.x + self.w
+
+    @right.setter
+    def right(self, value):
+        self.x = value - self.w
+
+    @property
+    def top(self):
+        return self.y
+
+    @top.setter
+    def top(self, value):
+        self.y = value
+
+    @property
+    def bottom(self):
+        return self.y + self.h
+
+    @bottom.setter
+    def bottom(self, value):
+        self.y = value - self.h
+
+    @property
+    def centerx(self):
+        return self.x + self.w / 2
+
+    @property
+    def centery(self):
+        return self.y + self.h / 2
+
+    def colliderect(self, other):
+        return (self.x < other.x + other.w and other.x < self.x + self.w and
+                self.y < other.y + other.h and other.y < self.y + self.h)
+
+
+def sweep_box(x, y, w, h, dx, dy, target):
+    # Tiempo de impacto de una caja w x h que se desplaza (dx, dy) desde (x, y)
+    # contra target: rayo contra el rectángulo expandido por el tamaño de la
+    # caja. Devuelve (tiempo en [0, 1), eje 0=x / 1=y) o None si no hay impacto
+    # en este desplazamiento. Un tiempo negativo indica que ya se solapaban.
+    left = target.x - w
+    right = target.x + target.w
+    top = target.y - h
+    bottom = target.y + target.h
+
+    if dx > 0:
+        tx_entry = (left - x) / dx
+        tx_exit = (right - x) / dx
+    elif dx < 0:
+        tx_entry = (right - x) / dx
+        tx_exit = (left - x) / dx
+    elif left < x < right:
+        tx_entry = -math.inf
+        tx_exit = math.inf
+    else:
+        return None
+
+    if dy > 0:
+        ty_entry = (top - y) / dy
+        ty_exit = (bottom - y) / dy
+    elif dy < 0:
+        ty_entry = (bottom - y) / dy
+        ty_exit = (top - y) / dy
+    elif top < y < bottom:
+        ty_entry = -math.inf
+        ty_exit = math.inf
+    else:
+        return None
+
+    entry = tx_entry if tx_entry > ty_entry else ty_entry
+    exit_time = tx_exit if tx_exit < ty_exit else ty_exit
+    if entry >= exit_time or entry >= 1 or exit_time <= 1e-9:
+        return None
+    return entry, (0 if tx_entry > ty_entry else 1)
+
+
+class BrickGrid:
+    # Almacén de ladrillos indexado por una retícula uniforme del tamaño de la
+    # separación entre ladrillos. La bola solo consulta las celdas que cubre,
+    # así que el coste de colisión no depende del número de ladrillos.
+    def __init__(self, cell_width=BRICK_WIDTH + BRICK_GAP, cell_height=BRICK_HEIGHT + BRICK_GAP,
+                 origin_x=BRICK_OFFSET_X, origin_y=BRICK_OFFSET_Y,
+                 width=SCREEN_WIDTH, height=SCREEN_HEIGHT):
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.origin_x = origin_x
+        self.origin_y = origin_y
+        self.columns = max(1, int((width - origin_x) // cell_width) + 1)
+        self.rows = max(1, int((height - origin_y) // cell_height) + 1)
+        self.cells = [[] for _ in range(self.columns * self.rows)]
+        # Ladrillos vivos en orden de inserción (para dibujarlos)
+        self.bricks = {}
+
+    def __len__(self):
+        return len(self.bricks)
+
+    def __iter__(self):
+        return iter(self.bricks)
+
+    def _column(self, x):
+        col = int((x - self.origin_x) // self.cell_width)
+        return 0 if col < 0 else (self.columns - 1 if col >= self.columns else col)
+
+    def _row(self, y):
+        row = int((y - self.origin_y) // self.cell_height)
+        return 0 if row < 0 else (self.rows - 1 if row >= self.rows else row)
+
+    def add(self, brick_data):
+        brick = brick_data[0]
+        self.bricks[brick_data] = None
+        columns = self.columns
+        for row in range(self._row(brick.y), self._row(brick.y + brick.h) + 1):
+            for col in range(self._column(brick.x), self._column(brick.x + brick.w) + 1):
+                self.cells[row * columns + col].append(brick_data)
+
+    def remove(self, brick_data):
+        brick = brick_data[0]
+        del self.bricks[brick_data]
+        columns = self.columns
+        for row in range(self._row(brick.y), self._row(brick.y + brick.h) + 1):
+            for col in range(self._column(brick.x), self._column(brick.x + brick.w) + 1):
+                self.cells[row * columns + col].remove(brick_data)
+
+    def first_sweep_hit(self, rect, dx, dy, max_time=1.0):
+        # Primer ladrillo que toca la caja al desplazarse (dx, dy). Solo se
+        # consultan las celdas que cubre el recorrido completo. Devuelve
+        # (ladrillo, tiempo, eje) o None.
+        cells = self.cells
+        columns = self.columns
+        x0 = rect.x + dx if dx < 0 else rect.x
+        y0 = rect.y + dy if dy < 0 else rect.y
+        col_start = self._column(x0)
+        col_end = self._column(x0 + rect.w + abs(dx))
+        best = None
+        for row in range(self._row(y0), self._row(y0 + rect.h + abs(dy)) + 1):
+            base = row * columns
+            for col in range(col_start, col_end + 1):
+                for brick_data in cells[base + col]:
+                    hit = sweep_box(rect.x, rect.y, rect.w, rect.h, dx, dy, brick_data[0])
+                    if hit is not None and hit[0] < max_time:
+                        max_time = hit[0]
+                        best = (brick_data, hit[0], hit[1])
+        return best
+
+
+def session_rng(seed, stream):
+    # Generador propio de cada uso (fondo, simulación...) dentro de una sesión:
+    # con la misma semilla, cada flujo es reproducible por separado
+    return random.Random(f"{seed}:{stream}")
+
+
+def generate_bricks(level, base_rows=BASE_BRICK_ROWS):
+    # Tablero por defecto: 10 columnas, más filas en niveles más altos y
+    # colores por fila. Mismo formato que level_pack.LevelPack.bricks:
+    # (x, y, ancho, alto, color, golpes)
+    rows = min(base_rows + level, MAX_BRICK_ROWS)
+    return [(col * (BRICK_WIDTH + BRICK_GAP) + BRICK_OFFSET_X,
+             row * (BRICK_HEIGHT + BRICK_GAP) + BRICK_OFFSET_Y,
+             BRICK_WIDTH, BRICK_HEIGHT,
+             BRICK_COLORS[row % len(BRICK_COLORS)], 1)
+            for row in range(rows)
+            for col in range(BRICK_COLUMNS)]
+
+
+class GameSimulation:
+    def __init__(self, level=1, rng=None, problems=None, level_pack=None, bus=None,
+                 speed_base=BALL_SPEED_BASE, speed_per_level=BALL_SPEED_PER_LEVEL, base_rows=BASE_BRICK_ROWS,
+                 problem_rate=1.0):
+        self.rng = rng if rng is not None else random.Random()
+        # Parámetros de dificultad (los de batch_simulation, para barridos con
+        # sweep.py). problem_rate es la probabilidad de que un golpe de la
+        # bola en un ladrillo plantee un problema; si no, el ladrillo se
+        # rompe sin desafío. Con 1.0 no se consume azar y las sesiones
+        # grabadas se reproducen igual.
+        self.speed_base = speed_base
+        self.speed_per_level = speed_per_level
+        self.base_rows = base_rows
+        self.problem_rate = problem_rate
+        # Eventos con tipo (event_bus) para registros y estadísticas; sin
+        # suscriptores no se construyen
+        self.bus = bus if bus is not None else EventBus()
+        # Banco de problemas precalculados (problem_bank.ProblemBank); sin él
+        # los problemas se generan al vuelo
+        self.problems = problems
+        # Paquete de niveles (level_pack.LevelPack); los niveles que no
+        # contiene se generan con generate_bricks
+        self.level_pack = level_pack
+        # Golpes que les quedan a los ladrillos que necesitan más de uno
+        self.brick_hits = {}
+        self.level = level
+        self.score = 0
+        self.lives = STARTING_LIVES
+        self.paddle = None
+        self.ball = None
+        self.bricks = None
+        self.base_ball_speed = None
+        self.ball_speed_x = None
+        self.ball_speed_y = None
+        self.last_problem_time = 0
+        # Desafío pendiente: (problema, respuesta correcta, ladrillo golpeado)
+        self.challenge = None
+        self.last_points = 0
+        # Aciertos seguidos y bolas extra (ball_pool.BallPool, se crea al
+        # primer multibola)
+        self.streak = 0
+        self.balls = None
+        # Pasos de física ejecutados desde la creación de la simulación
+        self.frame = 0
+        # Inicio del nivel y tiempo respondiendo en él, para su duración
+        self.level_start_frame = 0
+        self.level_answer_time = 0.0
+        # Se reutiliza la misma lista en cada paso para no generar basura
+        self.events = []
+        # Ladrillos rotos o dañados por la bola principal sin desafío en el
+        # último paso (problem_rate < 1), para que el renderizado los actualice
+        self.broken = []
+        self.damaged = []
+        # Lista opcional donde acumular el tiempo de colisión con paredes,
+        # paleta y ladrillos (frame_profiler.FrameProfiler.sim_timings)
+        self.timings = None
+        self.reset(level)
+
+    def reset(self, level):
+        self.level = level
+        self.score = 0 if level == 1 else self.score  # Mantener puntuación al cambiar de nivel
+        self.lives = STARTING_LIVES
+        self.paddle = Rect(SCREEN_WIDTH // 2 - PADDLE_WIDTH // 2,
+                           SCREEN_HEIGHT - 50,
+                           PADDLE_WIDTH, PADDLE_HEIGHT)
+        self.ball = Rect(SCREEN_WIDTH // 2 - BALL_RADIUS,
+                         SCREEN_HEIGHT // 2 - BALL_RADIUS,
+                         BALL_RADIUS * 2, BALL_RADIUS * 2)
+
+        # Aumentar velocidad de la bola con cada nivel
+        self.base_ball_speed = self.speed_base + (self.level * self.speed_per_level)
+        self.ball_speed_x = self.base_ball_speed
+        self.ball_speed_y = -self.base_ball_speed
+
+        self.last_problem_time = 0
+        self.challenge = None
+        self.streak = 0
+        self.level_start_frame = self.frame
+        self.level_answer_time = 0.0
+        if self.balls is not None:
+            self.balls.clear()
+
+        self.create_bricks()
+
+    def next_level(self):
+        self.reset(self.level + 1)
+
+    def create_bricks(self):
+        if self.level_pack is not None and self.level <= len(self.level_pack):
+            layout = self.level_pack.bricks(self.level)
+        else:
+            layout = generate_bricks(self.level, self.base_rows)
+
+        self.bricks = BrickGrid()
+        self.brick_hits = {}
+        for x, y, w, h, color, hits in layout:
+            brick_data = (Rect(x, y, w, h), color)
+            self.bricks.add(brick_data)
+            if hits > 1:
+                self.brick_hits[brick_data] = hits
+
+    @property
+    def game_over(self):
+        return self.lives <= 0
+
+    @property
+    def level_complete(self):
+        return not self.bricks
+
+    def generate_math_problem(self):
+        if self.problems is not None:
+            return self.problems.next_problem(self.level)
+
+        # Aumentar complejidad del problema con el nivel
+        operators = ['+', '-', '*']
+        if self.level > 3:
+            operators.append('/')
+
+        operator = self.rng.choice(operators)
+
+        if operator == '+':
+            a = self.rng.randint(1, 20 + self.level * 5)
+            b = self.rng.randint(1, 20 + self.level * 5)
+            problem = f"{a} + {b} = ?"
+            answer = a + b
+        elif operator == '-':
+            a = self.rng.randint(10, 50 + self.level * 10)
+            b = self.rng.randint(1, a)
+            problem = f"{a} - {b} = ?"
+            answer = a - b
+        elif operator == '*':
+            a = self.rng.randint(1, 10 + self.level)
+            b = self.rng.randint(1, 10 + self.level)
+            problem = f"{a} * {b} = ?"
+            answer = a * b
+        else:  # División para niveles superiores
+            b = self.rng.randint(1, 10)
+            a = b * self.rng.randint(1, 10)
+            problem = f"{a} ÷ {b} = ?"
+            answer = a // b
+
+        return problem, answer
+
+    def level_seconds(self):
+        # Duración del nivel en curso: pasos de física más tiempo respondiendo
+        return (self.frame - self.level_start_frame) * FRAME_DT + self.level_answer_time
+
+    def calculate_score_for_answer(self):
+        # Dar más puntos por respuestas rápidas
+        base_score = 100
+        time_bonus = max(0, 5 - self.last_problem_time) * 20  # 20 puntos por cada segundo bajo 5
+        level_bonus = self.level * 10  # 10 puntos adicionales por nivel
+        return int(base_score + time_bonus + level_bonus)
+
+    def spawn_balls(self, count):
+        # Bolas extra desde el centro de la paleta, en abanico hacia arriba
+        if self.balls is None:
+            from ball_pool import BallPool
+            self.balls = BallPool()
+        rng = self.rng
+        angles = [(rng.random() * 2 - 1) * math.pi / 4 for _ in range(count)]
+        paddle = self.paddle
+        return self.balls.spawn(paddle.x + paddle.w / 2, paddle.y - 1, angles, self.base_ball_speed)
+
+    def reset_ball(self):
+        # Mover la bola de nuevo a la posición inicial
+        self.ball.x = SCREEN_WIDTH // 2 - BALL_RADIUS
+        self.ball.y = SCREEN_HEIGHT // 2 - BALL_RADIUS
+
+    def _push_out(self, ball, brick):
+        # Calcular distancias a cada lado del ladrillo
+        left_dist = abs(ball.right - brick.left)
+        right_dist = abs(ball.left - brick.right)
+        top_dist = abs(ball.bottom - brick.top)
+        bottom_dist = abs(ball.top - brick.bottom)
+
+        # Encontrar la distancia mínima para determinar el lado de colisión
+        min_dist = min(left_dist, right_dist, top_dist, bottom_dist)
+
+        # Ajustar posición y velocidad según el lado de colisión
+        if min_dist == left_dist:
+            ball.right = brick.left - 1
+            self.ball_speed_x = -abs(self.ball_speed_x)
+        elif min_dist == right_dist:
+            ball.left = brick.right + 1
+            self.ball_speed_x = abs(self.ball_speed_x)
+        elif min_dist == top_dist:
+            ball.bottom = brick.top - 1
+            self.ball_speed_y = -abs(self.ball_speed_y)
+        else:
+            ball.top = brick.bottom + 1
+            self.ball_speed_y = abs(self.ball_speed_y)
+
+    def _hit_without_problem(self, brick_data):
+        # Golpe que no plantea problema: el ladrillo pierde un golpe o se rompe
+        remaining = self.brick_hits.get(brick_data, 1) - 1
+        if remaining:
+            self.brick_hits[brick_data] = remaining
+            self.damaged.append(brick_data)
+            return
+        self.bricks.remove(brick_data)
+        self.brick_hits.pop(brick_data, None)
+        if self.balls is not None:
+            self.balls.remove_brick(brick_data)
+        self.score += BONUS_BRICK_POINTS
+        self.broken.append(brick_data)
+
+    def step(self, inputs, dt=FRAME_DT):
+        events = self.events
+        events.clear()
+        self.broken.clear()
+        self.damaged.clear()
+        balls = self.balls
+        if balls is not None:
+            # BallPool.step solo las vacía si quedan bolas extra
+            balls.broken.clear()
+            balls.damaged.clear()
+
+        # La física queda congelada mientras hay un desafío sin responder
+        if self.challenge is not None or self.lives <= 0:
+            return events
+
+        self.frame += 1
+        scale = dt * PHYSICS_FPS
+        paddle = self.paddle
+        ball = self.ball
+        timings = self.timings
+        clock = time.perf_counter
+
+        # Controlar la paleta
+        if inputs & INPUT_LEFT and paddle.x > 0:
+            paddle.x -= PADDLE_SPEED * scale
+        if inputs & INPUT_RIGHT and paddle.x + paddle.w < SCREEN_WIDTH:
+            paddle.x += PADDLE_SPEED * scale
+
+        # Bolas extra del multibola, todas a la vez
+        if balls is not None and balls.count:
+            balls.step(scale, paddle, self.bricks, self.base_ball_speed, self.brick_hits)
+            if balls.damaged:
+                events.append(EVENT_BRICK_DAMAGED)
+            if balls.broken:
+                self.score += BONUS_BRICK_POINTS * len(balls.broken)
+                events.append(EVENT_BRICK_BROKEN)
+                if not self.bricks:
+                    events.append(EVENT_LEVEL_COMPLETE)
+                    if self.bus.active:
+                        self.bus.publish(LevelComplete(self.frame, self.level, self.level_seconds(), self.score))
+                    return events
+
+        # Movimiento de la pelota con detección continua: se busca el primer
+        # impacto (pared, paleta o ladrillo) del desplazamiento, se avanza hasta
+        # él, se rebota y se consume el resto del desplazamiento
+        remaining = scale
+        for _ in range(MAX_BOUNCES_PER_STEP):
+            dx = self.ball_speed_x * remaining
+            dy = self.ball_speed_y * remaining
+            hit_time = 1.0
+            hit_axis = None
+            hit_paddle = False
+            brick_hit = None
+            if timings is not None:
+                start = clock()
+
+            # Colisión de la pelota con las paredes
+            if dx < 0:
+                hit_time, hit_axis = max(0.0, -ball.x / dx), 0
+            elif dx > 0:
+                hit_time, hit_axis = max(0.0, (SCREEN_WIDTH - ball.w - ball.x) / dx), 0
+            if hit_time >= 1.0:
+                hit_time, hit_axis = 1.0, None
+            if dy < 0:
+                t = max(0.0, -ball.y / dy)
+                if t < hit_time:
+                    hit_time, hit_axis = t, 1
+            if timings is not None:
+                now = clock()
+                timings[0] += now - start
+                start = now
+
+            # Colisión con la paleta
+            hit = sweep_box(ball.x, ball.y, ball.w, ball.h, dx, dy, paddle)
+            if hit is not None and hit[0] < hit_time:
+                hit_time, hit_axis = hit
+                hit_paddle = True
+            if timings is not None:
+                now = clock()
+                timings[1] += now - start
+                start = now
+
+            # Colisión con los ladrillos
+            hit = self.bricks.first_sweep_hit(ball, dx, dy, hit_time)
+            if hit is not None:
+                brick_hit, hit_time, hit_axis = hit
+                hit_paddle = False
+            if timings is not None:
+                timings[2] += clock() - start
+
+            if hit_time > 0:
+                ball.x += dx * hit_time
+                ball.y += dy * hit_time
+
+            if hit_axis is None:
+                break
+
+            if brick_hit is not None:
+                brick = brick_hit[0]
+                if hit_time < 0:
+                    # Ya se solapaban (p. ej. al reaparecer sobre los ladrillos):
+                    # sacar la bola por el lado más cercano
+                    self._push_out(ball, brick)
+                elif hit_axis == 0:
+                    self.ball_speed_x = -abs(self.ball_speed_x) if dx > 0 else abs(self.ball_speed_x)
+                else:
+                    self.ball_speed_y = -abs(self.ball_speed_y) if dy > 0 else abs(self.ball_speed_y)
+
+                if self.problem_rate < 1.0 and self.rng.random() >= self.problem_rate:
+                    self._hit_without_problem(brick_hit)
+                    if not self.bricks:
+                        events.append(EVENT_BRICK_BROKEN)
+                        events.append(EVENT_LEVEL_COMPLETE)
+                        if self.bus.active:
+                            self.bus.publish(LevelComplete(self.frame, self.level, self.level_seconds(),
+                                                           self.score))
+                        return events
+                    remaining *= 1.0 - max(0.0, hit_time)
+                    continue
+
+                # Generar problema matemático; se resuelve con answer()
+                problem, correct_answer = self.generate_math_problem()
+                self.challenge = (problem, correct_answer, brick_hit)
+                events.append(EVENT_BRICK_HIT)
+                if self.bus.active:
+                    self.bus.publish(BrickHit(self.frame, self.level, self.lives, problem))
+                return events
+
+            if hit_paddle:
+                # Cambiar dirección según dónde golpee la paleta (para dar más control)
+                relative_intersect_x = (paddle.x + (PADDLE_WIDTH / 2)) - ball.x
+                normalized_relative_intersect_x = relative_intersect_x / (PADDLE_WIDTH / 2)
+                bounce_angle = normalized_relative_intersect_x * (math.pi / 3)  # Máximo 60 grados
+
+                # Calcular nueva dirección
+                self.ball_speed_x = self.base_ball_speed * -math.sin(bounce_angle)
+                self.ball_speed_y = self.base_ball_speed * -math.cos(bounce_angle)
+
+                if hit_time < 0:
+                    # La paleta se movió sobre la bola: sacarla por encima
+                    ball.bottom = paddle.top - 1
+            elif hit_axis == 0:
+                self.ball_speed_x *= -1
+            else:
+                self.ball_speed_y *= -1
+
+            remaining *= 1.0 - max(0.0, hit_time)
+
+        if self.damaged:
+            events.append(EVENT_BRICK_DAMAGED)
+        if self.broken:
+            events.append(EVENT_BRICK_BROKEN)
+
+        # La bola cae por debajo de la pantalla
+        if ball.bottom >= SCREEN_HEIGHT:
+            self.lives -= 1
+            if self.bus.active:
+                self.bus.publish(LifeLost(self.frame, self.level, self.lives, False))
+            if self.lives <= 0:
+                events.append(EVENT_GAME_OVER)
+            else:
+                events.append(EVENT_LIFE_LOST)
+                self.reset_ball()
+                # El multibola termina al perder una vida
+                self.streak = 0
+                if balls is not None:
+                    balls.clear()
+
+                # Resetear la velocidad de la bola para dar tiempo al jugador
+                self.ball_speed_x = self.base_ball_speed * (1 if self.rng.random() > 0.5 else -1)
+                self.ball_speed_y = -self.base_ball_speed
+
+        return events
+
+    def answer(self, user_answer, elapsed):
+        events = self.events
+        events.clear()
+
+        problem, correct_answer, brick_data = self.challenge
+        self.challenge = None
+        self.last_problem_time = elapsed
+        self.level_answer_time += elapsed
+        bus = self.bus
+
+        if user_answer == correct_answer:
+            # Puntuación basada en el tiempo de respuesta
+            self.last_points = self.calculate_score_for_answer()
+            self.score += self.last_points
+            events.append(EVENT_CORRECT_ANSWER)
+            if bus.active:
+                bus.publish(Answer(self.frame, self.level, problem, True, elapsed, self.last_points))
+            remaining = self.brick_hits.get(brick_data, 1) - 1
+            if remaining:
+                # Ladrillo de varios golpes: queda en pie con uno menos
+                self.brick_hits[brick_data] = remaining
+                events.append(EVENT_BRICK_DAMAGED)
+            else:
+                self.bricks.remove(brick_data)
+                self.brick_hits.pop(brick_data, None)
+                if self.balls is not None:
+                    self.balls.remove_brick(brick_data)
+            if not self.bricks:
+                events.append(EVENT_LEVEL_COMPLETE)
+                if bus.active:
+                    bus.publish(LevelComplete(self.frame, self.level, self.level_seconds(), self.score))
+            else:
+                self.streak += 1
+                if self.streak % MULTIBALL_STREAK == 0 and self.spawn_balls(MULTIBALL_BALLS):
+                    events.append(EVENT_MULTIBALL)
+        else:
+            self.last_points = 0
+            self.streak = 0
+            self.lives -= 1
+            events.append(EVENT_WRONG_ANSWER)
+            if bus.active:
+                bus.publish(Answer(self.frame, self.level, problem, False, elapsed, 0))
+                bus.publish(LifeLost(self.frame, self.level, self.lives, True))
+            if self.lives <= 0:
+                events.append(EVENT_GAME_OVER)
+            else:
+                self.reset_ball()
+
+        # Mantener la velocidad progresiva
+        ball_speed_direction_x = 1 if self.ball_speed_x > 0 else -1
+        self.ball_speed_x = self.base_ball_speed * ball_speed_direction_x
+        self.ball_speed_y = -abs(self.base_ball_speed)
+
+        return events
+
+    def cancel_challenge(self):
+        # Si el usuario cancela, el ladrillo no se destruye
+        self.challenge = None
+
+
+def tracking_inputs(sim):
+    # Política sencilla para pruebas sin ventana: seguir la bola con la paleta
+    ball_center = sim.ball.x + sim.ball.w / 2
+    paddle_center = sim.paddle.x + sim.paddle.w / 2
+    if ball_center < paddle_center - PADDLE_SPEED:
+        return INPUT_LEFT
+    if ball_center > paddle_center + PADDLE_SPEED:
+        return INPUT_RIGHT
+    return 0
+
+
+def run_headless(steps, level=1, seed=None, accuracy=1.0, answer_time=2.0):
+    rng = random.Random(seed)
+    sim = GameSimulation(level, rng=rng)
+
+    for _ in range(steps):
+        sim.step(tracking_inputs(sim), FRAME_DT)
+        if sim.challenge is not None:
+            correct_answer = sim.challenge[1]
+            user_answer = correct_answer if rng.random() < accuracy else correct_answer + 1
+            sim.answer(user_answer, answer_time)
+        if sim.game_over:
+            break
+        if sim.level_complete:
+            sim.next_level()
+
+    return sim
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulación sin ventana de Math Breakout Adventure")
+    parser.add_argument('--steps', type=int, default=100000)
+    parser.add_argument('--level', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--accuracy', type=float, default=1.0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    sim = run_headless(args.steps, args.level, args.seed, args.accuracy)
+    elapsed = time.perf_counter() - start
+
+    print(f"Nivel: {sim.level}  Puntuación: {sim.score}  Vidas: {sim.lives}")
+    print(f"{sim.frame} pasos en {elapsed:.3f}s ({sim.frame / elapsed:.0f} pasos/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import io
+import os
+import wave
+
+import pygame
+
+# Tono de respaldo por efecto: frecuencia (Hz), volumen y duración (s)
+SOUND_TONES = {
+    'brick_hit': (440, 0.5, 0.12),
+    'wrong_answer': (220, 0.5, 0.35),
+    'game_over': (110, 0.5, 0.8),
+    'level_complete': (880, 0.5, 0.5),
+    'menu_move': (660, 0.3, 0.06),
+    'menu_select': (770, 0.3, 0.1),
+}
+
+# Rampas de entrada y salida para que el tono no suene con chasquidos
+ATTACK = 0.005
+RELEASE = 0.04
+
+
+def synthesize_tone(frequency, volume, duration, sample_rate):
+    # Seno mono int16 con envolvente, ya en el formato de 16 bits del mezclador
+    import numpy as np
+
+    samples = int(sample_rate * duration)
+    t = np.arange(samples, dtype=np.float32) / sample_rate
+    wave_data = np.sin(2 * np.pi * frequency * t)
+
+    envelope = np.ones(samples, dtype=np.float32)
+    attack = min(int(sample_rate * ATTACK), samples)
+    release = min(int(sample_rate * RELEASE), samples - attack)
+    envelope[:attack] = np.linspace(0, 1, attack, endpoint=False)
+    if release:
+        envelope[-release:] = np.linspace(1, 0, release)
+
+    return (wave_data * envelope * volume * 32767).astype(np.int16)
+
+
+def wav_bytes(samples, sample_rate):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(samples.tobytes())
+    return buffer.getvalue()
+
+
+class SoundBank:
+    # Efectos de sonido cargados la primera vez que se reproducen. Si falta el
+    # WAV en sounds/, se sintetiza un tono corto y se guarda en cache_dir para
+    # no volver a generarlo en la siguiente partida.
+    def __init__(self, directory='sounds', cache_dir='.sound_cache'):
+        self.directory = directory
+        self.cache_dir = cache_dir
+        self.sounds = {}
+
+    def _cache_path(self, name, sample_rate):
+        frequency, volume, duration = SOUND_TONES[name]
+        return os.path.join(self.cache_dir, f"{name}_{frequency}_{volume}_{duration}_{sample_rate}.wav")
+
+    def _synthesize(self, name):
+        mixer = pygame.mixer.get_init()
+        if mixer is None:
+            raise pygame.error("mezclador no inicializado")
+        sample_rate = mixer[0]
+        path = self._cache_path(name, sample_rate)
+        if os.path.exists(path):
+            return pygame.mixer.Sound(path)
+
+        data = wav_bytes(synthesize_tone(*SOUND_TONES[name], sample_rate), sample_rate)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            print(f"No se pudo guardar el sonido generado: {e}")
+        # SDL convierte el WAV al formato y canales del mezclador
+        return pygame.mixer.Sound(file=io.BytesIO(data))
+
+    def _load(self, name):
+        try:
+            # El mezclador se abre con el primer sonido, no al arrancar
+            if pygame.mixer.get_init() is None:
+                pygame.mixer.init()
+            return pygame.mixer.Sound(os.path.join(self.directory, name + '.wav'))
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Error cargando sonido {name}: {e}")
+
+        try:
+            return self._synthesize(name)
+        except pygame.error as e:
+            # Sin mezclador disponible el juego sigue, pero en silencio
+            print(f"Error generando sonido {name}: {e}")
+            return None
+
+    def get(self, name):
+        if name not in self.sounds:
+            self.sounds[name] = self._load(name)
+        return self.sounds[name]
+
+    def play(self, name):
+        sound = self.get(name)
+        if sound is not None:
+            sound.play()
@@ -0,0 +1,133 @@
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from autoplayer import BOT_ACCURACY, BOT_ANSWER_TIME, MAX_GAME_MINUTES, MAX_LEVEL, play_game
+from simulation import BALL_SPEED_BASE, BALL_SPEED_PER_LEVEL, BASE_BRICK_ROWS
+
+# Parámetros que se pueden barrer: de la simulación y del modelo de jugador
+SIM_PARAMETERS = ('speed_base', 'speed_per_level', 'base_rows', 'problem_rate')
+BOT_PARAMETERS = ('accuracy', 'answer_time')
+# Partidas por tarea: lo bastante grandes para que el reparto entre procesos
+# no pese y lo bastante pequeñas para equilibrar la carga
+CHUNK_GAMES = 8
+# Columnas numéricas del resultado de autoplayer.play_game que se agregan
+RESULT_FIELDS = ('level', 'levels_completed', 'score', 'wrong_answers', 'balls_lost', 'minutes')
+
+
+def play_chunk(config, seeds, max_minutes, max_level):
+    # Se ejecuta en un proceso del pool: devuelve una fila por partida
+    sim_options = {name: config[name] for name in SIM_PARAMETERS}
+    bot_options = {name: config[name] for name in BOT_PARAMETERS}
+    rows = []
+    for seed in seeds:
+        result = play_game(seed, max_minutes=max_minutes, max_level=max_level,
+                           bot_options=bot_options, sim_options=sim_options)
+        rows.append([result[field] for field in RESULT_FIELDS] + [result['end'] == 'game_over'])
+    return rows
+
+
+def summarize(rows, target_level):
+    # rows: array (partidas, RESULT_FIELDS + terminada)
+    level = rows[:, 0]
+    return {
+        "partidas": int(rows.shape[0]),
+        "nivel_medio": float(level.mean()),
+        "nivel_p10": float(np.percentile(level, 10)),
+        "nivel_p50": float(np.percentile(level, 50)),
+        "nivel_p90": float(np.percentile(level, 90)),
+        "llegan_objetivo": float((level >= target_level).mean()),
+        "puntuacion_media": float(rows[:, 2].mean()),
+        "fallos_medios": float(rows[:, 3].mean()),
+        "bolas_perdidas_medias": float(rows[:, 4].mean()),
+        "minutos_medios": float(rows[:, 5].mean()),
+        "terminadas": float(rows[:, 6].mean()),
+    }
+
+
+def run_sweep(configs, games, seed, workers, max_minutes, max_level, target_level, progress=True):
+    # Las mismas semillas para todas las configuraciones: las diferencias
+    # entre ellas se deben a los parámetros y no al azar
+    seeds = list(range(seed, seed + games))
+    chunks = [seeds[i:i + CHUNK_GAMES] for i in range(0, games, CHUNK_GAMES)]
+    rows = [[] for _ in configs]
+    total = len(configs) * len(chunks)
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(play_chunk, config, chunk, max_minutes, max_level): index
+                   for index, config in enumerate(configs) for chunk in chunks}
+        for future in as_completed(futures):
+            rows[futures[future]].extend(future.result())
+            done += 1
+            if progress and (done % max(1, total // 20) == 0 or done == total):
+                print(f"  {done}/{total} tareas", flush=True)
+    return [dict(config, **summarize(np.array(config_rows, dtype=float), target_level))
+            for config, config_rows in zip(configs, rows)]
+
+
+def parse_values(text, kind):
+    return [kind(value) for value in text.split(',')]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Barrido de dificultad con partidas del jugador simulado repartidas entre procesos")
+    parser.add_argument('--games', type=int, default=200, help="Partidas por configuración")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Procesos (por defecto, uno por núcleo)")
+    parser.add_argument('--speed-base', default=str(BALL_SPEED_BASE), help="Valores separados por comas")
+    parser.add_argument('--speed-per-level', default=str(BALL_SPEED_PER_LEVEL))
+    parser.add_argument('--base-rows', default=str(BASE_BRICK_ROWS))
+    parser.add_argument('--problem-rate', default='1.0',
+                        help="Probabilidad de que un golpe a un ladrillo plantee un problema")
+    parser.add_argument('--accuracy', default=str(BOT_ACCURACY))
+    parser.add_argument('--answer-time', default=str(BOT_ANSWER_TIME))
+    parser.add_argument('--max-minutes', type=float, default=MAX_GAME_MINUTES,
+                        help="Tiempo de juego máximo por partida")
+    parser.add_argument('--max-level', type=int, default=MAX_LEVEL)
+    parser.add_argument('--target-level', type=int, default=5,
+                        help="Nivel para el que se calcula qué fracción de partidas lo alcanza")
+    parser.add_argument('--output', default='sweep_results.json', help="Guardar los resultados en JSON")
+    args = parser.parse_args()
+
+    values = {
+        'speed_base': parse_values(args.speed_base, float),
+        'speed_per_level': parse_values(args.speed_per_level, float),
+        'base_rows': parse_values(args.base_rows, int),
+        'problem_rate': parse_values(args.problem_rate, float),
+        'accuracy': parse_values(args.accuracy, float),
+        'answer_time': parse_values(args.answer_time, float),
+    }
+    names = SIM_PARAMETERS + BOT_PARAMETERS
+    configs = [dict(zip(names, combination)) for combination in itertools.product(*(values[n] for n in names))]
+
+    print(f"{len(configs)} configuraciones × {args.games} partidas con {args.workers} procesos")
+    start = time.perf_counter()
+    results = run_sweep(configs, args.games, args.seed, args.workers, args.max_minutes, args.max_level,
+                        args.target_level)
+    elapsed = time.perf_counter() - start
+
+    varying = [name for name in names if len(values[name]) > 1]
+    header = " ".join(f"{name:>15}" for name in varying)
+    print(f"\n{header} {'nivel p10/50/90':>16} {'media':>6} {'≥ nivel ' + str(args.target_level):>10} "
+          f"{'puntuación':>11} {'minutos':>8}")
+    for result in results:
+        cells = " ".join(f"{result[name]:>15}" for name in varying)
+        levels = f"{result['nivel_p10']:.0f}/{result['nivel_p50']:.0f}/{result['nivel_p90']:.0f}"
+        print(f"{cells} {levels:>16} {result['nivel_medio']:>6.1f} {result['llegan_objetivo']:>10.0%} "
+              f"{result['puntuacion_media']:>11.0f} {result['minutos_medios']:>8.1f}")
+
+    played = len(configs) * args.games
+    print(f"\n{played} partidas en {elapsed:.1f}s ({played / elapsed:.1f} partidas/s)")
+    with open(args.output, 'w') as f:
+        json.dump({"parametros": values, "resultados": results}, f, indent=2)
+    print(f"Resultados guardados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from classroom_load import RemoteView
+from classroom_server import (MSG_ANSWER, MSG_CHALLENGE, MSG_LEVEL, MSG_RESULT, MSG_STATE, MSG_WELCOME, ANSWER,
+                              FIELD_DAMAGED, FIELD_REMOVED, STATE, ClassroomSession, message, read_message)
+from problem_bank import ProblemBank
+
+SEED = 5
+
+
+class Transport:
+    def get_write_buffer_size(self):
+        return 0
+
+    def abort(self):
+        pass
+
+
+class Writer:
+    # Lo mínimo que usa ClassroomSession de un asyncio.StreamWriter
+    def __init__(self):
+        self.transport = Transport()
+        self.data = bytearray()
+
+    def write(self, data):
+        self.data += data
+
+
+def read_all(data, max_length=None):
+    # Todos los mensajes de un flujo de bytes, leídos con read_message
+    async def read():
+        reader = asyncio.StreamReader()
+        reader.feed_data(bytes(data))
+        reader.feed_eof()
+        messages = []
+        while True:
+            try:
+                messages.append(await read_message(reader, max_length))
+            except asyncio.IncompleteReadError:
+                return messages
+    return asyncio.run(read())
+
+
+def new_session():
+    return ClassroomSession(1, "Ana", Writer(), SEED, ProblemBank(SEED))
+
+
+def deliver(session, view):
+    # Envía lo pendiente y lo aplica a la vista del cliente
+    session.send()
+    messages = read_all(session.writer.data)
+    session.writer.data.clear()
+    for kind, payload in messages:
+        if kind == MSG_LEVEL:
+            view.apply_level(payload)
+        elif kind == MSG_STATE:
+            view.apply_state(payload)
+    return messages
+
+
+def aim_at(sim, brick_data):
+    # Bola justo debajo del ladrillo, subiendo en vertical
+    brick = brick_data[0]
+    sim.ball.x = brick.x + (brick.w - sim.ball.w) / 2
+    sim.ball.y = brick.y + brick.h + 2
+    sim.ball_speed_x = 0.0
+    sim.ball_speed_y = -sim.base_ball_speed
+
+
+def lowest_brick(sim):
+    return max(sim.bricks, key=lambda brick_data: (brick_data[0].y, -brick_data[0].x))
+
+
+def test_messages_round_trip():
+    data = (message(MSG_WELCOME, b'\x01\x02') + message(MSG_CHALLENGE, "7 × 8 = ?".encode('utf-8')) +
+            message(MSG_ANSWER, ANSWER.pack(-56)) + message(MSG_RESULT))
+    messages = read_all(data)
+    assert [kind for kind, _ in messages] == [MSG_WELCOME, MSG_CHALLENGE, MSG_ANSWER, MSG_RESULT]
+    assert messages[1][1].decode('utf-8') == "7 × 8 = ?"
+    assert ANSWER.unpack(messages[2][1]) == (-56,)
+    assert messages[3][1] == b''
+    # Un mensaje cortado se queda sin leer
+    assert read_all(data[:-3] + message(MSG_ANSWER, ANSWER.pack(1))[:-1]) == messages[:3]
+
+
+def test_messages_longer_than_the_limit_are_rejected():
+    with pytest.raises(ValueError):
+        read_all(message(MSG_ANSWER, bytes(65)), max_length=64)
+
+
+def test_state_deltas_rebuild_the_game():
+    session = new_session()
+    sim = session.sim
+    view = RemoteView()
+    kinds = [kind for kind, _ in deliver(session, view)]
+    assert kinds == [MSG_WELCOME, MSG_LEVEL]
+    assert view.bricks == len(sim.bricks)
+
+    for tick in range(1, 600):
+        session.advance(tick, tick / 60)
+        if sim.challenge is not None:
+            session.answer(sim.challenge[1], tick / 60 + 1.0, tick)
+        deliver(session, view)
+        if sim.game_over or sim.level != 1:
+            break
+        assert (view.ball.x, view.ball.y) == (int(sim.ball.x), int(sim.ball.y))
+        assert view.paddle.x == int(sim.paddle.x)
+        assert (view.score, view.lives, view.tick) == (sim.score, sim.lives, tick)
+        assert view.bricks == len(sim.bricks) == len(view.brick_hits)
+        assert view.extra_balls == (sim.balls.count if sim.balls is not None else 0)
+    assert sim.score > 0
+
+
+def test_damaged_bricks_are_sent_with_their_hits():
+    session = new_session()
+    sim = session.sim
+    brick_data = lowest_brick(sim)
+    sim.brick_hits[brick_data] = 2
+    session.queue_level()
+    view = RemoteView()
+    deliver(session, view)
+    index = session.brick_index[brick_data]
+    assert view.brick_hits[index] == 2
+
+    # Primer acierto: el ladrillo sigue con un golpe menos
+    aim_at(sim, brick_data)
+    session.advance(1, 0.0)
+    assert sim.challenge[2] is brick_data
+    session.answer(sim.challenge[1], 1.0, 1)
+    states = [payload for kind, payload in deliver(session, view) if kind == MSG_STATE]
+    assert STATE.unpack_from(states[-1])[1] & FIELD_DAMAGED
+    assert view.brick_hits[index] == 1
+    assert view.bricks == len(sim.bricks)
+
+    # Segundo acierto: se rompe
+    aim_at(sim, brick_data)
+    session.advance(2, 2.0)
+    session.answer(sim.challenge[1], 3.0, 2)
+    states = [payload for kind, payload in deliver(session, view) if kind == MSG_STATE]
+    mask = STATE.unpack_from(states[-1])[1]
+    assert mask & FIELD_REMOVED and not mask & FIELD_DAMAGED
+    assert index not in view.brick_hits
+    assert view.bricks == len(sim.bricks)
@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from level_pack import LevelPack, export_json, generated_levels, import_json, levels_from_json, write_pack
+
+
+def custom_level():
+    # Ladrillos en los extremos de cada campo del registro y de varios golpes
+    return ("Extremos ñ", [(-32768, 32767, 1, 65535, (0, 128, 255), 1),
+                           (100, 100, 200, 40, (255, 0, 0), 3),
+                           (400, 100, 80, 30, (0, 255, 0), 255)])
+
+
+def json_level(**brick):
+    # Un nivel correcto y un segundo con el ladrillo modificado
+    good = {"x": 10, "y": 20, "w": 80, "h": 30, "color": [255, 0, 0], "hits": 1}
+    return {"levels": [{"name": "Bien", "bricks": [good]},
+                       {"name": "Mal", "bricks": [dict(good, **brick)]}]}
+
+
+def test_pack_survives_json_round_trip(tmp_path):
+    original = str(tmp_path / 'original.mblp')
+    exported = str(tmp_path / 'niveles.json')
+    imported = str(tmp_path / 'importado.mblp')
+    write_pack(original, generated_levels(5) + [custom_level()])
+
+    assert export_json(original, exported) == 6
+    assert import_json(exported, imported) == 6
+    with open(original, 'rb') as f, open(imported, 'rb') as g:
+        assert f.read() == g.read()
+
+    pack = LevelPack(imported)
+    try:
+        assert pack.name(6) == "Extremos ñ"
+        assert pack.bricks(6) == custom_level()[1]
+    finally:
+        pack.close()
+
+
+@pytest.mark.parametrize("brick", [{"x": 40000}, {"y": -40000}, {"w": 0}, {"h": 70000},
+                                   {"color": [0, 256, 0]}, {"color": [-1, 0, 0]}, {"hits": 0}, {"hits": 256}])
+def test_out_of_range_values_name_the_level(tmp_path, brick):
+    path = tmp_path / 'niveles.json'
+    path.write_text(json.dumps(json_level(**brick)), encoding='utf-8')
+    with pytest.raises(ValueError, match="nivel 2"):
+        import_json(str(path), str(tmp_path / 'niveles.mblp'))
+    assert not (tmp_path / 'niveles.mblp').exists()
+
+
+def test_level_without_bricks_is_rejected():
+    data = {"levels": [{"name": "Vacío", "bricks": []}]}
+    with pytest.raises(ValueError, match="nivel 1 no tiene ladrillos"):
+        levels_from_json(data)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from problem_bank import OP_ADD, OP_SUB, OP_MUL, OP_DIV, ProblemBank, generate_pool, generate_problems
+
+OPERATIONS = {OP_ADD: np.add, OP_SUB: np.subtract, OP_MUL: np.multiply, OP_DIV: np.floor_divide}
+
+
+def counts(op):
+    return list(np.bincount(op, minlength=4))
+
+
+def test_pool_quotas_follow_the_weights():
+    rng = np.random.default_rng(1)
+    # Sin pesos, el resto de la división se reparte desde el primer operador
+    assert counts(generate_pool(1, 200, rng)[0]) == [67, 67, 66, 0]
+    assert counts(generate_pool(4, 200, rng)[0]) == [50, 50, 50, 50]
+    assert counts(generate_pool(4, 200, rng, {'+': 3, '/': 1})[0]) == [150, 0, 0, 50]
+    # Los pesos de operadores que el nivel no tiene no cuentan
+    assert counts(generate_pool(1, 200, rng, {'+': 1, '/': 5})[0]) == [200, 0, 0, 0]
+
+
+def test_pool_has_no_repeated_problems_and_right_answers():
+    op, a, b, answer = generate_pool(5, 200, np.random.default_rng(2))
+    assert len(set(zip(op, a, b))) == op.size == 200
+    for operator, operation in OPERATIONS.items():
+        mask = op == operator
+        assert (operation(a[mask], b[mask]) == answer[mask]).all()
+
+
+@pytest.mark.parametrize("level, weights", [(1, {'/': 1}), (4, {}), (2, {'+': 0, '-': 0})])
+def test_weights_without_operators_for_the_level_are_rejected(level, weights):
+    with pytest.raises(ValueError, match=f"nivel {level}"):
+        generate_pool(level, 200, np.random.default_rng(3), weights)
+    with pytest.raises(ValueError, match=f"nivel {level}"):
+        generate_problems(level, 100, np.random.default_rng(3), weights)
+
+
+def draw(bank, levels, count):
+    return [bank.next_problem(level) for _ in range(count) for level in levels]
+
+
+def test_bank_seed_gives_same_problems_with_or_without_background_refill():
+    # Con low_water=-1 nunca se prepara una reserva en segundo plano: cada una
+    # se genera al agotarse la anterior. Con la misma semilla deben coincidir.
+    background = ProblemBank(seed=9, pool_size=50, low_water=20)
+    inline = ProblemBank(seed=9, pool_size=50, low_water=-1)
+    first = draw(background, (1, 4), 180)
+    assert not inline.pending
+    assert first == draw(inline, (1, 4), 180)
+    assert first != draw(ProblemBank(seed=10, pool_size=50, low_water=20), (1, 4), 180)
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from autoplayer import BotController
+from problem_bank import ProblemBank
+from replay import (HEADER, MAGIC, MAX_RUN, REC_STEPS, SessionRecorder, read_session, replay_session)
+from simulation import GameSimulation, session_rng
+
+SEED = 11
+STEPS = 20000
+# Uno de cada CANCEL_EVERY desafíos se cancela, como con ESC
+CANCEL_EVERY = 7
+
+
+def record_bot_session(path, seed=SEED, steps=STEPS):
+    # Partida con el jugador simulado grabada como la graba MathBreakout:
+    # reinicio inicial, pasos, respuestas, cancelaciones y cambios de nivel
+    sim = GameSimulation(1, rng=session_rng(seed, 'simulacion'), problems=ProblemBank(seed))
+    bot = BotController(random.Random(seed), answer_time=2.0)
+    recorder = SessionRecorder(path, seed)
+    recorder.reset(1)
+    challenges = 0
+    for _ in range(steps):
+        inputs = bot.inputs(sim)
+        recorder.step(inputs)
+        sim.step(inputs)
+        if sim.challenge is not None:
+            challenges += 1
+            if challenges % CANCEL_EVERY == 0:
+                recorder.cancel()
+                sim.cancel_challenge()
+            else:
+                value, seconds = bot.answer(sim)
+                recorder.answer(value, seconds)
+                sim.answer(value, seconds)
+        if sim.game_over:
+            recorder.reset(1)
+            sim.reset(1)
+        elif sim.level_complete:
+            recorder.reset(sim.level + 1)
+            sim.next_level()
+    recorder.close()
+    return sim
+
+
+def state(sim):
+    return (sim.frame, sim.score, sim.lives, sim.level, len(sim.bricks), sim.ball.x, sim.ball.y,
+            sim.ball_speed_x, sim.ball_speed_y)
+
+
+def test_replay_reproduces_recorded_session(tmp_path):
+    path = str(tmp_path / 'sesion.mbr')
+    played = record_bot_session(path)
+    seed, records = read_session(path)
+    assert seed == SEED
+
+    replayed = replay_session(seed, records)
+    assert state(replayed) == state(played)
+    assert played.score > 0
+
+
+def test_identical_inputs_are_run_length_encoded(tmp_path):
+    path = str(tmp_path / 'sesion.mbr')
+    recorder = SessionRecorder(path, SEED)
+    recorder.reset(1)
+    for _ in range(MAX_RUN + 10):
+        recorder.step(0)
+    for _ in range(3):
+        recorder.step(1)
+    recorder.close()
+
+    _, records = read_session(path)
+    # Los tramos se parten al llegar a MAX_RUN pasos
+    assert records[1:] == [(REC_STEPS, 0, MAX_RUN), (REC_STEPS, 0, 10), (REC_STEPS, 1, 3)]
+
+
+def test_other_versions_are_rejected(tmp_path):
+    path = tmp_path / 'antigua.mbr'
+    path.write_bytes(HEADER.pack(MAGIC, 1, SEED))
+    with pytest.raises(ValueError):
+        read_session(str(path))
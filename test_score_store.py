@@ -0,0 +1,116 @@
+import json
+import os
+
+import score_store
+from leaderboard import Leaderboard
+from score_store import HighScoreStore
+
+
+def entry(score, level=1, player="Ana"):
+    return {"player": player, "score": score, "level": level, "date": "01/09/2026"}
+
+
+def write_snapshot(path, entries):
+    with open(path, 'w') as f:
+        json.dump(entries, f)
+
+
+def write_journal(path, entries, tail=''):
+    with open(path + '.journal', 'w') as f:
+        for item in entries:
+            f.write(json.dumps(item) + '\n')
+        f.write(tail)
+
+
+def read_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def scores(entries):
+    return [item["score"] for item in entries]
+
+
+def test_half_written_journal_line_is_ignored(tmp_path):
+    path = str(tmp_path / 'high_scores.json')
+    write_snapshot(path, [entry(500)])
+    # Cierre inesperado a mitad de la última línea
+    write_journal(path, [entry(900), entry(300)], tail='{"player": "Luis", "sco')
+
+    assert scores(HighScoreStore(path).load()) == [900, 500, 300]
+    # El diario se ha aplicado a la instantánea y se ha vaciado
+    assert scores(read_json(path)) == [900, 500, 300]
+    assert not os.path.exists(path + '.journal')
+
+
+def test_journal_without_snapshot(tmp_path):
+    path = str(tmp_path / 'high_scores.json')
+    write_journal(path, [entry(100), entry(700), entry(400)])
+
+    assert scores(HighScoreStore(path).load()) == [700, 400, 100]
+    assert scores(read_json(path)) == [700, 400, 100]
+    assert not os.path.exists(path + '.journal')
+
+
+def test_load_keeps_only_the_best(tmp_path):
+    path = str(tmp_path / 'high_scores.json')
+    write_snapshot(path, [entry(score) for score in range(100, 900, 100)])
+    write_journal(path, [entry(score) for score in range(150, 950, 100)])
+
+    assert scores(HighScoreStore(path, max_entries=5).load()) == [850, 800, 750, 700, 650]
+
+
+def test_corrupt_snapshot_is_set_aside(tmp_path):
+    path = str(tmp_path / 'high_scores.json')
+    with open(path, 'w') as f:
+        f.write('[{"score": 1')
+    write_journal(path, [entry(200)])
+
+    assert scores(HighScoreStore(path).load()) == [200]
+    assert os.path.exists(path + '.corrupt')
+
+
+def test_additions_go_to_the_journal_until_compaction(tmp_path, monkeypatch):
+    monkeypatch.setattr(score_store, 'COMPACT_EVERY', 3)
+    path = str(tmp_path / 'high_scores.json')
+    store = HighScoreStore(path)
+    store.load()
+
+    store.add(entry(100))
+    store.add(entry(300))
+    store.close()
+    # Aún por debajo de COMPACT_EVERY: solo el diario
+    assert not os.path.exists(path)
+    with open(path + '.journal') as f:
+        assert len(f.readlines()) == 2
+
+    store.add(entry(200))
+    store.close()
+    # Al llegar a COMPACT_EVERY el diario pasa a la instantánea
+    assert scores(read_json(path)) == [300, 200, 100]
+    assert not os.path.exists(path + '.journal')
+    assert not os.path.exists(path + '.tmp')
+    assert scores(HighScoreStore(path).load()) == [300, 200, 100]
+
+
+def test_leaderboard_migrates_snapshot_and_journal(tmp_path):
+    legacy = str(tmp_path / 'high_scores.json')
+    write_snapshot(legacy, [entry(500, player="Ana")])
+    write_journal(legacy, [entry(800, level=3, player="Luis")], tail='{"score": 9')
+
+    leaderboard = Leaderboard(str(tmp_path / 'high_scores.db'), legacy)
+    try:
+        assert leaderboard.count() == 2
+        best = leaderboard.top(1)[0]
+        assert (best["player"], best["score"], best["level"], best["date"]) == ("Luis", 800, 3, "01/09/2026")
+        # Las fechas antiguas (dd/mm/aaaa) se guardan como aaaa-mm-dd
+        assert len(leaderboard.top_since("2026-09-01")) == 2
+    finally:
+        leaderboard.close()
+
+    # La migración se hace una sola vez
+    leaderboard = Leaderboard(str(tmp_path / 'high_scores.db'), legacy)
+    try:
+        assert leaderboard.count() == 2
+    finally:
+        leaderboard.close()
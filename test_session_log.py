@@ -0,0 +1,77 @@
+import glob
+import os
+
+import pytest
+
+from event_bus import Answer, BrickHit, EventBus, LevelComplete, LifeLost
+from log_stats import load_events, load_players, summarize
+from session_log import (HEADER, RECORD, KIND_ANSWER, KIND_BRICK_HIT, KIND_LEVEL_COMPLETE, KIND_LIFE_LOST,
+                         OPERATOR_CODES, SessionLogger)
+
+
+def play(bus):
+    # Dos desafíos en el nivel 1 (uno fallado) y el nivel completado
+    bus.publish(BrickHit(10, 1, 3, "12 + 5 = ?"))
+    bus.publish(Answer(10, 1, "12 + 5 = ?", True, 1.5, 150))
+    bus.publish(BrickHit(20, 1, 3, "7 * 8 = ?"))
+    bus.publish(Answer(20, 1, "7 * 8 = ?", False, 4.0, 0))
+    bus.publish(LifeLost(20, 1, 2, True))
+    bus.publish(LevelComplete(30, 1, 42.5, 150))
+
+
+def log_session(directory, player, **options):
+    bus = EventBus()
+    logger = SessionLogger(str(directory), player, seed=7, **options)
+    logger.attach(bus)
+    play(bus)
+    logger.close()
+    return logger
+
+
+def test_records_read_back_through_numpy(tmp_path):
+    logger = log_session(tmp_path, "Ana")
+    events = load_events([str(tmp_path)])
+
+    assert list(events['kind']) == [KIND_BRICK_HIT, KIND_ANSWER, KIND_BRICK_HIT, KIND_ANSWER,
+                                    KIND_LIFE_LOST, KIND_LEVEL_COMPLETE]
+    assert set(events['session']) == {logger.session}
+    answers = events[events['kind'] == KIND_ANSWER]
+    assert list(answers['operator']) == [OPERATOR_CODES['+'], OPERATOR_CODES['*']]
+    assert list(zip(answers['a'], answers['b'])) == [(12, 5), (7, 8)]
+    assert list(answers['flag']) == [1, 0]
+    assert list(answers['seconds']) == [1.5, 4.0]
+    assert list(answers['points']) == [150, 0]
+    assert events[events['kind'] == KIND_LIFE_LOST]['lives'][0] == 2
+
+    summary = summarize(events, load_players([str(tmp_path)]))
+    assert (summary["eventos"], summary["sesiones"], summary["respuestas"]) == (6, 1, 2)
+    assert summary["aciertos"] == 0.5
+    assert summary["tiempo_medio"] == pytest.approx(2.75)
+    assert (summary["vidas_perdidas"], summary["vidas_por_fallo"], summary["niveles_completados"]) == (1, 1, 1)
+    assert summary["por_nivel"][0]["duracion_media"] == pytest.approx(42.5)
+    assert summary["por_jugador"] == [{"jugador": "Ana", "respuestas": 2, "aciertos": 0.5,
+                                       "tiempo_medio": pytest.approx(2.75)}]
+
+
+def test_files_rotate_when_full(tmp_path):
+    # Cada lote de 2 registros llena un archivo: el siguiente va a otro nuevo
+    bus = EventBus()
+    logger = SessionLogger(str(tmp_path), "Luis", seed=7, max_bytes=HEADER.size + 2 * RECORD.size,
+                           batch_records=2)
+    logger.attach(bus)
+    for frame in range(3):
+        bus.publish(BrickHit(frame, 1, 3, "1 + 1 = ?"))
+        bus.publish(Answer(frame, 1, "1 + 1 = ?", True, 1.0, 100))
+        # Esperar a cada lote para que el escritor no los junte en una escritura
+        logger.wait()
+    logger.close()
+
+    files = sorted(glob.glob(os.path.join(str(tmp_path), '*.mbev')))
+    assert [name[-9:] for name in files] == ['-001.mbev', '-002.mbev', '-003.mbev']
+    assert all(os.path.getsize(name) == HEADER.size + 2 * RECORD.size for name in files)
+
+    events = load_events([str(tmp_path)])
+    assert list(events['kind']) == [KIND_BRICK_HIT, KIND_ANSWER] * 3
+    summary = summarize(events, load_players([str(tmp_path)]))
+    assert (summary["respuestas"], summary["aciertos"]) == (3, 1.0)
+    assert summary["por_jugador"][0]["jugador"] == "Luis"
@@ -0,0 +1,246 @@
+import random
+
+import pytest
+
+from simulation import (SCREEN_WIDTH, SCREEN_HEIGHT, STARTING_LIVES, EVENT_BRICK_HIT, EVENT_BRICK_BROKEN,
+                        EVENT_CORRECT_ANSWER, EVENT_WRONG_ANSWER, EVENT_LIFE_LOST, EVENT_GAME_OVER, EVENT_LEVEL_COMPLETE,
+                        BrickGrid, GameSimulation, Rect, run_headless, sweep_box)
+
+
+def new_simulation(level=1, seed=1):
+    return GameSimulation(level, rng=random.Random(seed))
+
+
+def lowest_brick(sim):
+    # Ladrillo de la fila inferior más a la izquierda: nada lo tapa por debajo
+    return max(sim.bricks, key=lambda brick_data: (brick_data[0].y, -brick_data[0].x))
+
+
+def aim_at(sim, brick_data):
+    # Bola justo debajo del ladrillo, subiendo en vertical
+    brick = brick_data[0]
+    sim.ball.x = brick.x + (brick.w - sim.ball.w) / 2
+    sim.ball.y = brick.y + brick.h + 2
+    sim.ball_speed_x = 0.0
+    sim.ball_speed_y = -sim.base_ball_speed
+
+
+def drop_ball(sim):
+    # Bola a punto de salir por abajo, lejos de la paleta
+    sim.ball.x = 0
+    sim.ball.y = SCREEN_HEIGHT - sim.ball.h - 1
+    sim.ball_speed_x = 0.0
+    sim.ball_speed_y = sim.base_ball_speed
+
+
+def snapshot(sim):
+    return sim.frame, sim.level, sim.score, sim.lives, len(sim.bricks), sim.ball.x, sim.ball.y
+
+
+def test_same_seed_gives_same_game():
+    first = run_headless(20000, seed=7, accuracy=0.8)
+    second = run_headless(20000, seed=7, accuracy=0.8)
+    assert snapshot(first) == snapshot(second)
+    # La partida ha llegado a jugarse: hay puntos y ladrillos rotos
+    assert first.score > 0
+
+
+def test_different_seeds_give_different_games():
+    assert snapshot(run_headless(20000, seed=1, accuracy=0.8)) != snapshot(run_headless(20000, seed=2, accuracy=0.8))
+
+
+def test_brick_hit_freezes_physics_until_answered():
+    sim = new_simulation()
+    aim_at(sim, lowest_brick(sim))
+    events = sim.step(0)
+    assert EVENT_BRICK_HIT in events
+    assert sim.challenge is not None
+
+    frame = sim.frame
+    position = (sim.ball.x, sim.ball.y)
+    assert sim.step(0) == []
+    assert (sim.frame, sim.ball.x, sim.ball.y) == (frame, *position)
+
+
+def test_correct_answer_scores_and_removes_brick():
+    sim = new_simulation(level=2)
+    brick_data = lowest_brick(sim)
+    bricks = len(sim.bricks)
+    aim_at(sim, brick_data)
+    sim.step(0)
+
+    sim.answer(sim.challenge[1], 1.0)
+    assert EVENT_CORRECT_ANSWER in sim.events
+    # 100 base + 20 por cada segundo por debajo de 5 + 10 por nivel
+    assert sim.score == 100 + 4 * 20 + 2 * 10
+    assert sim.lives == STARTING_LIVES
+    assert len(sim.bricks) == bricks - 1
+    assert brick_data not in list(sim.bricks)
+    assert sim.challenge is None
+
+
+def test_wrong_answer_costs_a_life_and_keeps_brick():
+    sim = new_simulation()
+    brick_data = lowest_brick(sim)
+    bricks = len(sim.bricks)
+    aim_at(sim, brick_data)
+    sim.step(0)
+
+    sim.answer(sim.challenge[1] + 1, 1.0)
+    assert EVENT_WRONG_ANSWER in sim.events
+    assert sim.score == 0
+    assert sim.lives == STARTING_LIVES - 1
+    assert len(sim.bricks) == bricks
+    # La bola vuelve al centro
+    assert sim.ball.x == SCREEN_WIDTH // 2 - sim.ball.w // 2
+
+
+def test_losing_the_ball_costs_a_life():
+    sim = new_simulation()
+    drop_ball(sim)
+    events = sim.step(0)
+    assert EVENT_LIFE_LOST in events
+    assert sim.lives == STARTING_LIVES - 1
+    assert sim.ball.y == SCREEN_HEIGHT // 2 - sim.ball.h // 2
+    assert sim.ball_speed_y < 0
+
+
+def test_last_life_ends_the_game():
+    sim = new_simulation()
+    sim.lives = 1
+    drop_ball(sim)
+    events = sim.step(0)
+    assert EVENT_GAME_OVER in events
+    assert sim.game_over
+    frame = sim.frame
+    assert sim.step(0) == []
+    assert sim.frame == frame
+
+
+def test_clearing_the_board_completes_the_level():
+    sim = new_simulation()
+    last = lowest_brick(sim)
+    for brick_data in list(sim.bricks):
+        if brick_data is not last:
+            sim.bricks.remove(brick_data)
+    sim.score = 500
+    sim.lives = 3
+    aim_at(sim, last)
+    sim.step(0)
+    sim.answer(sim.challenge[1], 1.0)
+    assert EVENT_LEVEL_COMPLETE in sim.events
+    assert sim.level_complete
+
+    score = sim.score
+    speed = sim.base_ball_speed
+    sim.next_level()
+    assert sim.level == 2
+    # La puntuación se mantiene, las vidas se reponen y la bola acelera
+    assert sim.score == score
+    assert sim.lives == STARTING_LIVES
+    assert sim.base_ball_speed > speed
+    assert len(sim.bricks) > 0
+
+
+def single_brick(sim, x, y, w=80, h=30):
+    # Deja en el tablero un único ladrillo
+    brick_data = (Rect(x, y, w, h), (255, 0, 0))
+    sim.bricks = BrickGrid()
+    sim.bricks.add(brick_data)
+    sim.brick_hits = {}
+    return brick_data
+
+
+def launch(sim, x, y, speed_x, speed_y):
+    sim.ball.x, sim.ball.y = x, y
+    sim.ball_speed_x, sim.ball_speed_y = speed_x, speed_y
+
+
+def test_sweep_box_reports_entry_time_and_axis():
+    target = Rect(50, 0, 30, 30)
+    assert sweep_box(0, 0, 20, 20, 100, 0, target) == (pytest.approx(0.3), 0)
+    assert sweep_box(0, 100, 20, 20, 0, -100, Rect(0, 0, 30, 30)) == (pytest.approx(0.7), 1)
+    # En paralelo o sin llegar no hay impacto
+    assert sweep_box(0, 40, 20, 20, 100, 0, target) is None
+    assert sweep_box(0, 0, 20, 20, 10, 0, target) is None
+
+
+@pytest.mark.parametrize("speed", [40, 100, 400])
+def test_fast_ball_does_not_tunnel_through_thin_brick(speed):
+    # En un paso la bola recorre más que el ladrillo (30 px) y ella misma
+    # (20 px): una comprobación solo en la posición final lo atravesaría
+    sim = new_simulation()
+    brick_data = single_brick(sim, 400, 300)
+    launch(sim, 430, 340, 0.0, -speed)
+    events = sim.step(0)
+    assert EVENT_BRICK_HIT in events
+    assert sim.challenge[2] is brick_data
+    # Se detiene contra la cara inferior y rebota hacia abajo
+    assert sim.ball.y == pytest.approx(330)
+    assert not sim.ball.colliderect(brick_data[0])
+    assert sim.ball_speed_y > 0
+
+
+@pytest.mark.parametrize("start_x, axis", [(76, 'y'), (74, 'x')])
+def test_corner_hit_bounces_off_the_side_touched_first(start_x, axis):
+    # Bola subiendo en diagonal hacia la esquina inferior izquierda del
+    # ladrillo: si entra antes por debajo rebota en vertical; si entra
+    # antes por el lado izquierdo, en horizontal
+    sim = new_simulation()
+    single_brick(sim, 100, 100)
+    launch(sim, start_x, 135, 10.0, -10.0)
+    assert EVENT_BRICK_HIT in sim.step(0)
+    if axis == 'y':
+        assert (sim.ball_speed_x, sim.ball_speed_y) == (10.0, 10.0)
+        assert sim.ball.y == pytest.approx(130)
+    else:
+        assert (sim.ball_speed_x, sim.ball_speed_y) == (-10.0, -10.0)
+        assert sim.ball.x == pytest.approx(80)
+
+
+def test_several_wall_bounces_in_one_step():
+    # Pared izquierda en t=0.2 y techo más tarde: los dos rebotes se
+    # resuelven en el mismo paso y la bola acaba donde la reflejan
+    sim = new_simulation()
+    launch(sim, 2, 5, -10.0, -10.0)
+    assert sim.step(0) == []
+    assert (sim.ball_speed_x, sim.ball_speed_y) == (10.0, 10.0)
+    assert (sim.ball.x, sim.ball.y) == (pytest.approx(8), pytest.approx(5))
+
+
+def test_wall_bounce_then_brick_hit_in_one_step():
+    sim = new_simulation()
+    brick_data = single_brick(sim, 10, 60)
+    launch(sim, 4, 97, -10.0, -10.0)
+    events = sim.step(0)
+    assert EVENT_BRICK_HIT in events
+    assert sim.challenge[2] is brick_data
+    # Rebote en la pared (x) y luego en la cara inferior del ladrillo (y)
+    assert (sim.ball_speed_x, sim.ball_speed_y) == (10.0, 10.0)
+    assert sim.ball.y == pytest.approx(90)
+
+
+def test_drained_ball_pool_does_not_repeat_broken_bricks():
+    # Una bola extra rompe un ladrillo en el mismo paso en que se pierde la
+    # bola principal, que vacía el grupo: los pasos siguientes no deben
+    # volver a informar de ese ladrillo
+    sim = new_simulation()
+    brick_data = single_brick(sim, 400, 300)
+    sim.bricks.add((Rect(100, 100, 80, 30), (0, 255, 0)))
+    sim.spawn_balls(1)
+    balls = sim.balls
+    index = balls.active.argmax()
+    balls.x[index], balls.y[index] = 430.0, 331.0
+    balls.vx[index], balls.vy[index] = 0.0, -5.0
+    drop_ball(sim)
+
+    events = sim.step(0)
+    assert EVENT_BRICK_BROKEN in events and EVENT_LIFE_LOST in events
+    assert balls.broken == [brick_data]
+    assert balls.count == 0
+
+    for _ in range(10):
+        events = sim.step(0)
+        assert EVENT_BRICK_BROKEN not in events
+        assert sim.broken == [] and sim.damaged == []
+        assert balls.broken == [] and balls.damaged == []